@@ -0,0 +1,184 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from data_store import parse_dates
+
+
+def monthly_installments(loan_amounts, interest_rates, tenures):
+    """
+    Calculate the monthly installment of many loans in one NumPy pass.
+
+    Uses the same annuity formula as loan_service.calculate_monthly_installment
+    (identical up to floating point rounding of the vectorized power) and
+    falls back to straight-line repayment (amount / tenure) for loans with
+    a 0% interest rate instead of dividing by zero.
+
+    Parameters:
+    - loan_amounts (array-like of float): The total amount of each loan.
+    - interest_rates (array-like of float): The annual interest rate of each
+      loan (as a percentage).
+    - tenures (array-like of int): The tenure of each loan in months.
+
+    Returns:
+    - np.ndarray: The monthly installment of each loan.
+    """
+    loan_amounts = np.asarray(loan_amounts, dtype=float)
+    monthly_interest_rates = np.asarray(interest_rates, dtype=float) / 12 / 100
+    tenures = np.asarray(tenures, dtype=float)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        annuity = (loan_amounts * monthly_interest_rates) / (1 - (1 + monthly_interest_rates) ** -tenures)
+        straight_line = loan_amounts / tenures
+
+    return np.where(monthly_interest_rates == 0, straight_line, annuity)
+
+
+def _installment_breakdown(loan_amounts, monthly_interest_rates, installments, tenures, payment_numbers):
+    """
+    Evaluate installment number k of every loan in closed form.
+
+    Balances use B_k = P(1 + r)^k - EMI((1 + r)^k - 1) / r (or P - EMI * k
+    at 0%), so any month of any loan can be computed without iterating over
+    the months before it. All arguments broadcast against each other; cells
+    where k is outside 1..tenure are zero.
+    """
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        growth = (1 + monthly_interest_rates) ** (payment_numbers - 1)
+        opening_balance = np.where(
+            monthly_interest_rates == 0,
+            loan_amounts - installments * (payment_numbers - 1),
+            loan_amounts * growth - installments * (growth - 1) / monthly_interest_rates,
+        )
+
+    interest = monthly_interest_rates * opening_balance
+    principal = installments - interest
+    in_tenure = (payment_numbers >= 1) & (payment_numbers <= tenures)
+
+    return {
+        'payment': np.where(in_tenure, installments, 0.0),
+        'interest': np.where(in_tenure, interest, 0.0),
+        'principal': np.where(in_tenure, principal, 0.0),
+        'balance': np.where(in_tenure, opening_balance - principal, 0.0),
+    }
+
+
+def amortization_schedule(loan_amounts, interest_rates, tenures):
+    """
+    Build the month-by-month repayment schedule of many loans at once.
+
+    Every schedule is laid out on a common grid of max(tenures) months, so
+    row i, column k holds month k + 1 of loan i. Months after a loan's
+    tenure are zero.
+
+    Parameters:
+    - loan_amounts (array-like of float): The total amount of each loan.
+    - interest_rates (array-like of float): The annual interest rate of each
+      loan (as a percentage).
+    - tenures (array-like of int): The tenure of each loan in months.
+
+    Returns:
+    - dict: 2D arrays of shape (number of loans, max tenure):
+        - 'payment': The installment paid in each month.
+        - 'interest': The interest part of each installment.
+        - 'principal': The principal part of each installment.
+        - 'balance': The outstanding principal after each installment.
+    """
+    loan_amounts = np.asarray(loan_amounts, dtype=float)
+    interest_rates = np.asarray(interest_rates, dtype=float)
+    tenures = np.asarray(tenures, dtype=int)
+
+    installments = monthly_installments(loan_amounts, interest_rates, tenures)
+    payment_numbers = np.arange(1, tenures.max(initial=0) + 1)
+
+    return _installment_breakdown(loan_amounts[:, None], interest_rates[:, None] / 12 / 100,
+                                  installments[:, None], tenures[:, None], payment_numbers[None, :])
+
+
+def _approval_dates(loans):
+    """
+    Return the approval date of every loan, whichever column it is stored in.
+
+    The shipped rows use 'DateofApproval' while rows written by create_loan
+    use 'DateOfApproval'; values may be strings or already parsed. Loans
+    from the data store carry the merged, parsed 'approval_date' column.
+    """
+    if 'approval_date' in loans:
+        return loans['approval_date']
+
+    approval_dates = pd.Series(pd.NaT, index=loans.index, dtype='datetime64[s]')
+
+    for column in ('DateofApproval', 'DateOfApproval'):
+        if column in loans:
+            values = loans[column]
+            if not pd.api.types.is_datetime64_any_dtype(values):
+                values = parse_dates(values)
+            approval_dates = approval_dates.fillna(values)
+
+    return approval_dates
+
+
+def project_monthly_cash_inflow(loans, start=None, months=12, chunk_size=100_000):
+    """
+    Project the monthly cash inflow of a whole loan portfolio.
+
+    Only the installments that fall inside the projected window are
+    evaluated: for every loan and calendar month the installment number is
+    derived from the loan's approval month and evaluated in closed form.
+    Loans are processed in chunks so memory stays bounded by
+    chunk_size * months. The first installment of a loan is due the month
+    after its approval. Loans with an unknown approval date, amount,
+    interest rate or tenure are left out.
+
+    Parameters:
+    - loans (pd.DataFrame): Loan table with 'LoanAmount', 'InterestRate',
+      'Tenure' and 'DateofApproval' and/or 'DateOfApproval'.
+    - start (datetime, optional): First projected month. Defaults to the
+      current month.
+    - months (int): Number of months to project.
+    - chunk_size (int): Number of loans evaluated at a time.
+
+    Returns:
+    - pd.DataFrame: One row per calendar month (a monthly PeriodIndex) with
+      the total 'payment', 'interest' and 'principal' due that month.
+    """
+    if start is None:
+        start = datetime.now()
+
+    approval_dates = _approval_dates(loans)
+    loan_amounts = loans['LoanAmount'].to_numpy(dtype=float)
+    interest_rates = loans['InterestRate'].to_numpy(dtype=float)
+    tenures = loans['Tenure'].to_numpy(dtype=float)
+
+    # Leave out loans missing a figure their due dates or installments need
+    with np.errstate(invalid='ignore'):
+        known = (approval_dates.notna().to_numpy() & np.isfinite(loan_amounts) & np.isfinite(interest_rates)
+                 & np.isfinite(tenures) & (tenures >= 1))
+
+    # Months between approval and the first projected month
+    approval_month = (approval_dates.dt.year * 12 + approval_dates.dt.month).to_numpy()[known].astype(int)
+    months_before_start = start.year * 12 + start.month - approval_month
+
+    loan_amounts = loan_amounts[known]
+    monthly_interest_rates = interest_rates[known] / 12 / 100
+    tenures = tenures[known].astype(int)
+    installments = monthly_installments(loan_amounts, monthly_interest_rates * 12 * 100, tenures)
+
+    window = np.arange(months)
+    totals = {name: np.zeros(months) for name in ('payment', 'interest', 'principal')}
+
+    for chunk_start in range(0, len(tenures), chunk_size):
+        chunk = slice(chunk_start, chunk_start + chunk_size)
+        breakdown = _installment_breakdown(
+            loan_amounts[chunk, None],
+            monthly_interest_rates[chunk, None],
+            installments[chunk, None],
+            tenures[chunk, None],
+            months_before_start[chunk, None] + window[None, :],
+        )
+
+        for name in totals:
+            totals[name] += breakdown[name].sum(axis=0)
+
+    return pd.DataFrame(totals, index=pd.period_range(pd.Timestamp(start), periods=months, freq='M'))
@@ -0,0 +1,168 @@
+import asyncio
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from data_store import get_store
+from instrumentation import instrument
+from loan_service import create_loan, evaluate_eligibility, evaluate_offers, format_loans
+
+
+# Only disk I/O (file checks, reloads, appends) runs here; lookups and
+# scoring run on the event loop against the in-memory tables
+_io_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="loan-io")
+
+
+class AsyncDataStore:
+    """
+    Non-blocking view of the shared DataStore for coroutines.
+
+    Checking the CSV files for changes and reloading them happens in a
+    small I/O thread pool, at most once every `max_staleness` seconds;
+    lookups are then served from memory without touching the disk. Rows
+    written by this process are visible immediately, rows written by other
+    processes after at most `max_staleness` seconds.
+
+    A check counts only once it has finished: coroutines that arrive while
+    one is running await the same pending reload instead of reading tables
+    that are not loaded yet, and a failed check is retried by the next
+    caller.
+    """
+
+    def __init__(self, store=None, max_staleness=0.5):
+        self.store = store or get_store()
+        self.max_staleness = max_staleness
+        self._checked_at = float("-inf")
+        # The running check, awaited by every caller that arrives meanwhile
+        self._pending = None
+
+    @property
+    def version(self):
+        return self.store.version
+
+    def _check_done(self, future, started):
+        self._pending = None
+        if not future.cancelled() and future.exception() is None:
+            self._checked_at = started
+
+    async def refresh(self):
+        """
+        Reload changed tables in the I/O pool if the last check is too old,
+        or wait for the check that is already running.
+        """
+        pending = self._pending
+        if pending is None:
+            started = time.monotonic()
+            if started - self._checked_at < self.max_staleness:
+                return
+
+            pending = asyncio.get_running_loop().run_in_executor(_io_executor, self.store.refresh)
+            pending.add_done_callback(lambda future: self._check_done(future, started))
+            self._pending = pending
+
+        # One waiter being cancelled must not cancel the check for the others
+        await asyncio.shield(pending)
+
+    async def customer_by_phone(self, phone_no):
+        await self.refresh()
+        return self.store.customer_by_phone(phone_no, refresh=False)
+
+    async def loans_for_customer(self, customer_id):
+        await self.refresh()
+        return self.store.loans_for_customer(customer_id, refresh=False)
+
+    async def exposure(self, customer_id):
+        await self.refresh()
+        return self.store.exposure(customer_id, refresh=False)
+
+
+async_store = AsyncDataStore()
+
+
+@instrument("aget_customer_info")
+async def aget_customer_info(phone_no):
+    """
+    Async variant of loan_service.get_customer_info.
+    """
+    phone_no = int(phone_no)
+
+    try:
+        customer = await async_store.customer_by_phone(phone_no)
+    except FileNotFoundError:
+        return None
+
+    return customer.iloc[0] if customer is not None else None
+
+
+@instrument("aview_loans")
+async def aview_loans(phone_number, columns=['LoanAmount', 'Tenure', 'InterestRate', 'EndDate', 'MonthlyPayment', 'DateOfApproval']):
+    """
+    Async variant of loan_service.view_loans.
+    """
+    customer_row = await async_store.customer_by_phone(int(phone_number))
+
+    if customer_row is None:
+        return {"message": "No such customer exists"}, 404
+
+    customer_id = customer_row.iloc[0]['CustomerID']
+
+    return format_loans(customer_id, await async_store.loans_for_customer(customer_id), columns)
+
+
+@instrument("acheck_eligibility")
+async def acheck_eligibility(phone_no, loan_amount, interest_rate, tenure):
+    """
+    Async variant of loan_service.check_eligibility.
+    """
+    customer_row = await async_store.customer_by_phone(int(phone_no))
+
+    if customer_row is None:
+        return {"message": "No such user exists"}, 404
+
+    exposure = await async_store.exposure(customer_row.iloc[0]['CustomerID'])
+
+    return evaluate_eligibility(customer_row, exposure, async_store.version, loan_amount, interest_rate, tenure)
+
+
+@instrument("aget_loan_offers")
+async def aget_loan_offers(phone_no, tenures=None, interest_rates=None):
+    """
+    Async variant of loan_service.get_loan_offers.
+    """
+    customer_row = await async_store.customer_by_phone(int(phone_no))
+
+    if customer_row is None:
+        return {"message": "No such user exists"}, 404
+
+    exposure = await async_store.exposure(customer_row.iloc[0]['CustomerID'])
+
+    return evaluate_offers(customer_row, exposure, async_store.version, tenures, interest_rates)
+
+
+@instrument("acreate_loan")
+async def acreate_loan(phone_no, loan_amount, interest_rate, tenure):
+    """
+    Async variant of loan_service.create_loan.
+
+    The whole call runs in the I/O pool because approving a loan takes the
+    loan file lock and fsyncs the new row.
+    """
+    loop = asyncio.get_running_loop()
+    # Run in a copy of this task's context so the call is attributed to it
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_io_executor, context.run, create_loan, phone_no, loan_amount, interest_rate, tenure)
+
+
+@instrument("aget_customer_overview")
+async def aget_customer_overview(phone_no):
+    """
+    Async variant of loan_service.get_customer_overview.
+
+    The customer lookup and the loan listing run concurrently.
+    """
+    customer, loans = await asyncio.gather(aget_customer_info(phone_no), aview_loans(phone_no))
+
+    return {
+        "customer": customer.to_dict() if customer is not None else None,
+        "loans": loans[0],
+    }
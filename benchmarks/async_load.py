@@ -0,0 +1,176 @@
+"""
+Load test: chat sessions served by one worker, blocking tools vs async tools.
+
+Every simulated chat turn waits on an LLM round trip and then performs the
+lookups a typical turn makes (customer details, loan list, eligibility
+check). Three workers are compared:
+- blocking: each session runs on a thread from a fixed pool, the way a
+  threaded server holds one thread per in-flight request, and the LLM
+  wait blocks that thread. Time a session spends waiting for a free
+  thread counts toward its first turn's latency.
+- async wait: every session is a coroutine on one event loop that awaits
+  the LLM, but calls the blocking tools directly on the loop.
+- async: the same coroutines with the async tool variants.
+
+Almost all of the gain of the async worker over the blocking one comes
+from not holding a thread during the LLM wait, i.e. from the "async wait"
+column. The async data layer only adds the difference between the last
+two columns: disk checks and reloads move off the event loop.
+
+Every worker starts on a cold data store, so the first turns include
+loading the tables and concurrent sessions race for the first load.
+
+For growing numbers of concurrent sessions the script reports throughput
+and turn latency, and the most sessions each worker sustains while the
+p95 turn latency stays within the budget.
+
+Usage:
+    python benchmarks/async_load.py [--threads 8] [--llm-ms 300] [--turns 3]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import async_tools  # noqa: E402
+import data_store  # noqa: E402
+from async_tools import acheck_eligibility, aget_customer_info, aview_loans  # noqa: E402
+from credit_scoring import credit_score_cache  # noqa: E402
+from loan_service import check_eligibility, get_customer_info, view_loans  # noqa: E402
+
+
+def cold_store(customer_ids):
+    """
+    Give the tools a fresh store that has not read the tables yet, and
+    forget the cached scores.
+    """
+    store = data_store.DataStore(snapshot_dir=os.environ.get("LOAN_SNAPSHOT_DIR"))
+    data_store._store = store
+    async_tools.async_store = async_tools.AsyncDataStore(store)
+    for customer_id in customer_ids:
+        credit_score_cache.invalidate(customer_id)
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _summary(latencies, elapsed):
+    return {
+        "turns_per_second": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": _percentile(latencies, 0.95) * 1000,
+    }
+
+
+def run_blocking(phones, sessions, turns, llm_seconds, threads):
+    submitted = time.perf_counter()
+
+    def session(phone):
+        latencies = []
+        for turn in range(turns):
+            # The first turn also waits for a free thread
+            started = submitted if turn == 0 else time.perf_counter()
+            time.sleep(llm_seconds)
+            get_customer_info(phone)
+            view_loans(phone)
+            check_eligibility(phone, 200000, 14, 24)
+            latencies.append(time.perf_counter() - started)
+        return latencies
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(session, [random.choice(phones) for _ in range(sessions)]))
+    elapsed = time.perf_counter() - submitted
+
+    return _summary([latency for result in results for latency in result], elapsed)
+
+
+async def _run_async(phones, sessions, turns, llm_seconds, async_data_layer=True):
+    async def session(phone):
+        latencies = []
+        for _ in range(turns):
+            started = time.perf_counter()
+            await asyncio.sleep(llm_seconds)
+            if async_data_layer:
+                await asyncio.gather(aget_customer_info(phone), aview_loans(phone))
+                await acheck_eligibility(phone, 200000, 14, 24)
+            else:
+                get_customer_info(phone)
+                view_loans(phone)
+                check_eligibility(phone, 200000, 14, 24)
+            latencies.append(time.perf_counter() - started)
+        return latencies
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(session(random.choice(phones)) for _ in range(sessions)))
+    elapsed = time.perf_counter() - started
+    return _summary([latency for result in results for latency in result], elapsed)
+
+
+def run_async(phones, sessions, turns, llm_seconds, async_data_layer=True):
+    return asyncio.run(_run_async(phones, sessions, turns, llm_seconds, async_data_layer))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8, help="threads of the blocking worker")
+    parser.add_argument("--llm-ms", type=float, default=300, help="simulated LLM round trip per turn")
+    parser.add_argument("--turns", type=int, default=3, help="turns per session")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[8, 16, 32, 64, 128, 256])
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="p95 turn latency budget (default: 3x the LLM round trip)")
+    args = parser.parse_args()
+
+    llm_seconds = args.llm_ms / 1000
+    budget_ms = args.budget_ms or 3 * args.llm_ms
+
+    random.seed(0)
+    # Customers with credit history, so every turn scores existing loans.
+    # Read from the files, so the store itself stays cold
+    customers = pd.read_csv(data_store.CUSTOMER_DATA_PATH)
+    with_loans = customers[customers['CustomerID'].isin(pd.read_csv(data_store.LOAN_DATA_PATH)['CustomerID'])]
+    phones = [str(phone) for phone in with_loans['PhoneNumber']]
+    customer_ids = list(customers['CustomerID'])
+
+    rows = []
+    for sessions in args.sessions:
+        cold_store(customer_ids)
+        blocking = run_blocking(phones, sessions, args.turns, llm_seconds, args.threads)
+        cold_store(customer_ids)
+        async_wait = run_async(phones, sessions, args.turns, llm_seconds, async_data_layer=False)
+        cold_store(customer_ids)
+        concurrent = run_async(phones, sessions, args.turns, llm_seconds)
+        rows.append({"sessions": sessions, "blocking": blocking, "async_wait": async_wait, "async": concurrent})
+        print(f"{sessions:5d} sessions | " + " | ".join(
+            f"{mode} {result['turns_per_second']:8.1f} turns/s p95 {result['p95_ms']:7.0f} ms"
+            for mode, result in (("blocking", blocking), ("async wait", async_wait), ("async", concurrent))),
+            file=sys.stderr)
+
+    def capacity(mode):
+        within = [row["sessions"] for row in rows if row[mode]["p95_ms"] <= budget_ms]
+        return max(within, default=0)
+
+    report = {
+        "threads": args.threads,
+        "llm_ms": args.llm_ms,
+        "budget_ms": budget_ms,
+        "runs": rows,
+        "sessions_per_worker": {mode: capacity(mode) for mode in ("blocking", "async_wait", "async")},
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
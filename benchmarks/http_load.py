@@ -0,0 +1,210 @@
+"""
+Load test for http_service.py on localhost.
+
+Starts the service with --workers processes on a copy of the data (or
+targets a running one with --url) and drives it from --connections client
+threads for --duration seconds. Every client keeps one HTTP/1.1
+connection open and sends a mix of get_customer_info, view_loans and
+check_eligibility requests, plus create_loan with probability
+--write-fraction. With --batch-size above 1, every request is instead a
+/batch/check_eligibility call with that many applications.
+
+Reports requests (and, in batch mode, applications) per second, latency
+percentiles per endpoint and the number of failed requests: 5xx answers
+and connection errors. The 403 and 404 answers the loan functions give
+for ineligible or unknown customers are not failures.
+
+The clients run in this process, so on a machine with few cores they
+compete with the server for CPU; the figures are a lower bound.
+
+Usage:
+    python benchmarks/http_load.py [--workers 4] [--connections 16] [--duration 10]
+                                   [--batch-size 1] [--write-fraction 0] [--url http://127.0.0.1:8080]
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _start_service(workers):
+    """
+    Start http_service.py on a free port in a copy of the data directory.
+
+    Returns:
+    - subprocess.Popen: The service process.
+    - str: Its base URL.
+    - str: The temporary directory to remove afterwards.
+    """
+    work_root = tempfile.mkdtemp(prefix="loan-http-")
+    shutil.copytree(os.path.join(ROOT, "dummy data"), os.path.join(work_root, "dummy data"),
+                    ignore=shutil.ignore_patterns("snapshot", "*.lock", "*.seq", "*.db*"))
+
+    service = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "http_service.py"), "--port", "0", "--workers", str(workers)],
+        cwd=work_root, stderr=subprocess.PIPE, text=True)
+
+    line = service.stderr.readline()
+    match = re.search(r"http://[^ ]+", line)
+    if match is None:
+        service.kill()
+        raise RuntimeError(f"Service did not start: {line}{service.stderr.read()}")
+    return service, match.group(0), work_root
+
+
+def _phones(data_dir):
+    customers = pd.read_csv(os.path.join(data_dir, "customer_data.csv"))
+    return [int(phone) for phone in customers['PhoneNumber']]
+
+
+def _request_body(endpoint, phone):
+    if endpoint in ("check_eligibility", "create_loan"):
+        return {"phone_no": phone, "loan_amount": random.choice([50_000, 100_000, 250_000]),
+                "interest_rate": round(random.uniform(10, 18), 2), "tenure": random.randint(6, 120)}
+    if endpoint == "view_loans":
+        return {"phone_number": phone}
+    return {"phone_no": phone}
+
+
+def _client(url, phones, deadline, batch_size, write_fraction, results):
+    parts = urlsplit(url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    latencies = {}
+    failures = 0
+    applications = 0
+
+    while time.perf_counter() < deadline:
+        if batch_size > 1:
+            endpoint = "batch/check_eligibility"
+            body = {"requests": [_request_body("check_eligibility", random.choice(phones)) for _ in range(batch_size)]}
+        else:
+            endpoint = ("create_loan" if random.random() < write_fraction
+                        else random.choice(["get_customer_info", "view_loans", "check_eligibility"]))
+            body = _request_body(endpoint, random.choice(phones))
+        payload = json.dumps(body)
+
+        started = time.perf_counter()
+        try:
+            connection.request("POST", f"/{endpoint}", payload, {"Content-Type": "application/json"})
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            failures += 1
+            connection.close()
+            connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+            continue
+        elapsed = time.perf_counter() - started
+
+        if response.status >= 500:
+            failures += 1
+            continue
+        latencies.setdefault(endpoint, []).append(elapsed)
+        applications += batch_size
+
+    connection.close()
+    results.append((latencies, failures, applications))
+
+
+def run(url, phones, connections, duration, batch_size, write_fraction):
+    results = []
+    deadline = time.perf_counter() + duration
+    clients = [
+        threading.Thread(target=_client, args=(url, phones, deadline, batch_size, write_fraction, results))
+        for _ in range(connections)
+    ]
+    started = time.perf_counter()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.perf_counter() - started
+
+    endpoints = {}
+    for latencies, _, _ in results:
+        for endpoint, values in latencies.items():
+            endpoints.setdefault(endpoint, []).extend(values)
+
+    requests = sum(len(values) for values in endpoints.values())
+    all_latencies_ms = np.concatenate([np.asarray(values) for values in endpoints.values()]) * 1000 \
+        if endpoints else np.array([])
+
+    def percentiles(values_ms):
+        return {
+            "requests": len(values_ms),
+            "p50_ms": float(np.percentile(values_ms, 50)),
+            "p99_ms": float(np.percentile(values_ms, 99)),
+        }
+
+    return {
+        "connections": connections,
+        "batch_size": batch_size,
+        "requests_per_second": requests / elapsed,
+        "applications_per_second": sum(applications for _, _, applications in results) / elapsed,
+        "failures": sum(failures for _, failures, _ in results),
+        "latency": percentiles(all_latencies_ms) if requests else None,
+        "endpoints": {endpoint: percentiles(np.asarray(values) * 1000) for endpoint, values in sorted(endpoints.items())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="target a running service instead of starting one")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes of the service")
+    parser.add_argument("--connections", type=int, nargs="+", default=[1, 4, 16], help="concurrent keep-alive clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per run")
+    parser.add_argument("--batch-size", type=int, default=1, help="applications per /batch request, 1 for single calls")
+    parser.add_argument("--write-fraction", type=float, default=0.0, help="share of create_loan requests")
+    parser.add_argument("--data-dir", default=os.path.join(ROOT, "dummy data"),
+                        help="where to read customer phone numbers from")
+    args = parser.parse_args()
+
+    random.seed(0)
+    phones = _phones(args.data_dir)
+
+    service = work_root = None
+    url = args.url
+    if url is None:
+        service, url, work_root = _start_service(args.workers)
+
+    rows = []
+    try:
+        for connections in args.connections:
+            row = run(url, phones, connections, args.duration, args.batch_size, args.write_fraction)
+            rows.append(row)
+            latency = row["latency"] or {"p50_ms": float("nan"), "p99_ms": float("nan")}
+            print(f"{connections:4d} connections | {row['requests_per_second']:9.1f} req/s  "
+                  f"{row['applications_per_second']:9.1f} applications/s  p50 {latency['p50_ms']:7.2f} ms  "
+                  f"p99 {latency['p99_ms']:7.2f} ms  failures {row['failures']}", file=sys.stderr)
+    finally:
+        if service is not None:
+            service.terminate()
+            service.wait()
+            shutil.rmtree(work_root, ignore_errors=True)
+
+    report = {
+        "url": url if args.url else None,
+        "workers": None if args.url else args.workers,
+        "duration_seconds": args.duration,
+        "batch_size": args.batch_size,
+        "write_fraction": args.write_fraction,
+        "runs": rows,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
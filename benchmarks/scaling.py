@@ -0,0 +1,301 @@
+"""
+Scaling benchmark: the tool functions and the credit scorer at growing
+dataset sizes.
+
+For every size a seeded synthetic dataset is generated with
+synthetic_data.py (SIZE loan rows, about SIZE / 2.76 customers) and measured
+in a fresh interpreter, so each size starts with a cold data store and its
+own peak RSS. The worker measures:
+- load: opening the data store (one traced run)
+- get_customer_info, get_customer_overview, view_loans, check_eligibility,
+  create_loan: one call per sampled customer
+- calculate_credit_score: the single-customer scorer on prefetched rows
+- calculate_credit_scores: the batch scorer over the whole book
+
+Latency samples are taken without tracing; peak memory is the largest
+tracemalloc peak over a few separate traced calls, above what was
+allocated before the call. Calls that raise are reported as errors, with
+the first error message, instead of being timed. Customers are drawn from
+those with loans, so every call scores existing loans. create_loan runs
+last because it appends to the loan file.
+
+Results are written as JSON together with the environment they were
+measured in, so runs can be compared over time.
+
+Usage:
+    python benchmarks/scaling.py [--sizes 1000 10000 100000 1000000] [--samples 200]
+                                 [--output results.json] [--data-dir DIR]
+
+10^7 rows takes a few minutes to generate and several GB of memory to load;
+pass --data-dir to keep generated datasets between runs.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import synthetic_data  # noqa: E402
+
+
+def _summary(latencies, peaks, errors=None):
+    latencies_ms = np.asarray(latencies) * 1000
+    summary = {
+        "samples": len(latencies),
+        "p50_ms": float(np.percentile(latencies_ms, 50)) if len(latencies) else None,
+        "p99_ms": float(np.percentile(latencies_ms, 99)) if len(latencies) else None,
+        "mean_ms": float(latencies_ms.mean()) if len(latencies) else None,
+        "max_ms": float(latencies_ms.max()) if len(latencies) else None,
+        "peak_memory_bytes": max(peaks, default=None),
+        "errors": 0,
+    }
+    if errors:
+        summary["errors"] = len(errors)
+        summary["first_error"] = errors[0]
+    return summary
+
+
+def _call(call, args):
+    """
+    Call call(*args) and return the error it raised as text, or None.
+    """
+    try:
+        call(*args)
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+    return None
+
+
+def _measure(call, arguments, memory_samples):
+    """
+    Time call(*args) for every args in arguments, then trace the memory of
+    the first memory_samples of them. Calls that raise are counted as
+    errors and left out of the latencies.
+    """
+    latencies = []
+    errors = []
+    for args in arguments:
+        started = time.perf_counter()
+        error = _call(call, args)
+        elapsed = time.perf_counter() - started
+        if error is None:
+            latencies.append(elapsed)
+        else:
+            errors.append(error)
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for args in arguments[:memory_samples]:
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            if _call(call, args) is None:
+                peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+
+    return _summary(latencies, peaks, errors)
+
+
+def _max_rss_bytes():
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def run_worker(dataset_root, samples, memory_samples, batch_samples, seed):
+    """
+    Measure every function against the dataset under dataset_root/dummy data.
+    """
+    os.chdir(dataset_root)
+
+    from credit_scoring import calculate_credit_scores, credit_score_cache
+    from data_store import get_store
+    from loan_service import (calculate_credit_score, check_eligibility, create_loan, get_customer_info,
+                              get_customer_overview, view_loans)
+
+    results = {}
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    store = get_store()
+    customers = store.customers()
+    loans = store.loans()
+    results["load"] = _summary([time.perf_counter() - started], [tracemalloc.get_traced_memory()[1]])
+    tracemalloc.stop()
+
+    rng = np.random.default_rng(seed)
+    with_loans = customers[customers['CustomerID'].isin(loans['CustomerID'])]
+    phones = with_loans['PhoneNumber'].astype(str).to_numpy()
+
+    def draw_phones():
+        # Fresh customers for every function, so score cache hits stay rare
+        return rng.choice(phones, samples, replace=len(phones) < samples)
+
+    def draw_applications():
+        return list(zip(
+            draw_phones(),
+            rng.choice(synthetic_data.LOAN_AMOUNTS, samples).tolist(),
+            np.round(rng.uniform(8, 18, samples), 2).tolist(),
+            rng.integers(3, 181, samples).tolist(),
+        ))
+
+    for name, call in [("get_customer_info", get_customer_info),
+                       ("get_customer_overview", get_customer_overview),
+                       ("view_loans", view_loans)]:
+        results[name] = _measure(call, [(phone,) for phone in draw_phones()], memory_samples)
+
+    results["check_eligibility"] = _measure(check_eligibility, draw_applications(), memory_samples)
+
+    scorer_inputs = []
+    for phone in draw_phones():
+        customer = store.customer_by_phone(int(phone))
+        customer_loans = store.loans_for_customer(customer['CustomerID'].values[0])
+        scorer_inputs.append((customer.to_dict(orient='records'), customer_loans.to_dict(orient='records')))
+    results["calculate_credit_score"] = _measure(calculate_credit_score, scorer_inputs, memory_samples)
+
+    results["calculate_credit_scores"] = _measure(
+        calculate_credit_scores, [(customers, loans)] * batch_samples, min(memory_samples, 1))
+
+    results["create_loan"] = _measure(create_loan, draw_applications(), memory_samples)
+
+    return {
+        "customers": len(customers),
+        "loans": len(loans),
+        "functions": results,
+        "credit_score_cache": credit_score_cache.stats(),
+        "max_rss_bytes": _max_rss_bytes(),
+    }
+
+
+def _dataset(data_dir, size, seed):
+    """
+    Generate the dataset for a size unless data_dir already holds it.
+    """
+    dataset_root = os.path.join(data_dir, f"loans-{size}-seed-{seed}")
+    directory = os.path.join(dataset_root, "dummy data")
+
+    started = time.perf_counter()
+    if not os.path.exists(os.path.join(directory, "loan_data.csv")):
+        synthetic_data.write_dataset(directory, size, seed=seed)
+    generate_seconds = time.perf_counter() - started
+
+    data_bytes = sum(os.path.getsize(os.path.join(directory, name))
+                     for name in ("customer_data.csv", "loan_data.csv"))
+    return dataset_root, generate_seconds, data_bytes
+
+
+def _environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000],
+                        help="loan rows of each dataset")
+    parser.add_argument("--samples", type=int, default=200, help="timed calls per function")
+    parser.add_argument("--memory-samples", type=int, default=5, help="traced calls per function")
+    parser.add_argument("--batch-samples", type=int, default=3, help="timed runs of the batch scorer")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=None,
+                        help="keep generated datasets here (default: a temporary directory)")
+    parser.add_argument("--output", default=None,
+                        help="JSON results file (default: benchmarks/results/scaling-<timestamp>.json)")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        report = run_worker(args.worker, args.samples, args.memory_samples, args.batch_samples, args.seed)
+        print(json.dumps(report))
+        return
+
+    created = datetime.now(timezone.utc)
+    output = args.output or os.path.join(ROOT, "benchmarks", "results",
+                                         f"scaling-{created.strftime('%Y%m%dT%H%M%SZ')}.json")
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="loan-scaling-")
+
+    runs = []
+    try:
+        for size in args.sizes:
+            dataset_root, generate_seconds, data_bytes = _dataset(data_dir, size, args.seed)
+            # Measure a copy, create_loan appends to the loan file
+            work_root = dataset_root + "-run"
+            shutil.rmtree(work_root, ignore_errors=True)
+            shutil.copytree(dataset_root, work_root)
+
+            try:
+                worker = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--worker", work_root,
+                     "--samples", str(args.samples), "--memory-samples", str(args.memory_samples),
+                     "--batch-samples", str(args.batch_samples), "--seed", str(args.seed)],
+                    capture_output=True, text=True, check=True)
+            except subprocess.CalledProcessError as e:
+                print(e.stderr, file=sys.stderr)
+                raise
+            finally:
+                shutil.rmtree(work_root, ignore_errors=True)
+
+            run = {"rows": size, "generate_seconds": generate_seconds, "data_bytes": data_bytes}
+            run.update(json.loads(worker.stdout.strip().splitlines()[-1]))
+            runs.append(run)
+
+            for name, stats in run["functions"].items():
+                if not stats["samples"]:
+                    print(f"{size:>10,d} rows | {name:24s} every call failed: {stats['first_error']}", file=sys.stderr)
+                    continue
+                print(f"{size:>10,d} rows | {name:24s} p50 {stats['p50_ms']:10.2f} ms  "
+                      f"p99 {stats['p99_ms']:10.2f} ms  peak {(stats['peak_memory_bytes'] or 0) / 2**20:9.1f} MiB  "
+                      f"errors {stats['errors']}", file=sys.stderr)
+    finally:
+        if args.data_dir is None:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    report = {
+        "benchmark": "scaling",
+        "created": created.isoformat(),
+        "seed": args.seed,
+        "samples": args.samples,
+        "environment": _environment(),
+        "runs": runs,
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Startup-time benchmark for the loan assistant.
+
+Measures, each in a fresh interpreter:
+- import: time to import loan_service, and whether that pulled in the LLM stack
+- first_render: time for Streamlit to render main.py with no chat input
+- rerun: time for the next rerun of the same session
+
+Usage:
+    python benchmarks/startup.py [--runs 5] [--max-import-ms 1500] [--max-render-ms 3000]
+
+Exits with status 1 when a median exceeds its budget or when importing
+loan_service imports llama_index, openai or nltk.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["llama_index", "openai", "nltk"]
+
+IMPORT_PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import loan_service
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "heavy_modules": [name for name in {HEAVY_MODULES!r} if name in sys.modules],
+}}))
+"""
+
+RENDER_PROBE = """
+import json, time
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file("main.py", default_timeout=60)
+start = time.perf_counter()
+app.run()
+first_render = time.perf_counter() - start
+start = time.perf_counter()
+app.run()
+rerun = time.perf_counter() - start
+print(json.dumps({"first_render": first_render, "rerun": rerun, "exceptions": len(app.exception)}))
+"""
+
+
+def _run_probe(code):
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def _has_streamlit():
+    probe = subprocess.run([sys.executable, "-c", "import streamlit"], cwd=ROOT, capture_output=True)
+    return probe.returncode == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, default=1500)
+    parser.add_argument("--max-render-ms", type=float, default=3000)
+    args = parser.parse_args()
+
+    failures = []
+    results = {}
+
+    imports = [_run_probe(IMPORT_PROBE) for _ in range(args.runs)]
+    results["import_ms"] = statistics.median(run["seconds"] for run in imports) * 1000
+    heavy = sorted({name for run in imports for name in run["heavy_modules"]})
+    results["heavy_modules_imported"] = heavy
+
+    if heavy:
+        failures.append(f"importing loan_service pulled in {', '.join(heavy)}")
+    if results["import_ms"] > args.max_import_ms:
+        failures.append(f"import took {results['import_ms']:.0f} ms (budget {args.max_import_ms:.0f} ms)")
+
+    if _has_streamlit():
+        renders = [_run_probe(RENDER_PROBE) for _ in range(args.runs)]
+        results["first_render_ms"] = statistics.median(run["first_render"] for run in renders) * 1000
+        results["rerun_ms"] = statistics.median(run["rerun"] for run in renders) * 1000
+
+        if any(run["exceptions"] for run in renders):
+            failures.append("main.py raised an exception while rendering")
+        if results["first_render_ms"] > args.max_render_ms:
+            failures.append(f"first render took {results['first_render_ms']:.0f} ms (budget {args.max_render_ms:.0f} ms)")
+    else:
+        print("streamlit is not installed, skipping the render benchmark", file=sys.stderr)
+
+    print(json.dumps(results, indent=2))
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
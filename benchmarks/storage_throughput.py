@@ -0,0 +1,244 @@
+"""
+Throughput of the CSV and SQLite storage backends under concurrent sessions.
+
+Every session is a separate process running the loan tools against the
+same data files, the way several app workers share one data directory.
+Each operation is a check_eligibility call for a random customer or, with
+probability --write-fraction, a create_loan call. With the CSV backend a
+write by one process makes every other process re-read the loan file on
+its next lookup; with the SQLite backend lookups are indexed queries and
+writes are single-row transactions.
+
+The dataset is generated with synthetic_data.py (or the shipped data with
+--rows 0) and migrated with sqlite_store.import_csv, which is timed too.
+Every run starts from a fresh copy of it. After each run the script
+checks that no customer's active EMIs exceed half their salary because of
+loans approved during the run.
+
+Usage:
+    python benchmarks/storage_throughput.py [--rows 100000] [--processes 1 4 8]
+                                            [--duration 10] [--write-fraction 0.1]
+                                            [--output results.json]
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BACKENDS = ("csv", "sqlite")
+DATABASE_NAME = "loans.db"
+
+
+def run_worker(work_root, backend, duration, write_fraction, start_at, seed):
+    """
+    Run operations from start_at until start_at + duration and return
+    their latencies.
+    """
+    os.chdir(work_root)
+    if backend == "sqlite":
+        os.environ["LOAN_DATABASE"] = DATABASE_NAME
+
+    from data_store import get_store
+    from loan_service import check_eligibility, create_loan
+
+    store = get_store()
+    customers = store.customers()
+    phones = customers['PhoneNumber'].to_numpy()
+    rng = np.random.default_rng(seed)
+
+    while time.time() < start_at:
+        time.sleep(0.001)
+
+    latencies = {"read": [], "write": []}
+    errors = []
+    deadline = start_at + duration
+    while time.time() < deadline:
+        is_write = rng.random() < write_fraction
+        arguments = (int(rng.choice(phones)), float(rng.choice([50_000, 100_000, 250_000])),
+                     float(rng.uniform(12, 18)), int(rng.integers(6, 121)))
+
+        started = time.perf_counter()
+        try:
+            (create_loan if is_write else check_eligibility)(*arguments)
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+            continue
+        latencies["write" if is_write else "read"].append(time.perf_counter() - started)
+
+    return {"latencies": latencies, "errors": len(errors), "first_error": errors[0] if errors else None}
+
+
+def _summary(latencies, duration):
+    latencies_ms = np.asarray(latencies) * 1000
+    return {
+        "operations": len(latencies),
+        "per_second": len(latencies) / duration,
+        "p50_ms": float(np.percentile(latencies_ms, 50)) if len(latencies) else None,
+        "p99_ms": float(np.percentile(latencies_ms, 99)) if len(latencies) else None,
+    }
+
+
+def _overcommitted_customers(work_root, backend, started):
+    """
+    Count customers whose active EMIs exceed half their salary although
+    loans were approved for them during the run. Only customers with loans
+    from before the run count: a first loan is not checked against the
+    salary.
+    """
+    script = (
+        "import json, sys\n"
+        "from data_store import get_store\n"
+        "store = get_store()\n"
+        "customers = store.customers().set_index('CustomerID')\n"
+        "loans = store.loans()\n"
+        f"during = loans['approval_date'] >= '{started}'\n"
+        "before = set(loans.loc[~during, 'CustomerID'])\n"
+        "new = [customer_id for customer_id in loans.loc[during, 'CustomerID'].unique() if customer_id in before]\n"
+        "count = 0\n"
+        "for customer_id in new:\n"
+        "    exposure = store.exposure(customer_id)\n"
+        "    count += bool(exposure['active_emi'] > customers.loc[customer_id, 'MonthlySalary'] * 0.5 + 1e-6)\n"
+        "print(json.dumps(count))\n"
+    )
+    environment = dict(os.environ, PYTHONPATH=ROOT)
+    if backend == "sqlite":
+        environment["LOAN_DATABASE"] = DATABASE_NAME
+    checked = subprocess.run([sys.executable, "-c", script], cwd=work_root, env=environment,
+                             capture_output=True, text=True, check=True)
+    return json.loads(checked.stdout.strip().splitlines()[-1])
+
+
+def run(dataset_root, backend, processes, duration, write_fraction, seed):
+    work_root = tempfile.mkdtemp(prefix=f"loan-storage-{backend}-")
+    shutil.rmtree(work_root)
+    shutil.copytree(dataset_root, work_root)
+
+    try:
+        # Leave time for every worker to import and open the store
+        start_at = time.time() + 5
+        workers = [
+            subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), "--worker", work_root, "--backend", backend,
+                 "--duration", str(duration), "--write-fraction", str(write_fraction),
+                 "--start-at", str(start_at), "--seed", str(seed + i)],
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            for i in range(processes)
+        ]
+
+        reports = []
+        for worker in workers:
+            stdout, stderr = worker.communicate()
+            if worker.returncode != 0:
+                print(stderr, file=sys.stderr)
+                raise subprocess.CalledProcessError(worker.returncode, worker.args)
+            reports.append(json.loads(stdout.strip().splitlines()[-1]))
+
+        reads = [latency for report in reports for latency in report["latencies"]["read"]]
+        writes = [latency for report in reports for latency in report["latencies"]["write"]]
+        started = datetime.fromtimestamp(start_at).strftime('%Y-%m-%d')
+
+        return {
+            "backend": backend,
+            "processes": processes,
+            "operations_per_second": (len(reads) + len(writes)) / duration,
+            "reads": _summary(reads, duration),
+            "writes": _summary(writes, duration),
+            "errors": sum(report["errors"] for report in reports),
+            "first_error": next((report["first_error"] for report in reports if report["first_error"]), None),
+            "overcommitted_customers": _overcommitted_customers(work_root, backend, started),
+        }
+    finally:
+        shutil.rmtree(work_root, ignore_errors=True)
+
+
+def _prepare(data_dir, rows, seed):
+    """
+    Write the CSV dataset and its SQLite migration, and time the migration.
+    """
+    import synthetic_data
+    from sqlite_store import import_csv
+
+    directory = os.path.join(data_dir, "dummy data")
+    if rows:
+        synthetic_data.write_dataset(directory, rows, seed=seed)
+    else:
+        shutil.copytree(os.path.join(ROOT, "dummy data"), directory,
+                        ignore=shutil.ignore_patterns("snapshot", "*.lock", "*.seq", "*.db*"))
+
+    started = time.perf_counter()
+    counts = import_csv(os.path.join(data_dir, DATABASE_NAME),
+                        os.path.join(directory, "customer_data.csv"), os.path.join(directory, "loan_data.csv"))
+    return {"import_seconds": time.perf_counter() - started, **counts}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="loan rows to generate, 0 for the shipped data")
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 4, 8], help="concurrent sessions")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per run")
+    parser.add_argument("--write-fraction", type=float, default=0.1, help="share of create_loan calls")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None,
+                        help="JSON results file (default: benchmarks/results/storage-<timestamp>.json)")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--backend", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--start-at", type=float, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        report = run_worker(args.worker, args.backend, args.duration, args.write_fraction, args.start_at, args.seed)
+        print(json.dumps(report))
+        return
+
+    created = datetime.now(timezone.utc)
+    output = args.output or os.path.join(ROOT, "benchmarks", "results",
+                                         f"storage-{created.strftime('%Y%m%dT%H%M%SZ')}.json")
+    data_dir = tempfile.mkdtemp(prefix="loan-storage-data-")
+
+    runs = []
+    try:
+        migration = _prepare(data_dir, args.rows, args.seed)
+        print(f"Migrated {migration['loans']:,d} loans to SQLite in {migration['import_seconds']:.2f} s",
+              file=sys.stderr)
+
+        for processes in args.processes:
+            for backend in args.backends:
+                result = run(data_dir, backend, processes, args.duration, args.write_fraction, args.seed)
+                runs.append(result)
+                print(f"{backend:6s} {processes:3d} processes | {result['operations_per_second']:9.1f} ops/s  "
+                      f"read p50 {result['reads']['p50_ms'] or 0:8.2f} ms  p99 {result['reads']['p99_ms'] or 0:8.2f} ms  "
+                      f"write p50 {result['writes']['p50_ms'] or 0:8.2f} ms  p99 {result['writes']['p99_ms'] or 0:8.2f} ms  "
+                      f"errors {result['errors']}  overcommitted {result['overcommitted_customers']}",
+                      file=sys.stderr)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    report = {
+        "benchmark": "storage_throughput",
+        "created": created.isoformat(),
+        "rows": args.rows,
+        "duration_seconds": args.duration,
+        "write_fraction": args.write_fraction,
+        "migration": migration,
+        "runs": runs,
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from amortization import monthly_installments
+from credit_scoring import calculate_credit_scores
+from data_store import derive_loan_columns, get_store
+
+
+APPLICATION_COLUMNS = ['phone_no', 'loan_amount', 'interest_rate', 'tenure']
+
+EMI_LIMIT_REASON = "Sum of all your EMIs exceeds 50% of your monthly salary."
+SCORE_TOO_LOW_REASON = "Your credit score is too low."
+
+
+def _rate_floor_reason(floor):
+    return f"You are only eligible for interest rates above {floor}%"
+
+
+def _where_found(values, found, dtype):
+    """
+    Return values as a nullable array that is <NA> wherever found is False.
+    """
+    array = pd.array(values, dtype=dtype)
+    array[~found] = pd.NA
+    return array
+
+
+def _evaluate(applications, customers, loans):
+    """
+    Evaluate a block of applications against the given customer and loan
+    tables, the loans carrying the derived columns for the reference date.
+    This is the vectorized equivalent of calling check_eligibility once per
+    row.
+    """
+    phone_numbers = pd.to_numeric(applications['phone_no'], errors='coerce')
+    loan_amounts = applications['loan_amount'].to_numpy(dtype=float)
+    interest_rates = applications['interest_rate'].to_numpy(dtype=float)
+    tenures = applications['tenure'].to_numpy()
+
+    # Join applications to customers; the first row wins for duplicated phones
+    customers = customers.drop_duplicates('PhoneNumber', keep='first').set_index('PhoneNumber')
+    matched = customers.reindex(phone_numbers.to_numpy())
+    found = matched['CustomerID'].notna().to_numpy()
+    customer_ids = matched['CustomerID'].to_numpy()
+
+    # Score only the customers that applied
+    applicants = customers.reset_index()
+    applicants = applicants[applicants['CustomerID'].isin(customer_ids[found])]
+    applicant_loans = loans[loans['CustomerID'].isin(applicants['CustomerID'])]
+    scores = calculate_credit_scores(applicants, applicant_loans)
+    scores = scores[~scores.index.duplicated(keep='first')].reindex(customer_ids)
+    credit_scores = scores['credit_score'].fillna(0).to_numpy(dtype=int)
+
+    # get_eligibility, one branch per credit score band
+    high = credit_scores > 50
+    medium = (credit_scores > 30) & (credit_scores <= 50)
+    low = (credit_scores > 10) & (credit_scores <= 30)
+    too_low = ~(high | medium | low)
+
+    below_medium_floor = medium & (interest_rates < 12)
+    below_low_floor = low & (interest_rates < 16)
+    approval = ~(too_low | below_medium_floor | below_low_floor)
+    corrected_interest_rates = np.select(
+        [high, medium, low],
+        [interest_rates, np.maximum(interest_rates, 12), np.maximum(interest_rates, 16)],
+        default=np.nan,
+    )
+
+    installments = monthly_installments(loan_amounts, corrected_interest_rates, tenures)
+
+    # emis_exceed_limit: EMIs of active loans plus the new one vs half the salary
+    active_emis = (applicant_loans['monthly_payment'].where(applicant_loans['is_active'], 0)
+                   .groupby(applicant_loans['CustomerID']).sum())
+    current_emis = active_emis.reindex(customer_ids).fillna(0).to_numpy(dtype=float)
+    monthly_salaries = matched['MonthlySalary'].to_numpy(dtype=float)
+    exceeds_limit = (~too_low) & ((current_emis + installments) > (monthly_salaries * 0.5))
+    approval &= ~exceeds_limit
+
+    reasons = []
+    for i in range(len(applications)):
+        reason = []
+        if too_low[i]:
+            reason.append(SCORE_TOO_LOW_REASON)
+        elif below_medium_floor[i]:
+            reason.append(_rate_floor_reason(12))
+        elif below_low_floor[i]:
+            reason.append(_rate_floor_reason(16))
+        if exceeds_limit[i]:
+            reason.append(EMI_LIMIT_REASON)
+        reasons.append(reason or None)
+
+    # Unknown phone numbers get the same answer as check_eligibility, with
+    # every other field missing
+    return pd.DataFrame({
+        'credit_score': _where_found(credit_scores, found, 'Int64'),
+        'customer_id': customer_ids,
+        'approval': _where_found(approval, found, 'boolean'),
+        'interest_rate': np.where(found, interest_rates, np.nan),
+        'corrected_interest_rate': np.where(found, corrected_interest_rates, np.nan),
+        'tenure': _where_found(tenures, found, 'Int64'),
+        'monthly_installment': np.where(found, installments, np.nan),
+        'reason_for_rejection': [reason if is_found else None for reason, is_found in zip(reasons, found)],
+        'warnings': [warning if is_found else None for warning, is_found in zip(scores['warnings'], found)],
+        'message': np.select([~found, approval], ["No such user exists", "Eligible for loan"], "Not Eligible for loan"),
+        'status': np.select([~found, approval], [404, 200], 403),
+    }, index=applications.index)
+
+
+def _evaluate_chunk(arguments):
+    return _evaluate(*arguments)
+
+
+def check_eligibility_batch(applications, customers=None, loans=None, workers=None, chunk_size=50_000, today=None):
+    """
+    Check the eligibility of many loan applications at once.
+
+    The applications are joined against the customer and loan tables once,
+    and the credit score, corrected interest rate, monthly installment and
+    the 50%-of-salary check are computed column-wise. Every row gets the same
+    fields and reasons check_eligibility would return for it. Inputs larger
+    than chunk_size are split into chunks that are evaluated in a process
+    pool; each worker only receives the customers and loans its chunk needs.
+
+    Fields check_eligibility leaves out or sets to None are missing values
+    (NaN/<NA>) here.
+
+    Parameters:
+    - applications (pd.DataFrame or str): The applications, or the path of a
+      CSV file holding them, with columns 'phone_no', 'loan_amount',
+      'interest_rate' and 'tenure'.
+    - customers (pd.DataFrame, optional): Customer table. Defaults to the
+      shared data store.
+    - loans (pd.DataFrame, optional): Loan table. Defaults to the shared
+      data store.
+    - workers (int, optional): Number of worker processes for large inputs.
+      Defaults to the number of CPUs; 1 disables the pool.
+    - chunk_size (int): Number of applications evaluated per chunk.
+    - today (datetime, optional): Reference date. Defaults to datetime.now().
+
+    Returns:
+    - pd.DataFrame: One row per application, aligned with its index, with the
+      columns 'credit_score', 'customer_id', 'approval', 'interest_rate',
+      'corrected_interest_rate', 'tenure', 'monthly_installment',
+      'reason_for_rejection', 'warnings', 'message' and 'status' (the HTTP
+      status code check_eligibility would return: 200, 403 or 404).
+
+    Raises:
+    - ValueError: If a required application column is missing.
+    """
+    if isinstance(applications, str):
+        applications = pd.read_csv(applications)
+
+    missing = [column for column in APPLICATION_COLUMNS if column not in applications]
+    if missing:
+        raise ValueError(f"Applications are missing columns: {missing}")
+
+    if customers is None or loans is None:
+        store = get_store()
+        customers = store.customers() if customers is None else customers
+        loans = store.loans() if loans is None else loans
+
+    loans = derive_loan_columns(loans, today)
+
+    workers = workers or os.cpu_count() or 1
+    if len(applications) <= chunk_size or workers == 1:
+        return _evaluate(applications, customers, loans)
+
+    jobs = []
+    for start in range(0, len(applications), chunk_size):
+        chunk = applications.iloc[start:start + chunk_size]
+        phone_numbers = pd.to_numeric(chunk['phone_no'], errors='coerce')
+        chunk_customers = customers[customers['PhoneNumber'].isin(phone_numbers)]
+        chunk_loans = loans[loans['CustomerID'].isin(chunk_customers['CustomerID'])]
+        jobs.append((chunk, chunk_customers, chunk_loans))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return pd.concat(pool.map(_evaluate_chunk, jobs))
@@ -0,0 +1,267 @@
+import time
+
+import streamlit as st
+from llama_index.core.callbacks import CallbackManager
+from llama_index.core.callbacks.base_handler import BaseCallbackHandler
+from llama_index.core.callbacks.schema import CBEventType, EventPayload
+
+from conversation_memory import estimate_tokens
+from instrumentation import METRICS_ENABLED, metrics
+
+
+class ToolProgressHandler(BaseCallbackHandler):
+    """
+    Write the agent's tool calls into a Streamlit status container while the
+    ReAct loop is still running.
+    """
+
+    def __init__(self):
+        super().__init__(event_starts_to_ignore=[], event_ends_to_ignore=[])
+        self.status = None
+        self.tool_calls = 0
+
+    def on_event_start(self, event_type, payload=None, event_id="", parent_id="", **kwargs):
+        if event_type == CBEventType.FUNCTION_CALL and self.status is not None and payload:
+            tool = payload.get(EventPayload.TOOL)
+            arguments = payload.get(EventPayload.FUNCTION_CALL)
+            self.tool_calls += 1
+            self.status.write(f"Calling `{getattr(tool, 'name', tool)}` with {arguments}")
+        return event_id
+
+    def on_event_end(self, event_type, payload=None, event_id="", **kwargs):
+        if event_type == CBEventType.FUNCTION_CALL and self.status is not None and payload:
+            self.status.write(f"Got: {payload.get(EventPayload.FUNCTION_OUTPUT)}")
+
+    def start_trace(self, trace_id=None):
+        pass
+
+    def end_trace(self, trace_id=None, trace_map=None):
+        pass
+
+
+class LLMLatencyHandler(BaseCallbackHandler):
+    """
+    Record the latency of every LLM call under "llm" in the metrics registry.
+    """
+
+    def __init__(self):
+        super().__init__(event_starts_to_ignore=[], event_ends_to_ignore=[])
+        self._started = {}
+
+    def on_event_start(self, event_type, payload=None, event_id="", parent_id="", **kwargs):
+        if event_type == CBEventType.LLM:
+            self._started[event_id] = time.perf_counter()
+        return event_id
+
+    def on_event_end(self, event_type, payload=None, event_id="", **kwargs):
+        started = self._started.pop(event_id, None)
+        if started is not None:
+            metrics.record("llm", time.perf_counter() - started)
+
+    def start_trace(self, trace_id=None):
+        pass
+
+    def end_trace(self, trace_id=None, trace_map=None):
+        pass
+
+
+def _usage(response):
+    """
+    Return the (prompt, completion) token counts the API reported for an
+    LLM response, or None if it did not report them (e.g. when streaming).
+    """
+    raw = getattr(response, "raw", None)
+    usage = raw.get("usage") if isinstance(raw, dict) else getattr(raw, "usage", None)
+    if usage is None:
+        return None
+    if isinstance(usage, dict):
+        prompt, completion = usage.get("prompt_tokens"), usage.get("completion_tokens")
+    else:
+        prompt, completion = getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None)
+    if prompt is None or completion is None:
+        return None
+    return prompt, completion
+
+
+class TokenUsageHandler(BaseCallbackHandler):
+    """
+    Count the tokens of a chat turn: prompt and completion tokens of every
+    LLM call, the part of each prompt taken by the tool specifications, and
+    the argument and output tokens of every tool call.
+
+    Counts come from the API's usage report where the response carries one
+    and are estimated from the text otherwise. They are collected for the
+    turn between start_turn() and finish_turn(), and added to the metrics
+    registry when metrics are enabled.
+    """
+
+    def __init__(self, tool_spec_tokens=0):
+        super().__init__(event_starts_to_ignore=[], event_ends_to_ignore=[])
+        self.tool_spec_tokens = tool_spec_tokens
+        self.turn = None
+        self._tool_calls = {}
+
+    def start_turn(self):
+        self.turn = {
+            "llm_calls": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "tool_spec_tokens": 0,
+            "estimated": False,
+            "tool_calls": [],
+        }
+        self._tool_calls = {}
+
+    def finish_turn(self):
+        """
+        Return the counts of the turn since start_turn().
+
+        Returns:
+        - dict: 'llm_calls', 'prompt_tokens', 'completion_tokens',
+          'tool_spec_tokens' (the part of the prompt tokens spent on tool
+          specifications), 'estimated' (whether any count was estimated)
+          and 'tool_calls', a list of {'tool', 'argument_tokens',
+          'output_tokens'}.
+        """
+        turn, self.turn = self.turn, None
+        return turn
+
+    def _record(self, source, kind, count):
+        if self.turn is not None and kind in ("prompt", "completion", "tool_spec"):
+            self.turn[f"{kind}_tokens"] += count
+        if METRICS_ENABLED:
+            metrics.record_tokens(source, kind, count)
+
+    def on_event_start(self, event_type, payload=None, event_id="", parent_id="", **kwargs):
+        if event_type == CBEventType.FUNCTION_CALL and payload:
+            tool = payload.get(EventPayload.TOOL)
+            name = getattr(tool, "name", None) or str(tool)
+            arguments = estimate_tokens(str(payload.get(EventPayload.FUNCTION_CALL)))
+            self._tool_calls[event_id] = {"tool": name, "argument_tokens": arguments, "output_tokens": 0}
+            if METRICS_ENABLED:
+                metrics.record_tokens(name, "arguments", arguments)
+        return event_id
+
+    def on_event_end(self, event_type, payload=None, event_id="", **kwargs):
+        if event_type == CBEventType.LLM and payload:
+            response = payload.get(EventPayload.RESPONSE) or payload.get(EventPayload.COMPLETION)
+            usage = _usage(response)
+            if usage is None:
+                prompt = payload.get(EventPayload.MESSAGES) or payload.get(EventPayload.PROMPT) or ""
+                if isinstance(prompt, list):
+                    prompt = "\n".join(str(message.content) for message in prompt)
+                message = getattr(response, "message", None)
+                completion = message.content if message is not None else getattr(response, "text", "")
+                usage = estimate_tokens(str(prompt)), estimate_tokens(str(completion or ""))
+                if self.turn is not None:
+                    self.turn["estimated"] = True
+
+            self._record("llm", "prompt", usage[0])
+            self._record("llm", "completion", usage[1])
+            self._record("llm", "tool_spec", self.tool_spec_tokens)
+            if self.turn is not None:
+                self.turn["llm_calls"] += 1
+
+        elif event_type == CBEventType.FUNCTION_CALL:
+            call = self._tool_calls.pop(event_id, None)
+            if call is not None and payload:
+                call["output_tokens"] = estimate_tokens(str(payload.get(EventPayload.FUNCTION_OUTPUT)))
+                if METRICS_ENABLED:
+                    metrics.record_tokens(call["tool"], "output", call["output_tokens"])
+            if call is not None and self.turn is not None:
+                self.turn["tool_calls"].append(call)
+
+    def start_trace(self, trace_id=None):
+        pass
+
+    def end_trace(self, trace_id=None, trace_map=None):
+        pass
+
+
+def make_callback_manager(tool_spec_tokens=0):
+    """
+    Create the callback manager for a session's agent.
+
+    Parameters:
+    - tool_spec_tokens (int): Tokens the tool specifications add to every
+      LLM call, see tool_specs.tool_spec_tokens().
+
+    Returns:
+    - CallbackManager: A manager holding a fresh ToolProgressHandler and
+      TokenUsageHandler, and an LLMLatencyHandler when metrics are enabled.
+    """
+    handlers = [ToolProgressHandler(), TokenUsageHandler(tool_spec_tokens)]
+    if METRICS_ENABLED:
+        handlers.append(LLMLatencyHandler())
+    return CallbackManager(handlers)
+
+
+def _find_handler(agent, handler_type):
+    for handler in agent.callback_manager.handlers:
+        if isinstance(handler, handler_type):
+            return handler
+    return None
+
+
+def token_usage_handler(agent):
+    """
+    Return the TokenUsageHandler of an agent built with
+    make_callback_manager(), or None.
+    """
+    return _find_handler(agent, TokenUsageHandler)
+
+
+def stream_agent_reply(agent, prompt):
+    """
+    Stream the agent's answer into the current chat message as it arrives.
+
+    Tool calls made during the ReAct loop are listed in a collapsible status
+    box above the answer, then the final answer is written token by token.
+    Time to first token and total latency of the turn are appended to
+    st.session_state.turn_latencies.
+
+    Parameters:
+    - agent (ReActAgent): The session's agent, built with
+      make_callback_manager().
+    - prompt (str): The prompt to send.
+
+    Returns:
+    - str: The full text of the answer.
+    """
+    started = time.perf_counter()
+    first_token = None
+
+    progress = st.status("Thinking...", expanded=False)
+    handler = _find_handler(agent, ToolProgressHandler)
+    if handler is not None:
+        handler.status = progress
+        handler.tool_calls = 0
+
+    try:
+        streaming_response = agent.stream_chat(prompt)
+
+        def tokens():
+            nonlocal first_token
+            for token in streaming_response.response_gen:
+                if first_token is None:
+                    first_token = time.perf_counter()
+                yield token
+
+        text = st.write_stream(tokens())
+    finally:
+        if handler is not None:
+            handler.status = None
+
+    finished = time.perf_counter()
+    tool_calls = handler.tool_calls if handler is not None else 0
+    progress.update(label=f"Used {tool_calls} tool call(s)", state="complete")
+
+    if "turn_latencies" not in st.session_state:
+        st.session_state.turn_latencies = []
+    st.session_state.turn_latencies.append({
+        "time_to_first_token": (first_token or finished) - started,
+        "total": finished - started,
+        "tool_calls": tool_calls,
+    })
+
+    return text
@@ -0,0 +1,200 @@
+"""
+Bounded conversation memory for the chat agent.
+
+The agent's prompt carries the conversation so far, but only within a
+token budget: the last few turns verbatim and a running summary of the
+turns before them. The summary is not written by the LLM. It keeps the
+figures of the loan request found in the user's messages (phone number,
+amount, interest rate and tenure, the latest value of each) and a short
+list of the user's earlier requests. The prompt therefore stops growing
+once a conversation is longer than the verbatim window, however long the
+session runs.
+
+Token counts are estimated at four characters per token, which is close
+enough for budgeting English text and needs no tokenizer.
+"""
+import math
+from collections import deque
+
+from intent_router import extract_values
+
+
+CHARS_PER_TOKEN = 4
+
+# Turns kept verbatim, and the budget for the whole memory block
+RECENT_TURNS = 4
+MAX_TOKENS = 1200
+
+# Earlier user requests quoted in the summary, and their length
+SUMMARY_REQUESTS = 5
+SUMMARY_REQUEST_TOKENS = 30
+
+# Summary label of each extracted fact, in display order
+FACT_LABELS = {
+    "phone_number": "Phone number",
+    "loan_amount": "Requested amount",
+    "interest_rate": "Interest rate (%)",
+    "tenure": "Tenure (months)",
+}
+
+
+def estimate_tokens(text):
+    """
+    Estimate the number of tokens of a text.
+
+    Parameters:
+    - text (str): The text.
+
+    Returns:
+    - int: The estimated token count.
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text, tokens):
+    """
+    Cut a text to about the given number of tokens, marking the cut.
+
+    Parameters:
+    - text (str): The text.
+    - tokens (int): The token budget.
+
+    Returns:
+    - str: The text itself if it fits; otherwise its beginning followed by
+      an ellipsis.
+    """
+    limit = tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    return text[:max(limit - 1, 0)].rstrip() + "…"
+
+
+def extract_facts(message):
+    """
+    Extract the figures of a loan request from a user message.
+
+    Parameters:
+    - message (str): The user's chat message.
+
+    Returns:
+    - dict: The keys of FACT_LABELS that the message mentions, with the
+      last value it gives for each.
+    """
+    values = extract_values(message)
+    facts = {}
+    for key, found in (("phone_number", values["phone_numbers"]),
+                       ("loan_amount", values["loan_amounts"]),
+                       ("interest_rate", values["interest_rates"]),
+                       ("tenure", values["tenures"])):
+        if found:
+            facts[key] = found[-1]
+    return facts
+
+
+def _format_fact(key, value):
+    if key == "phone_number":
+        return value
+    if key == "loan_amount":
+        return f"{value:,.0f}"
+    return f"{value:g}"
+
+
+class ConversationMemory:
+    """
+    The last turns of a conversation verbatim, plus a summary of the rest.
+
+    add_turn() records a finished turn. Turns leave the verbatim window,
+    oldest first, when there are more than recent_turns of them or when the
+    memory block would exceed max_tokens, and are folded into the summary.
+    The newest turn always stays; a reply too long for the budget is
+    shortened instead.
+    """
+
+    def __init__(self, recent_turns=RECENT_TURNS, max_tokens=MAX_TOKENS):
+        self.recent_turns = recent_turns
+        self.max_tokens = max_tokens
+
+        self._recent = deque()
+        self._facts = {}
+        self._requests = deque(maxlen=SUMMARY_REQUESTS)
+        self.summarized_turns = 0
+
+    def __len__(self):
+        return self.summarized_turns + len(self._recent)
+
+    @property
+    def facts(self):
+        """
+        The loan request figures seen so far, in all turns.
+        """
+        facts = dict(self._facts)
+        for user_message, _ in self._recent:
+            facts.update(extract_facts(user_message))
+        return facts
+
+    def add_turn(self, user_message, assistant_message):
+        """
+        Record a finished turn.
+
+        Parameters:
+        - user_message (str): The user's message.
+        - assistant_message (str): The answer given.
+        """
+        # One turn alone may take half the budget
+        turn_budget = self.max_tokens // 2
+        self._recent.append((truncate_to_tokens(user_message, turn_budget // 2),
+                             truncate_to_tokens(assistant_message, turn_budget // 2)))
+
+        while len(self._recent) > 1 and (len(self._recent) > self.recent_turns
+                                         or estimate_tokens(self.context()) > self.max_tokens):
+            self._summarize(*self._recent.popleft())
+
+    def _summarize(self, user_message, assistant_message):
+        self._facts.update(extract_facts(user_message))
+        self._requests.append(truncate_to_tokens(" ".join(user_message.split()), SUMMARY_REQUEST_TOKENS))
+        self.summarized_turns += 1
+
+    def summary(self):
+        """
+        Return the summary of the turns that left the verbatim window.
+
+        Returns:
+        - str: The summary, or an empty string if no turn was summarized.
+        """
+        if not self.summarized_turns:
+            return ""
+
+        lines = [f"Summary of the {self.summarized_turns} earlier turn(s):"]
+        for key, label in FACT_LABELS.items():
+            if key in self._facts:
+                lines.append(f"- {label}: {_format_fact(key, self._facts[key])}")
+        if self._requests:
+            lines.append("- Latest earlier requests: " + "; ".join(f'"{request}"' for request in self._requests))
+        return "\n".join(lines)
+
+    def context(self):
+        """
+        Return the memory block to put into the agent's prompt.
+
+        Returns:
+        - str: The summary and the recent turns, or an empty string at the
+          start of a conversation.
+        """
+        parts = []
+        summary = self.summary()
+        if summary:
+            parts.append(summary)
+        if self._recent:
+            parts.append("Recent turns:\n" + "\n".join(
+                f"User: {user_message}\nAssistant: {assistant_message}"
+                for user_message, assistant_message in self._recent))
+        return "\n\n".join(parts)
+
+    def clear(self):
+        """
+        Forget the whole conversation.
+        """
+        self._recent.clear()
+        self._facts.clear()
+        self._requests.clear()
+        self.summarized_turns = 0
@@ -0,0 +1,319 @@
+import threading
+from collections import OrderedDict
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from data_store import derive_loan_columns
+from instrumentation import instrument
+
+
+# Bin edges and points for each component of the credit score. Every table
+# is one of the scoring rules' if/elif ladders, quoted in its comment;
+# np.searchsorted with side='right' returns the number of edges <= value,
+# i.e. the bucket.
+
+# 1. Approved limit usage (25 points): "< 15", "< 30", ..., "< 95", else
+LIMIT_USAGE_EDGES = np.array([15, 30, 35, 40, 55, 60, 80, 95])
+LIMIT_USAGE_POINTS = np.array([25, 22, 16, 14, 10, 6, 4, 2, 0])
+
+# 2. EMI payment history (30 points): ">= 120", ">= 100", ..., ">= 50", else
+EMI_HISTORY_EDGES = np.array([50, 60, 70, 80, 90, 100, 120])
+EMI_HISTORY_POINTS = np.array([4, 8, 12, 15, 18, 22, 26, 30])
+
+# 3. Average tenure in years (15 points): ">= 15", ">= 10", ..., ">= 2", else
+TENURE_EDGES = np.array([2, 4, 6, 8, 10, 15])
+TENURE_POINTS = np.array([1, 2, 4, 6, 8, 12, 15])
+
+# 4. Customer history length (10 points): "<= 2010", "< 2014", "< 2016",
+# "< 2020", else. Years are integers, so "<= 2010" is the same as "< 2011".
+HISTORY_LENGTH_EDGES = np.array([2011, 2014, 2016, 2020])
+HISTORY_LENGTH_POINTS = np.array([10, 8, 5, 2, 0])
+
+# 5. Number of loans (20 points): "> 15", ">= 10", ">= 6", ">= 2", else.
+# Counts are integers, so "> 15" is the same as ">= 16".
+LOAN_COUNT_EDGES = np.array([2, 6, 10, 16])
+LOAN_COUNT_POINTS = np.array([2, 8, 12, 15, 20])
+
+CLOSE_TO_LIMIT_WARNING = "You are very close to your approved limit"
+EXCEEDED_LIMIT_WARNING = "You have exceeded your approved limit"
+LOW_EMI_HISTORY_WARNING = "Less than 50% EMIs paid on time"
+MISSING_DATES_WARNING = "Error processing loan dates"
+
+
+def _bin_index(values, edges):
+    """
+    Return the bucket index of every value for the given ascending edges.
+    """
+    return np.searchsorted(edges, values, side='right')
+
+
+@instrument("calculate_credit_scores")
+def calculate_credit_scores(customers, loans, today=None):
+    """
+    Calculate the credit score of every customer in one vectorized pass.
+
+    This is the batch counterpart of loan_service.calculate_credit_score: loans are
+    aggregated per customer with a single groupby and each score component
+    is looked up from its bin table instead of walking an if/elif ladder.
+    For every customer the total score and warnings are identical to what
+    calculate_credit_score returns for that customer's rows.
+
+    Parameters:
+    - customers (pd.DataFrame): Customer table with at least 'CustomerID'
+      and 'ApprovedLimit'.
+    - loans (pd.DataFrame): Loan table with at least 'CustomerID',
+      'LoanAmount' and 'Tenure', plus either the derived columns of
+      data_store.derive_loan_columns() or the CSV columns they come from.
+    - today (datetime, optional): Reference date. Defaults to the day the
+      derived columns were computed for, or datetime.now() if the loans
+      do not carry them.
+
+    Returns:
+    - pd.DataFrame: One row per customer, indexed by CustomerID, with columns:
+        - 'credit_score' (int): The total credit score.
+        - 'limit_usage_score', 'emi_history_score', 'tenure_score',
+          'history_length_score', 'loan_count_score' (int): Sub-scores.
+        - 'close_to_limit', 'exceeded_limit', 'low_emi_history' (bool):
+          Warning flags.
+        - 'warnings' (list): The warning messages, in the same order as
+          calculate_credit_score produces them.
+    """
+    if today is not None or 'is_active' not in loans:
+        loans = derive_loan_columns(loans, today)
+
+    # Per-loan inputs, aggregated per customer below
+    per_loan = pd.DataFrame({
+        'CustomerID': loans['CustomerID'],
+        'active_amount': loans['LoanAmount'].where(loans['is_active'], 0),
+        'months_since_approval': loans['months_since_approval'],
+        'emis_paid': loans['emis_paid_on_time'],
+        'tenure': loans['Tenure'],
+        'approval_date': loans['approval_date'],
+    })
+
+    per_customer = per_loan.groupby('CustomerID').agg(
+        active_amount=('active_amount', 'sum'),
+        total_months=('months_since_approval', 'sum'),
+        total_emis_paid=('emis_paid', 'sum'),
+        avg_tenure=('tenure', 'mean'),
+        oldest_approval=('approval_date', 'min'),
+        loan_count=('tenure', 'size'),
+    )
+
+    customer_ids = customers['CustomerID'].to_numpy()
+    has_loans = np.isin(customer_ids, per_customer.index.to_numpy())
+    stats = per_customer.reindex(customer_ids)
+
+    # 1. Approved limit usage
+    with np.errstate(divide='ignore', invalid='ignore'):
+        perc_amount_vs_limit = (stats['active_amount'].to_numpy(dtype=float)
+                                / customers['ApprovedLimit'].to_numpy(dtype=float) * 100)
+    limit_bin = _bin_index(perc_amount_vs_limit, LIMIT_USAGE_EDGES)
+    limit_bin[np.isnan(perc_amount_vs_limit)] = len(LIMIT_USAGE_EDGES)
+    limit_usage_score = LIMIT_USAGE_POINTS[limit_bin]
+
+    # 2. EMI payment history, only scored when there are months to compare
+    total_months = stats['total_months'].to_numpy(dtype=float)
+    has_history = total_months > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        perc_emi_paid_on_time = stats['total_emis_paid'].to_numpy(dtype=float) / total_months * 100
+    emi_bin = _bin_index(perc_emi_paid_on_time, EMI_HISTORY_EDGES)
+    emi_history_score = np.where(has_history, EMI_HISTORY_POINTS[emi_bin], 0)
+
+    # 3. Average tenure, missing tenures fall through to the last branch
+    avg_tenures = stats['avg_tenure'].to_numpy(dtype=float) / 12
+    tenure_score = np.where(np.isnan(avg_tenures), TENURE_POINTS[0],
+                            TENURE_POINTS[_bin_index(np.nan_to_num(avg_tenures), TENURE_EDGES)])
+
+    # 4. Customer history length, unparseable dates score nothing
+    oldest_loan_year = stats['oldest_approval'].dt.year.to_numpy(dtype=float)
+    history_length_score = np.where(np.isnan(oldest_loan_year), 0,
+                                    HISTORY_LENGTH_POINTS[_bin_index(np.nan_to_num(oldest_loan_year), HISTORY_LENGTH_EDGES)])
+
+    # 5. Number of loans
+    loan_count = stats['loan_count'].fillna(0).to_numpy(dtype=float)
+    loan_count_score = LOAN_COUNT_POINTS[_bin_index(loan_count, LOAN_COUNT_EDGES)]
+
+    components = np.vstack([limit_usage_score, emi_history_score, tenure_score,
+                            history_length_score, loan_count_score]).astype(int)
+    components[:, ~has_loans] = 0
+
+    close_to_limit = has_loans & ((limit_bin == 6) | (limit_bin == 7))
+    exceeded_limit = has_loans & (limit_bin == len(LIMIT_USAGE_EDGES))
+    low_emi_history = has_loans & has_history & (emi_bin <= 1)
+
+    # Assemble the messages; only rows that carry a warning are touched
+    warnings = [[] for _ in range(len(customer_ids))]
+    for i in np.flatnonzero(~has_loans):
+        warnings[i].append(MISSING_DATES_WARNING)
+    for i in np.flatnonzero(close_to_limit):
+        warnings[i].append(CLOSE_TO_LIMIT_WARNING)
+    for i in np.flatnonzero(exceeded_limit):
+        warnings[i].append(EXCEEDED_LIMIT_WARNING)
+    for i in np.flatnonzero(low_emi_history):
+        if emi_bin[i] == 1:
+            warnings[i].append(LOW_EMI_HISTORY_WARNING)
+        else:
+            warnings[i].append(f"Only {perc_emi_paid_on_time[i]:.1f}% EMIs paid on time")
+
+    return pd.DataFrame({
+        'credit_score': components.sum(axis=0),
+        'limit_usage_score': components[0],
+        'emi_history_score': components[1],
+        'tenure_score': components[2],
+        'history_length_score': components[3],
+        'loan_count_score': components[4],
+        'close_to_limit': close_to_limit,
+        'exceeded_limit': exceeded_limit,
+        'low_emi_history': low_emi_history,
+        'warnings': warnings,
+    }, index=pd.Index(customer_ids, name='CustomerID'))
+
+
+def credit_score_from_exposure(exposure, approved_limit, today=None):
+    """
+    Calculate a customer's credit score from their exposure aggregates.
+
+    Gives the same score and warnings as loan_service.calculate_credit_score
+    on the customer's loan rows, but reads one row of the data store's
+    ExposureTable (see exposure.py) instead of scanning the loans, so it
+    costs the same however many loans the customer has.
+
+    Parameters:
+    - exposure (np.void or None): The customer's record from
+      DataStore.exposure(), or None if they have no loans.
+    - approved_limit (float): The customer's 'ApprovedLimit'.
+    - today (datetime, optional): Reference date. Defaults to date.today().
+
+    Returns:
+    - int: The credit score.
+    - list: The warnings, in the same order as calculate_credit_score.
+    """
+    if exposure is None:
+        return 0, [MISSING_DATES_WARNING]
+
+    today = date.today() if today is None else today
+    warnings = []
+
+    # 1. Approved limit usage
+    with np.errstate(divide='ignore', invalid='ignore'):
+        perc_amount_vs_limit = np.float64(exposure['active_amount']) / np.float64(approved_limit) * 100
+    limit_bin = len(LIMIT_USAGE_EDGES) if np.isnan(perc_amount_vs_limit) else _bin_index(perc_amount_vs_limit, LIMIT_USAGE_EDGES)
+    credit_score = int(LIMIT_USAGE_POINTS[limit_bin])
+    if limit_bin in (6, 7):
+        warnings.append(CLOSE_TO_LIMIT_WARNING)
+    elif limit_bin == len(LIMIT_USAGE_EDGES):
+        warnings.append(EXCEEDED_LIMIT_WARNING)
+
+    # 2. EMI payment history; months since approval summed over the dated loans
+    total_months = (exposure['dated_loans'] * (today.year * 12 + today.month)
+                    - exposure['approval_month_sum'])
+    if total_months > 0:
+        perc_emi_paid_on_time = exposure['emis_paid_on_time'] / total_months * 100
+        emi_bin = _bin_index(perc_emi_paid_on_time, EMI_HISTORY_EDGES)
+        credit_score += int(EMI_HISTORY_POINTS[emi_bin])
+        if emi_bin == 1:
+            warnings.append(LOW_EMI_HISTORY_WARNING)
+        elif emi_bin == 0:
+            warnings.append(f"Only {perc_emi_paid_on_time:.1f}% EMIs paid on time")
+
+    # 3. Average tenure
+    if exposure['tenured_loans'] > 0:
+        avg_tenures = exposure['total_tenure'] / exposure['tenured_loans'] / 12
+        credit_score += int(TENURE_POINTS[_bin_index(avg_tenures, TENURE_EDGES)])
+    else:
+        credit_score += int(TENURE_POINTS[0])
+
+    # 4. Customer history length
+    if not np.isnat(exposure['earliest_approval']):
+        oldest_loan_year = exposure['earliest_approval'].astype('datetime64[Y]').astype(int) + 1970
+        credit_score += int(HISTORY_LENGTH_POINTS[_bin_index(oldest_loan_year, HISTORY_LENGTH_EDGES)])
+
+    # 5. Number of loans
+    credit_score += int(LOAN_COUNT_POINTS[_bin_index(exposure['loan_count'], LOAN_COUNT_EDGES)])
+
+    return credit_score, warnings
+
+
+class CreditScoreCache:
+    """
+    Bounded LRU cache of (credit_score, warnings) per customer.
+
+    Entries are keyed by CustomerID and remember the data store version and
+    the day they were computed on. A lookup with a different version or on
+    a later day counts as a miss, because the score depends on both the
+    loan table and today's date. Writes for a customer must call
+    invalidate() so the next lookup recomputes.
+    """
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, customer_id, version, compute):
+        """
+        Return the cached score for a customer, computing it on a miss.
+
+        Parameters:
+        - customer_id (int): The ID of the customer.
+        - version (int): The data store version the score must be based on.
+        - compute (callable): Returns (credit_score, warnings) on a miss.
+
+        Returns:
+        - int: The credit score.
+        - list: The warnings; a fresh list the caller may modify.
+        """
+        stamp = (version, date.today())
+
+        with self._lock:
+            entry = self._entries.get(customer_id)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(customer_id)
+                self.hits += 1
+                return entry[1], list(entry[2])
+            self.misses += 1
+
+        credit_score, warnings = compute()
+
+        with self._lock:
+            self._entries[customer_id] = (stamp, credit_score, list(warnings))
+            self._entries.move_to_end(customer_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+        return credit_score, list(warnings)
+
+    def invalidate(self, customer_id):
+        """
+        Drop the cached score of a customer.
+
+        Parameters:
+        - customer_id (int): The ID of the customer whose loans changed.
+        """
+        with self._lock:
+            self._entries.pop(customer_id, None)
+
+    def stats(self):
+        """
+        Return the cache counters.
+
+        Returns:
+        - dict: 'hits', 'misses', 'size' and 'hit_rate'.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Shared by every session in the process
+credit_score_cache = CreditScoreCache()
@@ -0,0 +1,721 @@
+import csv
+import io
+import os
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from exposure import ExposureTable
+from instrumentation import counts_rows, instrument
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+CUSTOMER_DATA_PATH = "dummy data/customer_data.csv"
+LOAN_DATA_PATH = "dummy data/loan_data.csv"
+# Append-only log of EMIs paid on time after a loan was written; the loan
+# file itself is never rewritten
+EMI_PAYMENT_DATA_PATH = "dummy data/emi_payments.csv"
+EMI_PAYMENT_COLUMNS = ['CustomerID', 'LoanID', 'EMIsPaidOnTime', 'RecordedOn']
+
+
+def parse_dates(values):
+    """
+    Parse a column of dates stored either as '3/9/2017' or '2017-03-09'.
+
+    The shipped data uses month/day/year while rows written by create_loan
+    use ISO dates, so each format is parsed explicitly instead of letting
+    pandas guess one format for the whole column. A loan book holds far
+    fewer distinct dates than rows, so each distinct string is parsed once.
+
+    Parameters:
+    - values (pd.Series): The raw date strings.
+
+    Returns:
+    - pd.Series: datetime64 values, NaT where a value matches neither format.
+    """
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Series(uniques, dtype=object)
+
+    parsed = pd.to_datetime(uniques, format='%m/%d/%Y', errors='coerce')
+    iso = pd.to_datetime(uniques.where(parsed.isna()), format='%Y-%m-%d', errors='coerce')
+
+    # Missing values have code -1, which picks the trailing NaT
+    lookup = np.append(parsed.fillna(iso).to_numpy(), np.datetime64('NaT'))
+    return pd.Series(lookup[codes], index=values.index, name=values.name)
+
+
+# Columns computed from the CSV columns when the loan table is loaded; they
+# are never written back to the file
+LOAN_DERIVED_COLUMNS = ['approval_date', 'end_date', 'monthly_payment', 'emis_paid_on_time',
+                        'is_active', 'months_since_approval']
+
+
+def _coalesce(loans, columns, parse=False):
+    """
+    Merge the same field stored under different column names, first column
+    first. Strings are parsed as dates if parse is True.
+    """
+    merged = None
+    for column in columns:
+        if column not in loans:
+            continue
+        values = loans[column]
+        if parse and not pd.api.types.is_datetime64_any_dtype(values):
+            values = parse_dates(values)
+        merged = values if merged is None else merged.fillna(values)
+
+    if merged is None:
+        return pd.Series(pd.NaT if parse else np.nan, index=loans.index,
+                         dtype='datetime64[s]' if parse else float)
+    return merged.astype('datetime64[s]') if parse else merged.astype(float)
+
+
+def derive_loan_columns(loans, today=None):
+    """
+    Return the loan table with the derived columns scoring works from.
+
+    The shipped rows and the rows written by create_loan store the same
+    fields under differently cased columns ('Monthlypayment' and
+    'MonthlyPayment', 'EMIspaidonTime' and 'EMIsPaidOnTime',
+    'DateofApproval' and 'DateOfApproval') and dates in two formats. The
+    derived columns merge them into one value per loan:
+    - 'approval_date', 'end_date' (datetime64): Parsed dates.
+    - 'monthly_payment', 'emis_paid_on_time' (float): The merged fields.
+    - 'is_active' (bool): Whether the loan ends after today.
+    - 'months_since_approval' (float): Calendar months from the approval
+      month to today's month.
+
+    Dates are only parsed if the table does not carry the derived columns
+    yet; otherwise just the two columns that depend on today are
+    recomputed, which is how the data store rolls them over to a new day.
+
+    Parameters:
+    - loans (pd.DataFrame): Loan table, raw or already derived.
+    - today (datetime, optional): Reference date. Defaults to datetime.now().
+
+    Returns:
+    - pd.DataFrame: A new frame with the derived columns; `loans` itself is
+      not modified.
+    """
+    today = pd.Timestamp(datetime.now() if today is None else today)
+
+    if 'approval_date' not in loans:
+        loans = loans.assign(
+            approval_date=_coalesce(loans, ['DateofApproval', 'DateOfApproval'], parse=True),
+            end_date=_coalesce(loans, ['EndDate'], parse=True),
+            monthly_payment=_coalesce(loans, ['Monthlypayment', 'MonthlyPayment']),
+            emis_paid_on_time=_coalesce(loans, ['EMIspaidonTime', 'EMIsPaidOnTime']),
+        )
+
+    approval_dates = loans['approval_date']
+    return loans.assign(
+        is_active=(loans['end_date'] > today).to_numpy(dtype=bool),
+        months_since_approval=((today.year - approval_dates.dt.year) * 12
+                               + (today.month - approval_dates.dt.month)).astype(float),
+    )
+
+
+def read_emi_payments(path=EMI_PAYMENT_DATA_PATH):
+    """
+    Sum the EMI payments recorded in a payment log per loan.
+
+    Parameters:
+    - path (str): Path of the payment log.
+
+    Returns:
+    - pd.Series: EMIs paid on time, indexed by (CustomerID, LoanID); empty
+      if the log does not exist.
+    """
+    if not os.path.exists(path):
+        return pd.Series(dtype=float, index=pd.MultiIndex.from_tuples([], names=['CustomerID', 'LoanID']))
+
+    payments = pd.read_csv(path)
+    return payments.groupby(['CustomerID', 'LoanID'])['EMIsPaidOnTime'].sum().astype(float)
+
+
+def apply_emi_payments(loans, payments):
+    """
+    Add logged EMI payments to the 'emis_paid_on_time' column of a loan
+    table with the derived columns.
+
+    Parameters:
+    - loans (pd.DataFrame): The loan table.
+    - payments (pd.Series): EMIs paid per (CustomerID, LoanID), as returned
+      by read_emi_payments().
+
+    Returns:
+    - pd.DataFrame: A new frame; loans without payments keep their value.
+    """
+    if payments.empty:
+        return loans
+
+    keys = pd.MultiIndex.from_arrays([loans['CustomerID'], loans['LoanID']])
+    paid = payments.reindex(keys).to_numpy()
+    return loans.assign(emis_paid_on_time=loans['emis_paid_on_time'].add(pd.Series(paid, index=loans.index),
+                                                                          fill_value=0))
+
+
+def _file_signature(path):
+    """
+    Return a cheap fingerprint of a file on disk.
+
+    Parameters:
+    - path (str): Path of the file to fingerprint.
+
+    Returns:
+    - tuple: (modification time in nanoseconds, size in bytes).
+
+    Raises:
+    - FileNotFoundError: If the file does not exist.
+    """
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _optional_file_signature(path):
+    """
+    Return _file_signature(path), or None if the file does not exist.
+    """
+    try:
+        return _file_signature(path)
+    except FileNotFoundError:
+        return None
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Hold an exclusive, cross-process lock on a data file.
+
+    The lock is taken on a sidecar '<path>.lock' file so the data file itself
+    can be read freely while a writer holds it.
+
+    Parameters:
+    - path (str): Path of the data file to lock.
+    """
+    with open(path + ".lock", "a+b") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@instrument("csv_write")
+def _append_csv_row(path, columns, row):
+    """
+    Durably append one row to a CSV file without rewriting existing data.
+
+    The row is serialized up front and written with a single write() on a
+    file opened in append mode, then fsync'ed, so a crash can at worst leave
+    a partial last line but never truncates the rows already on disk.
+
+    Parameters:
+    - path (str): Path of the CSV file. Must already have a header line.
+    - columns (list of str): The file's columns, in header order.
+    - row (dict): Column -> value. Missing columns are written as empty.
+
+    Raises:
+    - ValueError: If the row contains a column the file does not have.
+    """
+    unknown = set(row) - set(columns)
+    if unknown:
+        raise ValueError(f"Columns not present in {path}: {sorted(unknown)}")
+
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow([row.get(column, "") for column in columns])
+    line = buffer.getvalue().encode()
+
+    with open(path, "ab") as data_file:
+        # Make sure the new row starts on its own line
+        if data_file.tell() > 0:
+            with open(path, "rb") as tail:
+                tail.seek(-1, os.SEEK_END)
+                if tail.read(1) != b"\n":
+                    line = b"\n" + line
+
+        data_file.write(line)
+        data_file.flush()
+        os.fsync(data_file.fileno())
+
+
+def _coerce_row(frame, row, columns=None):
+    """
+    Build a one-row DataFrame with the given columns of `frame` (all of them
+    by default), keeping their dtypes where the new values allow it.
+    """
+    columns = list(frame.columns) if columns is None else columns
+    new_row = pd.DataFrame([row], columns=columns)
+
+    for column in columns:
+        try:
+            new_row[column] = new_row[column].astype(frame[column].dtype)
+        except (ValueError, TypeError):
+            pass
+
+    return new_row
+
+
+class DataStore:
+    """
+    Process-wide, in-memory copy of the customer and loan tables.
+
+    Both CSV files are parsed once and kept in memory together with two
+    hash indexes: PhoneNumber -> customer row and CustomerID -> loan rows.
+    Every lookup first compares the file's modification time and size with
+    the values seen at load time and re-reads a table only when it changed
+    on disk, so lookups are O(1) no matter how large the tables grow.
+
+    Writes go through add_customer() and add_loan(), which append a single
+    row to the CSV under a file lock and patch the in-memory copy instead
+    of rewriting and re-reading the whole file. write_transaction() holds
+    the loan file lock across a read-check-write sequence.
+
+    The loan table carries the columns of derive_loan_columns(): dates are
+    parsed once per load, and the columns that depend on today's date are
+    recomputed on the first access of each new day. Per-customer totals of
+    the loan table are kept in an ExposureTable (see exposure.py), updated
+    by add_loan(), record_emi_payments() and by the daily rollover. EMI
+    payments go to a separate append-only log that is folded into the
+    'emis_paid_on_time' column on load.
+
+    If a snapshot directory is given (see snapshot.py) and its snapshot was
+    built from the current CSV files, tables are opened from the memory
+    mapped snapshot instead of being parsed. Date columns then arrive as
+    datetime64 values instead of strings.
+    """
+
+    def __init__(self, customer_path=CUSTOMER_DATA_PATH, loan_path=LOAN_DATA_PATH, snapshot_dir=None,
+                 emi_payment_path=EMI_PAYMENT_DATA_PATH):
+        self.customer_path = customer_path
+        self.loan_path = loan_path
+        self.emi_payment_path = emi_payment_path
+        self.snapshot_dir = snapshot_dir
+
+        self._lock = threading.RLock()
+
+        # Each table is kept as a (DataFrame, index) pair and swapped as a
+        # whole so readers never see a frame paired with a stale index
+        self._customers = (None, {})
+        self._customer_signature = None
+
+        self._loans = (None, {})
+        self._loan_signature = None
+        # The payment log is part of the loan table: it is folded into
+        # emis_paid_on_time and a change reloads the table
+        self._payment_signature = None
+        # The day is_active and months_since_approval were computed for
+        self._loans_as_of = None
+        # Per-customer aggregates of the loan table, rebuilt with it
+        self._exposure = None
+
+        # Whether this store holds the loan file lock; only read and
+        # written by the thread holding self._lock
+        self._holds_loan_lock = False
+
+        # Highest CustomerID and LoanID seen so far, so new IDs need no
+        # table scan
+        self._max_customer_id = 0
+        self._max_loan_id = 0
+
+        # Bumped on every reload so callers can tell that the data changed
+        self.version = 0
+
+    @instrument("csv_read")
+    @counts_rows
+    def _read_table(self, path, snapshot_name, signature):
+        if self.snapshot_dir is not None:
+            from snapshot import load_table_snapshot
+
+            table = load_table_snapshot(os.path.join(self.snapshot_dir, snapshot_name), signature)
+            if table is not None:
+                return table
+
+        return pd.read_csv(path)
+
+    def _load_customers(self, signature):
+        customers = self._read_table(self.customer_path, "customers", signature)
+
+        # Keep the first row for duplicated phone numbers, like a boolean
+        # filter followed by .iloc[0] would
+        first = ~customers['PhoneNumber'].duplicated(keep='first')
+        positions = range(len(customers))
+        index = {
+            phone: position
+            for phone, position, keep in zip(customers['PhoneNumber'], positions, first)
+            if keep
+        }
+
+        self._customers = (customers, index)
+        max_customer_id = customers['CustomerID'].max()
+        self._max_customer_id = int(max_customer_id) if pd.notna(max_customer_id) else 0
+
+    def _load_loans(self, signature):
+        loans = derive_loan_columns(self._read_table(self.loan_path, "loans", signature))
+        loans = apply_emi_payments(loans, read_emi_payments(self.emi_payment_path))
+
+        self._loans = (loans, loans.groupby('CustomerID', sort=False).indices)
+        self._exposure = ExposureTable.from_loans(loans)
+        max_loan_id = loans['LoanID'].max()
+        self._max_loan_id = int(max_loan_id) if pd.notna(max_loan_id) else 0
+        self._loans_as_of = date.today()
+
+    def _roll_over_loans(self):
+        """
+        Recompute the loan columns that depend on today's date if the day
+        changed since they were computed, and take loans that matured out of
+        the active exposure. Rows and index stay the same.
+        """
+        with self._lock:
+            if self._loans_as_of == date.today() or self._loans[0] is None:
+                return
+            loans, index = self._loans
+            was_active = loans['is_active'].to_numpy()
+            loans = derive_loan_columns(loans)
+
+            changed = np.flatnonzero(was_active != loans['is_active'].to_numpy())
+            self._exposure.update_active(loans, changed, was_active[changed])
+            self._loans = (loans, index)
+            self._loans_as_of = date.today()
+
+    @contextmanager
+    def _loan_file_lock(self):
+        """
+        Hold the in-process lock and the loan file lock, reentrantly.
+        """
+        with self._lock:
+            if self._holds_loan_lock:
+                yield
+                return
+
+            with file_lock(self.loan_path):
+                self._holds_loan_lock = True
+                try:
+                    yield
+                finally:
+                    self._holds_loan_lock = False
+
+    @contextmanager
+    def write_transaction(self):
+        """
+        Serialize a read-check-write sequence on the loan table against
+        every other writer, in this process and in others.
+
+        The loan file lock is held for the whole block and the tables are
+        refreshed first, so lookups inside the block see every loan written
+        before it and add_loan() calls inside it cannot interleave with
+        another writer's. A failed check simply skips the write; CSV
+        appends cannot be rolled back.
+        """
+        with self._loan_file_lock():
+            self.refresh()
+            yield self
+
+    def refresh(self):
+        """
+        Reload any table whose file changed on disk since it was last read.
+
+        Returns:
+        - bool: True if at least one table was reloaded, False otherwise.
+
+        Raises:
+        - FileNotFoundError: If the customer or loan data CSV files do not exist.
+        """
+        customer_signature = _file_signature(self.customer_path)
+        loan_signature = _file_signature(self.loan_path)
+        payment_signature = _optional_file_signature(self.emi_payment_path)
+
+        if self._loans_as_of != date.today():
+            self._roll_over_loans()
+
+        if (customer_signature == self._customer_signature
+                and loan_signature == self._loan_signature
+                and payment_signature == self._payment_signature):
+            return False
+
+        with self._lock:
+            reloaded = False
+
+            if customer_signature != self._customer_signature:
+                self._load_customers(customer_signature)
+                self._customer_signature = customer_signature
+                reloaded = True
+
+            if loan_signature != self._loan_signature or payment_signature != self._payment_signature:
+                self._load_loans(loan_signature)
+                self._loan_signature = loan_signature
+                self._payment_signature = payment_signature
+                reloaded = True
+
+            if reloaded:
+                self.version += 1
+
+            return reloaded
+
+    @counts_rows
+    def customers(self):
+        """
+        Return the full customer table.
+
+        Returns:
+        - pd.DataFrame: The customer data. Treat it as read-only.
+        """
+        self.refresh()
+        return self._customers[0]
+
+    @counts_rows
+    def loans(self):
+        """
+        Return the full loan table.
+
+        Returns:
+        - pd.DataFrame: The loan data, with the columns of
+          derive_loan_columns(). Treat it as read-only.
+        """
+        self.refresh()
+        return self._loans[0]
+
+    @counts_rows
+    def customer_by_phone(self, phone_no, refresh=True):
+        """
+        Look up a customer by phone number.
+
+        Parameters:
+        - phone_no (int): The phone number of the customer.
+        - refresh (bool): Check the file on disk first. Pass False to serve
+          purely from memory after an explicit refresh().
+
+        Returns:
+        - pd.DataFrame or None: A one-row DataFrame with the customer's data
+          if found; otherwise, None.
+        """
+        if refresh:
+            self.refresh()
+        customers, index = self._customers
+        position = index.get(phone_no)
+
+        if position is None:
+            return None
+
+        return customers.iloc[[position]]
+
+    @counts_rows
+    def loans_for_customer(self, customer_id, refresh=True):
+        """
+        Return all loans belonging to a customer.
+
+        Parameters:
+        - customer_id (int): The ID of the customer.
+        - refresh (bool): Check the file on disk first. Pass False to serve
+          purely from memory after an explicit refresh().
+
+        Returns:
+        - pd.DataFrame: The customer's loan rows, empty if they have none.
+        """
+        if refresh:
+            self.refresh()
+        loans, index = self._loans
+        positions = index.get(customer_id)
+
+        if positions is None:
+            return loans.iloc[0:0]
+
+        return loans.iloc[positions]
+
+    def exposure(self, customer_id, refresh=True):
+        """
+        Return the exposure aggregates of a customer.
+
+        Parameters:
+        - customer_id (int): The ID of the customer.
+        - refresh (bool): Check the file on disk first. Pass False to serve
+          purely from memory after an explicit refresh().
+
+        Returns:
+        - np.void or None: A record with the fields of
+          exposure.EXPOSURE_DTYPE, or None if the customer has no loans.
+        """
+        if refresh:
+            self.refresh()
+        return self._exposure.get(customer_id)
+
+    def max_loan_id(self):
+        """
+        Return the highest LoanID in the loan table.
+
+        Returns:
+        - int: The highest LoanID, or 0 if there are no loans.
+        """
+        self.refresh()
+        return self._max_loan_id
+
+    def exposure_table(self):
+        """
+        Return the maintained exposure table.
+
+        Returns:
+        - ExposureTable: The per-customer aggregates. Treat it as read-only.
+        """
+        self.refresh()
+        return self._exposure
+
+    def add_customer(self, customer):
+        """
+        Append a new customer, allocating the next CustomerID.
+
+        The ID is taken from a counter kept alongside the table rather than
+        by scanning it, and allocation and append happen under the customer
+        file lock so concurrent writers never hand out the same ID.
+
+        Parameters:
+        - customer (dict): Column -> value for the new customer, without
+          'CustomerID'.
+
+        Returns:
+        - int: The CustomerID assigned to the new customer.
+
+        Raises:
+        - FileNotFoundError: If the customer data CSV file does not exist.
+        """
+        with self._lock, file_lock(self.customer_path):
+            self.refresh()
+            customers, index = self._customers
+
+            customer_id = self._max_customer_id + 1
+            row = {"CustomerID": customer_id, **customer}
+            _append_csv_row(self.customer_path, list(customers.columns), row)
+
+            new_row = _coerce_row(customers, row)
+            new_index = dict(index)
+            new_index.setdefault(new_row['PhoneNumber'].iloc[0], len(customers))
+
+            self._customers = (pd.concat([customers, new_row], ignore_index=True), new_index)
+            self._customer_signature = _file_signature(self.customer_path)
+            self._max_customer_id = customer_id
+
+        return customer_id
+
+    def add_loan(self, loan):
+        """
+        Append a new loan row.
+
+        Parameters:
+        - loan (dict): Column -> value for the new loan.
+
+        Raises:
+        - FileNotFoundError: If the loan data CSV file does not exist.
+        - ValueError: If the loan has a column the loan file does not have.
+        """
+        with self._loan_file_lock():
+            self.refresh()
+            loans, index = self._loans
+            columns = [column for column in loans.columns if column not in LOAN_DERIVED_COLUMNS]
+
+            _append_csv_row(self.loan_path, columns, loan)
+
+            new_row = derive_loan_columns(_coerce_row(loans, loan, columns))
+            customer_id = new_row['CustomerID'].iloc[0]
+            new_index = dict(index)
+            new_index[customer_id] = np.append(index.get(customer_id, np.array([], dtype=np.intp)), len(loans))
+
+            self._loans = (pd.concat([loans, new_row], ignore_index=True), new_index)
+            self._exposure.add_loans(new_row)
+            self._loan_signature = _file_signature(self.loan_path)
+            loan_id = new_row['LoanID'].iloc[0]
+            if pd.notna(loan_id):
+                self._max_loan_id = max(self._max_loan_id, int(loan_id))
+
+    def record_emi_payments(self, customer_id, loan_id, count=1):
+        """
+        Record EMIs of a loan that were paid on time.
+
+        The payment is appended to the EMI payment log under the loan file
+        lock, then added to the loan's emis_paid_on_time and to the
+        customer's exposure in place, without re-reading the loan table.
+
+        Parameters:
+        - customer_id (int): The ID of the customer.
+        - loan_id (int): The ID of the customer's loan.
+        - count (float): The number of EMIs paid on time.
+
+        Raises:
+        - FileNotFoundError: If the loan data CSV file does not exist.
+        - ValueError: If count is not positive or the customer has no loan
+          with that ID.
+        """
+        if not count > 0:
+            raise ValueError(f"EMI count must be positive, got {count}")
+
+        with self._loan_file_lock():
+            self.refresh()
+            loans, index = self._loans
+
+            positions = index.get(customer_id, np.array([], dtype=np.intp))
+            positions = positions[loans['LoanID'].to_numpy()[positions] == loan_id]
+            if len(positions) == 0:
+                raise ValueError(f"Customer {customer_id} has no loan {loan_id}")
+
+            if not os.path.exists(self.emi_payment_path):
+                with open(self.emi_payment_path, "w") as payment_file:
+                    payment_file.write(",".join(EMI_PAYMENT_COLUMNS) + "\n")
+            _append_csv_row(self.emi_payment_path, EMI_PAYMENT_COLUMNS, {
+                'CustomerID': customer_id,
+                'LoanID': loan_id,
+                'EMIsPaidOnTime': count,
+                'RecordedOn': date.today().isoformat(),
+            })
+
+            emis_paid_on_time = loans['emis_paid_on_time'].to_numpy(copy=True)
+            emis_paid_on_time[positions] = np.nan_to_num(emis_paid_on_time[positions]) + count
+
+            self._loans = (loans.assign(emis_paid_on_time=emis_paid_on_time), index)
+            self._exposure.record_emi_payments(customer_id, count * len(positions))
+            self._payment_signature = _file_signature(self.emi_payment_path)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """
+    Return the process-wide DataStore, creating it on first use.
+
+    Set the LOAN_SNAPSHOT_DIR environment variable to let the store open
+    tables from a columnar snapshot written by snapshot.py, or the
+    LOAN_DATABASE environment variable to a database created by
+    sqlite_store.py to keep the tables in SQLite instead of the CSV files.
+
+    Returns:
+    - DataStore or SqliteDataStore: The shared data store.
+    """
+    global _store
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                database_path = os.environ.get("LOAN_DATABASE")
+                if database_path:
+                    from sqlite_store import SqliteDataStore
+
+                    _store = SqliteDataStore(database_path)
+                else:
+                    _store = DataStore(snapshot_dir=os.environ.get("LOAN_SNAPSHOT_DIR"))
+
+    return _store
@@ -0,0 +1,509 @@
+"""
+Per-customer aggregates of the loan book, maintained incrementally.
+
+The data store builds an ExposureTable when it loads the loan table and
+keeps it current: create_loan adds the new loan to its customer's row, an
+EMI payment adds to the customer's EMIs paid on time, and loans that
+mature when the day rolls over are taken out of the active totals. Each
+of these touches one record. The 50%-of-salary check and the credit score
+(credit_scoring.credit_score_from_exposure) read one row instead of
+filtering and summing the customer's loans.
+
+Run this module to rebuild the table from scratch and compare it with the
+one the data store maintains, or with --events to replay random new
+loans, EMI payments and day rollovers on an in-memory copy of the loan
+book and check after every event that the score derived from the
+maintained aggregates equals calculate_credit_scores on the full history:
+    python exposure.py [--events 2000] [--seed 0]
+"""
+import argparse
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+
+EXPOSURE_DTYPE = np.dtype([
+    ('active_amount', 'f8'),         # LoanAmount of active loans
+    ('active_emi', 'f8'),            # monthly_payment of active loans
+    ('loan_count', 'i8'),
+    ('emis_paid_on_time', 'f8'),
+    ('total_tenure', 'f8'),
+    ('tenured_loans', 'i8'),         # loans whose tenure is known
+    ('earliest_approval', 'M8[s]'),
+    ('approval_month_sum', 'f8'),    # year * 12 + month of every dated approval
+    ('dated_loans', 'i8'),           # loans whose approval date is known
+])
+
+# Fields compared exactly by the consistency check; the float sums are
+# compared with a tolerance because add-then-subtract can round differently
+EXACT_FIELDS = ['loan_count', 'tenured_loans', 'earliest_approval', 'dated_loans']
+
+
+def _per_loan(loans):
+    """
+    Return the per-loan contributions to the aggregates, as a DataFrame.
+    """
+    approval_dates = loans['approval_date']
+    active = loans['is_active'].to_numpy(dtype=bool)
+
+    return pd.DataFrame({
+        'CustomerID': loans['CustomerID'].to_numpy(),
+        'active_amount': np.where(active, loans['LoanAmount'].fillna(0).to_numpy(dtype=float), 0.0),
+        'active_emi': np.where(active, loans['monthly_payment'].fillna(0).to_numpy(dtype=float), 0.0),
+        'emis_paid_on_time': loans['emis_paid_on_time'].fillna(0).to_numpy(dtype=float),
+        'total_tenure': loans['Tenure'].fillna(0).to_numpy(dtype=float),
+        'tenured_loans': loans['Tenure'].notna().to_numpy(dtype=np.int64),
+        'earliest_approval': approval_dates.to_numpy(dtype='datetime64[s]'),
+        'approval_month_sum': (approval_dates.dt.year * 12 + approval_dates.dt.month).fillna(0).to_numpy(dtype=float),
+        'dated_loans': approval_dates.notna().to_numpy(dtype=np.int64),
+    })
+
+
+def aggregate_loans(loans):
+    """
+    Compute the exposure aggregates of every customer from scratch.
+
+    Parameters:
+    - loans (pd.DataFrame): Loan table with the columns of
+      data_store.derive_loan_columns().
+
+    Returns:
+    - pd.DataFrame: One row per customer with loans, indexed by CustomerID,
+      with the fields of EXPOSURE_DTYPE.
+    """
+    per_loan = _per_loan(loans)
+
+    aggregates = per_loan.groupby('CustomerID', sort=False).agg(
+        active_amount=('active_amount', 'sum'),
+        active_emi=('active_emi', 'sum'),
+        loan_count=('active_amount', 'size'),
+        emis_paid_on_time=('emis_paid_on_time', 'sum'),
+        total_tenure=('total_tenure', 'sum'),
+        tenured_loans=('tenured_loans', 'sum'),
+        earliest_approval=('earliest_approval', 'min'),
+        approval_month_sum=('approval_month_sum', 'sum'),
+        dated_loans=('dated_loans', 'sum'),
+    )
+    return aggregates[list(EXPOSURE_DTYPE.names)]
+
+
+def exposure_from_records(loans):
+    """
+    Aggregate one customer's loan rows, given as dicts, into an exposure
+    record, without building a DataFrame.
+
+    Gives the same record as aggregate_loans() would for those rows. Rows
+    that do not carry the derived columns of data_store.derive_loan_columns()
+    yet are converted to a DataFrame once so their dates can be parsed.
+
+    Parameters:
+    - loans (list of dict): The customer's loan rows, e.g. from
+      DataFrame.to_dict(orient='records').
+
+    Returns:
+    - np.void or None: A record with the fields of EXPOSURE_DTYPE, or None
+      if there are no loans.
+    """
+    if len(loans) == 0:
+        return None
+
+    if 'is_active' not in loans[0]:
+        from data_store import derive_loan_columns
+
+        aggregates = aggregate_loans(derive_loan_columns(pd.DataFrame.from_records(loans)))
+        record = np.zeros((), dtype=EXPOSURE_DTYPE)[()]
+        for name in EXPOSURE_DTYPE.names:
+            record[name] = aggregates[name].iloc[0]
+        return record
+
+    # NaN and NaT are the only values that differ from themselves
+    active_amount = active_emi = emis_paid_on_time = total_tenure = approval_month_sum = 0.0
+    tenured_loans = dated_loans = 0
+    earliest_approval = None
+    for loan in loans:
+        if loan['is_active']:
+            amount, payment = loan['LoanAmount'], loan['monthly_payment']
+            active_amount += amount if amount == amount else 0.0
+            active_emi += payment if payment == payment else 0.0
+        emis = loan['emis_paid_on_time']
+        emis_paid_on_time += emis if emis == emis else 0.0
+        tenure = loan['Tenure']
+        if tenure == tenure:
+            total_tenure += tenure
+            tenured_loans += 1
+        approval = loan['approval_date']
+        if approval == approval and approval is not None:
+            approval_month_sum += approval.year * 12 + approval.month
+            dated_loans += 1
+            if earliest_approval is None or approval < earliest_approval:
+                earliest_approval = approval
+
+    record = np.zeros((), dtype=EXPOSURE_DTYPE)[()]
+    record['active_amount'] = active_amount
+    record['active_emi'] = active_emi
+    record['loan_count'] = len(loans)
+    record['emis_paid_on_time'] = emis_paid_on_time
+    record['total_tenure'] = total_tenure
+    record['tenured_loans'] = tenured_loans
+    record['earliest_approval'] = (np.datetime64('NaT') if earliest_approval is None
+                                   else np.datetime64(earliest_approval, 's'))
+    record['approval_month_sum'] = approval_month_sum
+    record['dated_loans'] = dated_loans
+    return record
+
+
+class ExposureTable:
+    """
+    Exposure aggregates per customer, with O(1) lookups and updates.
+
+    Rows live in a NumPy structured array with a CustomerID -> position
+    index. A row is always replaced as a whole record, so a reader never
+    sees half of an update. Updates must be serialized by the caller (the
+    data store holds its lock).
+    """
+
+    def __init__(self, aggregates):
+        self._records = np.zeros(max(16, len(aggregates)), dtype=EXPOSURE_DTYPE)
+        for name in EXPOSURE_DTYPE.names:
+            self._records[name][:len(aggregates)] = aggregates[name].to_numpy()
+        self._index = {customer_id: position for position, customer_id in enumerate(aggregates.index)}
+        self._size = len(aggregates)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_loans(cls, loans):
+        """
+        Build the table from a loan table with the derived columns.
+        """
+        return cls(aggregate_loans(loans))
+
+    def __len__(self):
+        return len(self._index)
+
+    def get(self, customer_id):
+        """
+        Return the aggregates of a customer.
+
+        Parameters:
+        - customer_id (int): The ID of the customer.
+
+        Returns:
+        - np.void or None: A record with the fields of EXPOSURE_DTYPE, or None
+          if the customer has no loans.
+        """
+        position = self._index.get(customer_id)
+        if position is None:
+            return None
+        return self._records[position].copy()
+
+    def _apply(self, per_loan):
+        """
+        Add per-loan contributions (negative ones to remove), with one record
+        replacement per customer.
+        """
+        with self._lock:
+            for customer_id, rows in per_loan.groupby('CustomerID', sort=False):
+                position = self._index.get(customer_id)
+                is_new = position is None
+                if is_new:
+                    position = self._allocate()
+                record = self._records[position].copy()
+
+                for name in ('active_amount', 'active_emi', 'emis_paid_on_time', 'total_tenure',
+                             'tenured_loans', 'approval_month_sum', 'dated_loans'):
+                    record[name] += rows[name].sum()
+                if 'loan_count' in rows:
+                    record['loan_count'] += int(rows['loan_count'].sum())
+
+                approvals = rows['earliest_approval'].to_numpy(dtype='datetime64[s]')
+                approvals = approvals[~np.isnat(approvals)]
+                if len(approvals):
+                    earliest = approvals.min()
+                    if np.isnat(record['earliest_approval']) or earliest < record['earliest_approval']:
+                        record['earliest_approval'] = earliest
+
+                self._records[position] = record
+                # Publish a new customer only once their record is complete
+                if is_new:
+                    self._index[customer_id] = position
+
+    def _allocate(self):
+        position = self._size
+        if position == len(self._records):
+            grown = np.zeros(2 * len(self._records), dtype=EXPOSURE_DTYPE)
+            grown[:position] = self._records
+            self._records = grown
+        self._records[position] = np.zeros((), dtype=EXPOSURE_DTYPE)
+        self._records['earliest_approval'][position] = np.datetime64('NaT')
+        self._size += 1
+        return position
+
+    def add_loans(self, loans):
+        """
+        Add new loans to their customers' aggregates.
+
+        Parameters:
+        - loans (pd.DataFrame): The new loan rows, with the derived columns.
+        """
+        per_loan = _per_loan(loans)
+        per_loan['loan_count'] = 1
+        self._apply(per_loan)
+
+    def record_emi_payments(self, customer_id, count):
+        """
+        Add EMIs paid on time to a customer's aggregates.
+
+        Parameters:
+        - customer_id (int): The ID of the customer.
+        - count (float): The number of EMIs paid on time.
+
+        Raises:
+        - KeyError: If the customer has no loans.
+        """
+        with self._lock:
+            position = self._index[customer_id]
+            record = self._records[position].copy()
+            record['emis_paid_on_time'] += count
+            self._records[position] = record
+
+    def update_active(self, loans, positions, was_active):
+        """
+        Move loans whose is_active flag changed in or out of the active
+        totals, e.g. loans that matured when the day rolled over.
+
+        Parameters:
+        - loans (pd.DataFrame): The loan table with the new derived columns.
+        - positions (np.ndarray): Row positions of the loans whose flag changed.
+        - was_active (np.ndarray of bool): Their previous is_active flags.
+        """
+        if len(positions) == 0:
+            return
+
+        changed = loans.iloc[positions]
+        # Only the active totals move; signs follow the direction of the change
+        direction = np.where(was_active, -1.0, 1.0)
+        deltas = pd.DataFrame({
+            'CustomerID': changed['CustomerID'].to_numpy(),
+            'active_amount': direction * changed['LoanAmount'].fillna(0).to_numpy(dtype=float),
+            'active_emi': direction * changed['monthly_payment'].fillna(0).to_numpy(dtype=float),
+        })
+        for name in ('emis_paid_on_time', 'total_tenure', 'tenured_loans', 'approval_month_sum', 'dated_loans'):
+            deltas[name] = 0
+        deltas['earliest_approval'] = np.datetime64('NaT')
+        self._apply(deltas)
+
+    def to_frame(self):
+        """
+        Return the table as a DataFrame indexed by CustomerID.
+        """
+        with self._lock:
+            customer_ids = list(self._index)
+            records = self._records[[self._index[customer_id] for customer_id in customer_ids]]
+        return pd.DataFrame(records, index=pd.Index(customer_ids, name='CustomerID'))
+
+
+def compare_aggregates(left, right):
+    """
+    Compare two aggregate tables field by field.
+
+    Parameters:
+    - left, right (pd.DataFrame): Tables with the fields of EXPOSURE_DTYPE
+      and the same index; customers without loans may be all-missing rows.
+
+    Returns:
+    - pd.DataFrame: Same index and columns, True where the values agree:
+      exactly for EXACT_FIELDS and within a tolerance for the float sums.
+      Two missing values agree.
+    """
+    same = {}
+    for name in EXPOSURE_DTYPE.names:
+        if name in EXACT_FIELDS:
+            same[name] = ((left[name] == right[name]) | (left[name].isna() & right[name].isna())).to_numpy()
+        else:
+            same[name] = np.isclose(left[name].to_numpy(dtype=float), right[name].to_numpy(dtype=float),
+                                    rtol=1e-9, atol=1e-6, equal_nan=True)
+    return pd.DataFrame(same, index=left.index)
+
+
+def check_consistency(store=None):
+    """
+    Rebuild the exposure table from the loan table and diff it against the
+    incrementally maintained one.
+
+    Parameters:
+    - store (DataStore, optional): The store to check. Defaults to the
+      shared data store.
+
+    Returns:
+    - pd.DataFrame: One row per customer and field that differs, with
+      columns 'CustomerID', 'field', 'maintained' and 'rebuilt'; empty if
+      the two tables agree.
+    """
+    if store is None:
+        from data_store import get_store
+
+        store = get_store()
+
+    loans = store.loans()
+    maintained = store.exposure_table().to_frame()
+    rebuilt = aggregate_loans(loans)
+
+    customer_ids = maintained.index.union(rebuilt.index)
+    maintained = maintained.reindex(customer_ids)
+    rebuilt = rebuilt.reindex(customer_ids)
+    same = compare_aggregates(maintained, rebuilt)
+
+    differences = []
+    for name in EXPOSURE_DTYPE.names:
+        for customer_id in customer_ids[~same[name].to_numpy()]:
+            differences.append({
+                'CustomerID': customer_id,
+                'field': name,
+                'maintained': maintained.at[customer_id, name],
+                'rebuilt': rebuilt.at[customer_id, name],
+            })
+
+    return pd.DataFrame(differences, columns=['CustomerID', 'field', 'maintained', 'rebuilt'])
+
+
+def _random_loan(rng, customer_id, loan_id, today):
+    """
+    Return a raw loan row approved within the last 15 years, with the gaps
+    the shipped data has: missing tenures, EMI counts and dates.
+    """
+    tenure = int(rng.choice([6, 12, 24, 36, 60, 120, 180]))
+    approval = today - timedelta(days=int(rng.integers(0, 15 * 365)))
+    end = approval + timedelta(days=tenure * 30)
+    return {
+        'CustomerID': customer_id,
+        'LoanID': loan_id,
+        'LoanAmount': float(rng.integers(1, 200) * 10_000),
+        'Tenure': tenure if rng.random() > 0.05 else np.nan,
+        'InterestRate': float(rng.uniform(8, 18)),
+        'MonthlyPayment': float(rng.integers(1_000, 50_000)),
+        'EMIsPaidOnTime': float(rng.integers(0, tenure + 1)) if rng.random() > 0.1 else np.nan,
+        'DateOfApproval': approval.isoformat() if rng.random() > 0.05 else np.nan,
+        'EndDate': end.isoformat(),
+    }
+
+
+def check_incremental_scores(customers, loans, events=2000, seed=0):
+    """
+    Replay random events against an ExposureTable and check that the score
+    derived from it always equals the score computed from the full loan
+    history.
+
+    The events are the ones the data store applies incrementally: a new
+    loan (for a customer with or without loans), EMIs paid on a loan, and
+    the day moving forward, which matures loans and ages every approval.
+    After each event the scores of the customers it touched are compared,
+    and after a day moves forward those of every customer.
+
+    Parameters:
+    - customers (pd.DataFrame): Customer table with 'CustomerID' and
+      'ApprovedLimit'.
+    - loans (pd.DataFrame): Raw or derived loan table. It is not modified.
+    - events (int): Number of random events to replay.
+    - seed (int): Seed of the random event sequence.
+
+    Returns:
+    - list of dict: One item per mismatch with the event number, event
+      type, CustomerID and both (credit_score, warnings) results; empty if
+      the incremental scores always matched.
+    """
+    from credit_scoring import calculate_credit_scores, credit_score_from_exposure
+    from data_store import derive_loan_columns
+
+    rng = np.random.default_rng(seed)
+    today = date.today()
+    loans = derive_loan_columns(loans, today).reset_index(drop=True)
+    table = ExposureTable.from_loans(loans)
+
+    customers = customers.drop_duplicates('CustomerID').reset_index(drop=True)
+    limits = dict(zip(customers['CustomerID'], customers['ApprovedLimit']))
+    customer_ids = customers['CustomerID'].to_numpy()
+    next_loan_id = int(loans['LoanID'].max()) + 1 if len(loans) else 1
+
+    mismatches = []
+
+    def compare(event, kind, checked_ids):
+        checked = customers[customers['CustomerID'].isin(checked_ids)]
+        expected = calculate_credit_scores(checked, loans[loans['CustomerID'].isin(checked_ids)], today)
+        for customer_id, row in expected.iterrows():
+            maintained = credit_score_from_exposure(table.get(customer_id), limits[customer_id], today)
+            if maintained != (row['credit_score'], row['warnings']):
+                mismatches.append({
+                    'event': event,
+                    'type': kind,
+                    'CustomerID': customer_id,
+                    'maintained': maintained,
+                    'recomputed': (row['credit_score'], row['warnings']),
+                })
+
+    for event in range(events):
+        kind = rng.choice(['new_loan', 'emi_payment', 'new_day'], p=[0.45, 0.45, 0.1])
+
+        if kind == 'new_loan':
+            customer_id = rng.choice(customer_ids)
+            new_row = derive_loan_columns(pd.DataFrame([_random_loan(rng, customer_id, next_loan_id, today)]), today)
+            next_loan_id += 1
+            loans = pd.concat([loans, new_row], ignore_index=True)
+            table.add_loans(new_row)
+            touched = [customer_id]
+
+        elif kind == 'emi_payment':
+            if loans.empty:
+                continue
+            position = int(rng.integers(len(loans)))
+            customer_id = loans.at[position, 'CustomerID']
+            count = int(rng.integers(1, 4))
+            emis_paid_on_time = loans['emis_paid_on_time'].to_numpy(copy=True)
+            emis_paid_on_time[position] = np.nan_to_num(emis_paid_on_time[position]) + count
+            loans = loans.assign(emis_paid_on_time=emis_paid_on_time)
+            table.record_emi_payments(customer_id, count)
+            touched = [customer_id]
+
+        else:
+            today += timedelta(days=int(rng.integers(1, 120)))
+            was_active = loans['is_active'].to_numpy()
+            loans = derive_loan_columns(loans, today)
+            changed = np.flatnonzero(was_active != loans['is_active'].to_numpy())
+            table.update_active(loans, changed, was_active[changed])
+            touched = customer_ids
+
+        compare(event, kind, touched)
+
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the maintained exposure aggregates.")
+    parser.add_argument("--events", type=int, default=0,
+                        help="replay this many random events and compare the scores instead")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from data_store import get_store
+
+    store = get_store()
+
+    if args.events:
+        mismatches = check_incremental_scores(store.customers(), store.loans(), args.events, args.seed)
+        if not mismatches:
+            print(f"Incremental scores matched the full recomputation after each of {args.events} events")
+            return
+        print(pd.DataFrame(mismatches).to_string(index=False))
+        raise SystemExit(1)
+
+    differences = check_consistency(store)
+    if differences.empty:
+        print("Exposure table is consistent with the loan table")
+    else:
+        print(differences.to_string(index=False))
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
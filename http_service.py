@@ -0,0 +1,262 @@
+"""
+Local HTTP API for the loan functions.
+
+Every function is served as a JSON endpoint that takes its keyword
+arguments as the request body and answers with the function's response
+dict and status code:
+    POST /check_eligibility    {"phone_no": ..., "loan_amount": ..., "interest_rate": ..., "tenure": ...}
+    POST /create_loan          {"phone_no": ..., "loan_amount": ..., "interest_rate": ..., "tenure": ...}
+    POST /view_loans           {"phone_number": ...}
+    POST /get_customer_info    {"phone_no": ...}
+    POST /get_loan_offers      {"phone_no": ..., "tenures": [...], "interest_rates": [...]}
+Each has a batch variant that takes a list of such bodies and answers with
+one {"status": ..., "body": ...} item per request, in order:
+    POST /batch/check_eligibility  {"requests": [{...}, {...}]}
+    GET  /health
+
+The server speaks HTTP/1.1 with keep-alive, so a client can send many
+requests over one connection. The parent process loads the data store and
+then forks --workers processes that share the listening socket and start
+from the preloaded tables (copy-on-write). Each worker serves requests on
+a thread per connection. Workers see each other's writes the same way
+separate app processes do: through the data store's change detection.
+
+Usage:
+    python http_service.py [--host 127.0.0.1] [--port 8080] [--workers 4]
+"""
+import argparse
+import inspect
+import json
+import math
+import os
+import signal
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from data_store import get_store
+from loan_service import check_eligibility, create_loan, get_customer_info, get_loan_offers, view_loans
+
+
+MAX_BODY_BYTES = 10 * 2**20
+MAX_BATCH_SIZE = 1000
+
+
+def _get_customer_info(phone_no):
+    customer = get_customer_info(phone_no)
+    if customer is None:
+        return {"message": "No such user exists"}, 404
+    return customer.to_dict(), 200
+
+
+# Endpoint name -> function returning (body, status_code)
+ENDPOINTS = {
+    "check_eligibility": check_eligibility,
+    "create_loan": create_loan,
+    "view_loans": view_loans,
+    "get_customer_info": _get_customer_info,
+    "get_loan_offers": get_loan_offers,
+}
+
+
+def _to_json(value):
+    """
+    Convert a response to JSON-compatible values: NumPy and pandas scalars
+    become Python ones and NaN becomes null.
+    """
+    if isinstance(value, dict):
+        return {str(key): _to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def call_endpoint(name, arguments):
+    """
+    Call one endpoint function with the arguments of a request body.
+
+    Parameters:
+    - name (str): The endpoint name, a key of ENDPOINTS.
+    - arguments (dict): The keyword arguments.
+
+    Returns:
+    - dict: The JSON-compatible response body.
+    - int: The HTTP status code.
+    """
+    if not isinstance(arguments, dict):
+        return {"message": "Request body must be a JSON object"}, 400
+
+    function = ENDPOINTS[name]
+    try:
+        inspect.signature(function).bind(**arguments)
+    except TypeError as e:
+        # Missing or unknown arguments
+        return {"message": f"Invalid request: {e}"}, 400
+
+    try:
+        body, status = function(**arguments)
+    except ValueError as e:
+        # Malformed values, e.g. a phone number that is not a number
+        return {"message": f"Invalid request: {e}"}, 400
+    except FileNotFoundError:
+        return {"message": "Loan data is not available"}, 503
+
+    return _to_json(body), status
+
+
+class LoanRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "LoanService/1.0"
+    # Headers and body go out in separate writes; without TCP_NODELAY each
+    # response on a kept-alive connection waits for the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        # One line per request would dominate the cost of small requests
+        pass
+
+    def _send(self, body, status):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise ValueError("Request body too large")
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send({"status": "ok", "pid": os.getpid()}, 200)
+        else:
+            self._send({"message": "Not found"}, 404)
+
+    def do_POST(self):
+        path = self.path.strip("/").split("/")
+        is_batch = len(path) == 2 and path[0] == "batch"
+        name = path[-1]
+
+        if len(path) > 2 or (len(path) == 2 and not is_batch) or name not in ENDPOINTS:
+            # Drain the body so the connection stays usable
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            self._send({"message": "Not found"}, 404)
+            return
+
+        try:
+            request = self._read_body()
+        except ValueError as e:
+            self.close_connection = True
+            self._send({"message": f"Invalid JSON body: {e}"}, 400)
+            return
+
+        try:
+            if not is_batch:
+                body, status = call_endpoint(name, request)
+                self._send(body, status)
+                return
+
+            requests = request.get("requests") if isinstance(request, dict) else None
+            if not isinstance(requests, list) or len(requests) > MAX_BATCH_SIZE:
+                self._send({"message": f"Expected {{\"requests\": [...]}} with at most {MAX_BATCH_SIZE} items"}, 400)
+                return
+
+            responses = []
+            for arguments in requests:
+                body, status = call_endpoint(name, arguments)
+                responses.append({"status": status, "body": body})
+            self._send({"responses": responses}, 200)
+        except Exception as e:
+            self._send({"message": f"Internal error: {type(e).__name__}"}, 500)
+            raise
+
+
+class LoanHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Many clients connect at once under load
+    request_queue_size = 128
+
+
+def serve(host="127.0.0.1", port=8080, workers=1):
+    """
+    Serve the API until interrupted.
+
+    Parameters:
+    - host (str): The address to listen on.
+    - port (int): The port to listen on; 0 picks a free one.
+    - workers (int): Number of worker processes. Forking needs a POSIX
+      system; elsewhere a single process serves every request.
+    """
+    # Load the tables once, before forking, so every worker starts warm
+    store = get_store()
+    store.refresh()
+
+    server = LoanHTTPServer((host, port), LoanRequestHandler)
+    host, port = server.server_address[:2]
+
+    if workers <= 1 or not hasattr(os, "fork"):
+        print(f"Serving on http://{host}:{port} (pid {os.getpid()})", file=sys.stderr, flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return
+
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            try:
+                server.serve_forever()
+            finally:
+                os._exit(0)
+        children.append(pid)
+
+    print(f"Serving on http://{host}:{port} with {workers} workers (pid {os.getpid()})",
+          file=sys.stderr, flush=True)
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        for pid in children:
+            os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in children:
+            os.waitpid(pid, 0)
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the loan functions over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    main()
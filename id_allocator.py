@@ -0,0 +1,90 @@
+import os
+import threading
+
+from data_store import file_lock, get_store
+
+
+LOAN_ID_SEQUENCE_PATH = "dummy data/loan_id.seq"
+
+MAX_ID = 2 ** 63 - 1
+
+
+class IdAllocator:
+    """
+    Persistent, monotonic ID sequence shared by every process.
+
+    The last allocated ID is kept in a small sequence file. Allocation reads
+    it, bumps it and atomically replaces it while holding the file's lock,
+    so concurrent sessions never receive the same ID. Allocation starts
+    after the larger of the sequence and the last ID in use, so IDs are
+    never reused even when the data is replaced behind the sequence's back
+    (a restore, a regenerated dataset, another database). Both lookups are
+    O(1). IDs live in the signed 64-bit range.
+    """
+
+    def __init__(self, sequence_path, seed):
+        """
+        Parameters:
+        - sequence_path (str): Path of the file holding the last allocated ID.
+        - seed (callable): Returns the last ID already in use. Called on
+          every allocation, under the lock, so it must be cheap.
+        """
+        self.sequence_path = sequence_path
+        self.seed = seed
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self.sequence_path) as sequence_file:
+                last_id = int(sequence_file.read().strip())
+        except FileNotFoundError:
+            last_id = 0
+        return max(last_id, int(self.seed()))
+
+    def _write(self, value):
+        tmp_path = f"{self.sequence_path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp_path, "w") as sequence_file:
+            sequence_file.write(str(value))
+            sequence_file.flush()
+            os.fsync(sequence_file.fileno())
+        os.replace(tmp_path, self.sequence_path)
+
+    def allocate(self, count=1):
+        """
+        Allocate a block of consecutive IDs.
+
+        Parameters:
+        - count (int): Number of IDs to allocate.
+
+        Returns:
+        - int: The first ID of the block; the block is [id, id + count).
+
+        Raises:
+        - OverflowError: If the 64-bit ID space is exhausted.
+        """
+        with self._lock, file_lock(self.sequence_path):
+            last_id = self._read()
+
+            if last_id + count > MAX_ID:
+                raise OverflowError("ID space exhausted")
+
+            self._write(last_id + count)
+
+        return last_id + 1
+
+
+def _last_loan_id():
+    return get_store().max_loan_id()
+
+
+_loan_id_allocator = IdAllocator(LOAN_ID_SEQUENCE_PATH, seed=_last_loan_id)
+
+
+def next_loan_id():
+    """
+    Allocate the next LoanID.
+
+    Returns:
+    - int: A LoanID that has never been handed out before.
+    """
+    return _loan_id_allocator.allocate()
@@ -0,0 +1,327 @@
+"""
+Call counts, latency histograms, rows scanned and errors of the loan tools.
+
+The layer is off unless the LOAN_METRICS environment variable is set (to
+anything but "0") when the modules are imported. While it is off,
+instrument() and counts_rows() return the function they decorate
+unchanged, so there is no overhead at all. While it is on, every
+instrumented call costs two clock reads, a context variable swap and a
+short locked update.
+
+Rows scanned are the rows the data store handed out or parsed while a call
+was running, including the rows of any instrumented call it made.
+
+Token counts of the chat agent (prompt, completion and tool-spec tokens of
+LLM calls, argument and output tokens of tool calls) are added with
+metrics.record_tokens().
+
+Metrics are exported in the Prometheus text format with
+metrics.render_prometheus(), or written to a file for the node exporter's
+textfile collector with metrics.write_prometheus(path).
+"""
+import contextvars
+import functools
+import inspect
+import os
+import threading
+import time
+from bisect import bisect_left
+
+
+METRICS_ENABLED = os.environ.get("LOAN_METRICS", "0") != "0"
+
+# Upper bounds in seconds, from in-memory lookups up to LLM round trips
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+METRIC_PREFIX = "loan_assistant"
+
+
+class _Call:
+    __slots__ = ("rows",)
+
+    def __init__(self):
+        self.rows = 0
+
+
+# The instrumented call currently running in this thread or task
+_current_call = contextvars.ContextVar("current_call", default=None)
+
+
+class _FunctionMetrics:
+    __slots__ = ("calls", "errors", "rows", "seconds", "bucket_counts")
+
+    def __init__(self, bucket_count):
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.seconds = 0.0
+        # One count per bucket plus the +Inf bucket, not cumulative
+        self.bucket_counts = [0] * (bucket_count + 1)
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of per-function call metrics.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._functions = {}
+        # (source, kind) -> token count
+        self._tokens = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds, rows=0, error=False):
+        """
+        Record one call.
+
+        Parameters:
+        - name (str): The name the function is reported under.
+        - seconds (float): How long the call took.
+        - rows (int): Rows scanned during the call.
+        - error (bool): Whether the call raised.
+        """
+        bucket = bisect_left(self.buckets, seconds)
+
+        with self._lock:
+            function = self._functions.get(name)
+            if function is None:
+                function = self._functions[name] = _FunctionMetrics(len(self.buckets))
+            function.calls += 1
+            function.errors += error
+            function.rows += rows
+            function.seconds += seconds
+            function.bucket_counts[bucket] += 1
+
+    def record_tokens(self, source, kind, count):
+        """
+        Add tokens to a counter.
+
+        Parameters:
+        - source (str): What the tokens were spent on, e.g. "llm" or a tool
+          name.
+        - kind (str): Which tokens, e.g. "prompt", "completion", "tool_spec",
+          "arguments" or "output".
+        - count (int): The number of tokens.
+        """
+        with self._lock:
+            self._tokens[source, kind] = self._tokens.get((source, kind), 0) + count
+
+    def reset(self):
+        """
+        Forget everything recorded so far.
+        """
+        with self._lock:
+            self._functions.clear()
+            self._tokens.clear()
+
+    def snapshot(self):
+        """
+        Return the metrics of every function recorded so far.
+
+        Returns:
+        - dict: Function name -> dict with 'calls', 'errors', 'rows_scanned',
+          'total_seconds', 'mean_ms', 'p50_ms' and 'p95_ms'. Percentiles are
+          the upper bound of the histogram bucket they fall in (None past
+          the last bucket).
+        """
+        with self._lock:
+            functions = {
+                name: (function.calls, function.errors, function.rows, function.seconds, list(function.bucket_counts))
+                for name, function in self._functions.items()
+            }
+
+        return {
+            name: {
+                "calls": calls,
+                "errors": errors,
+                "rows_scanned": rows,
+                "total_seconds": seconds,
+                "mean_ms": seconds / calls * 1000,
+                "p50_ms": self._percentile_ms(bucket_counts, 0.50),
+                "p95_ms": self._percentile_ms(bucket_counts, 0.95),
+            }
+            for name, (calls, errors, rows, seconds, bucket_counts) in sorted(functions.items())
+        }
+
+    def token_snapshot(self):
+        """
+        Return the token counters recorded so far.
+
+        Returns:
+        - dict: Source -> {kind -> token count}.
+        """
+        with self._lock:
+            tokens = dict(self._tokens)
+
+        snapshot = {}
+        for (source, kind), count in sorted(tokens.items()):
+            snapshot.setdefault(source, {})[kind] = count
+        return snapshot
+
+    def _percentile_ms(self, bucket_counts, fraction):
+        target = fraction * sum(bucket_counts)
+        cumulative = 0
+        for bound, count in zip(self.buckets, bucket_counts):
+            cumulative += count
+            if cumulative >= target:
+                return bound * 1000
+        return None
+
+    def render_prometheus(self):
+        """
+        Render the metrics in the Prometheus text exposition format.
+
+        Returns:
+        - str: Counters of calls, errors and rows scanned and a latency
+          histogram, each labelled with the function name.
+        """
+        with self._lock:
+            functions = sorted(
+                (name, function.calls, function.errors, function.rows, function.seconds, list(function.bucket_counts))
+                for name, function in self._functions.items()
+            )
+            tokens = sorted(self._tokens.items())
+
+        counters = [
+            ("calls_total", "Calls of each instrumented function.", 1),
+            ("errors_total", "Calls that raised an exception.", 2),
+            ("rows_scanned_total", "Data rows read during the calls.", 3),
+        ]
+
+        lines = []
+        for suffix, description, field in counters:
+            metric = f"{METRIC_PREFIX}_{suffix}"
+            lines.append(f"# HELP {metric} {description}")
+            lines.append(f"# TYPE {metric} counter")
+            for function in functions:
+                lines.append(f'{metric}{{function="{function[0]}"}} {function[field]}')
+
+        metric = f"{METRIC_PREFIX}_call_duration_seconds"
+        lines.append(f"# HELP {metric} Latency of each instrumented function.")
+        lines.append(f"# TYPE {metric} histogram")
+        for name, calls, _, _, seconds, bucket_counts in functions:
+            cumulative = 0
+            for bound, count in zip(self.buckets, bucket_counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{function="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{function="{name}",le="+Inf"}} {calls}')
+            lines.append(f'{metric}_sum{{function="{name}"}} {seconds}')
+            lines.append(f'{metric}_count{{function="{name}"}} {calls}')
+
+        if tokens:
+            metric = f"{METRIC_PREFIX}_tokens_total"
+            lines.append(f"# HELP {metric} Tokens sent to and received from the LLM.")
+            lines.append(f"# TYPE {metric} counter")
+            for (source, kind), count in tokens:
+                lines.append(f'{metric}{{source="{source}",kind="{kind}"}} {count}')
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """
+        Write the Prometheus text to a file, replacing it atomically so a
+        scraper never reads a half-written file.
+
+        Parameters:
+        - path (str): The file to write, e.g. in the node exporter's
+          textfile collector directory (the name must end in .prom there).
+        """
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "w") as f:
+            f.write(self.render_prometheus())
+        os.replace(temporary_path, path)
+
+
+# Shared by every session in the process
+metrics = MetricsRegistry()
+
+
+def record_rows(count):
+    """
+    Add rows to the scan count of the instrumented call that is running.
+
+    Parameters:
+    - count (int): Number of rows scanned.
+    """
+    call = _current_call.get()
+    if call is not None:
+        call.rows += count
+
+
+def _finish(name, call, token, started, error):
+    elapsed = time.perf_counter() - started
+    _current_call.reset(token)
+
+    # Rows scanned by a nested call also count for its caller
+    parent = _current_call.get()
+    if parent is not None:
+        parent.rows += call.rows
+
+    metrics.record(name, elapsed, call.rows, error)
+
+
+def instrument(name):
+    """
+    Decorator recording the calls of a function or coroutine function under
+    the given name. Returns the function itself when metrics are disabled.
+
+    Parameters:
+    - name (str): The name the function is reported under.
+
+    Returns:
+    - callable: The decorator.
+    """
+    def decorate(fn):
+        if not METRICS_ENABLED:
+            return fn
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                call = _Call()
+                token = _current_call.set(call)
+                started = time.perf_counter()
+                error = True
+                try:
+                    result = await fn(*args, **kwargs)
+                    error = False
+                    return result
+                finally:
+                    _finish(name, call, token, started, error)
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                call = _Call()
+                token = _current_call.set(call)
+                started = time.perf_counter()
+                error = True
+                try:
+                    result = fn(*args, **kwargs)
+                    error = False
+                    return result
+                finally:
+                    _finish(name, call, token, started, error)
+
+        return wrapper
+
+    return decorate
+
+
+def counts_rows(fn):
+    """
+    Decorator adding the length of the DataFrame a function returns to the
+    rows scanned by the running instrumented call. Returns the function
+    itself when metrics are disabled.
+    """
+    if not METRICS_ENABLED:
+        return fn
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        result = fn(*args, **kwargs)
+        if result is not None:
+            record_rows(len(result))
+        return result
+
+    return wrapper
@@ -0,0 +1,256 @@
+import re
+import threading
+
+from loan_service import check_eligibility, get_customer_info, view_loans
+
+
+NUMBER = r"(\d[\d,]*(?:\.\d+)?)"
+
+PHONE_PATTERN = re.compile(r"(?<!\d)(?<!\d[.,])(\d{10})(?!\d|[.,]\d)")
+RATE_PATTERNS = [
+    re.compile(NUMBER + r"\s*(?:%|percent\b|per\s*cent\b)"),
+    re.compile(r"(?:interest(?:\s+rate)?|rate)\s*(?:of|at|=|:)?\s*" + NUMBER),
+]
+TENURE_PATTERN = re.compile(NUMBER + r"\s*(months?|mos?|years?|yrs?)\b")
+AMOUNT_PATTERN = re.compile(NUMBER + r"\s*(k|thousand|lakhs?|lacs?|million|mn|crores?|cr)?\b")
+
+AMOUNT_MULTIPLIERS = {
+    "k": 1_000, "thousand": 1_000,
+    "lakh": 100_000, "lakhs": 100_000, "lac": 100_000, "lacs": 100_000,
+    "million": 1_000_000, "mn": 1_000_000,
+    "crore": 10_000_000, "crores": 10_000_000, "cr": 10_000_000,
+}
+
+ELIGIBILITY_WORDS = re.compile(r"\b(eligib\w*|qualify|qualifies)\b")
+WRITE_WORDS = re.compile(r"\b(create|apply|applying|book|take|approve|open|new loan)\b")
+LOANS_WORDS = re.compile(r"\bloans?\b")
+VIEW_WORDS = re.compile(r"\b(show|view|list|see|display|my|existing|current|active|what)\b")
+INFO_WORDS = re.compile(r"\b(details?|info|information|profile)\b")
+
+
+def _to_number(text):
+    return float(text.replace(",", ""))
+
+
+def _take(pattern, text):
+    """
+    Return every match of pattern and the text with those matches blanked.
+    """
+    matches = list(pattern.finditer(text))
+    for match in matches:
+        text = text[:match.start()] + " " * (match.end() - match.start()) + text[match.end():]
+    return matches, text
+
+
+def extract_values(message):
+    """
+    Find the figures of a loan request in a chat message.
+
+    Parameters:
+    - message (str): The user's chat message.
+
+    Returns:
+    - dict: 'phone_numbers' (list of str), 'loan_amounts', 'interest_rates'
+      and 'tenures' (lists of float, tenures in months), each in the order
+      found, and 'rest', the lowercased message with all of them blanked.
+    """
+    text = message.lower()
+
+    phones, rest = _take(PHONE_PATTERN, text)
+    # Most specific patterns first, so "rate of 10" never eats a tenure
+    rates, rest = _take(RATE_PATTERNS[0], rest)
+    tenures, rest = _take(TENURE_PATTERN, rest)
+    more_rates, rest = _take(RATE_PATTERNS[1], rest)
+    rates += more_rates
+    amounts, rest = _take(AMOUNT_PATTERN, rest)
+
+    return {
+        "phone_numbers": [match.group(1) for match in phones],
+        "loan_amounts": [_to_number(match.group(1)) * AMOUNT_MULTIPLIERS.get(match.group(2), 1) for match in amounts],
+        "interest_rates": [_to_number(match.group(1)) for match in rates],
+        "tenures": [_to_number(match.group(1)) * (12 if match.group(2).startswith("y") else 1) for match in tenures],
+        "rest": rest,
+    }
+
+
+def parse_intent(message):
+    """
+    Recognize a fully specified, read-only loan request.
+
+    The parser only accepts messages it can map to exactly one tool call
+    with every argument present and unambiguous: one phone number and, for
+    eligibility checks, exactly one amount, one interest rate and one
+    tenure. Anything else (missing values, several candidates for a value,
+    requests that would write data) returns None so the agent handles it.
+
+    Parameters:
+    - message (str): The user's chat message.
+
+    Returns:
+    - dict or None: {'tool': tool function name, 'arguments': keyword
+      arguments} if the message is fully specified; otherwise, None.
+    """
+    text = message.lower()
+    values = extract_values(message)
+    phones, rates, tenures, amounts, rest = (values["phone_numbers"], values["interest_rates"], values["tenures"],
+                                             values["loan_amounts"], values["rest"])
+
+    if len(phones) != 1 or WRITE_WORDS.search(rest):
+        return None
+
+    if ELIGIBILITY_WORDS.search(text):
+        if len(rates) != 1 or len(tenures) != 1 or len(amounts) != 1:
+            return None
+
+        return {
+            "tool": "check_eligibility",
+            "arguments": {
+                "phone_no": phones[0],
+                "loan_amount": amounts[0],
+                "interest_rate": rates[0],
+                "tenure": int(tenures[0]),
+            },
+        }
+
+    # Lookups must not carry any other figures we would silently ignore
+    if rates or tenures or amounts:
+        return None
+
+    if LOANS_WORDS.search(rest) and VIEW_WORDS.search(rest):
+        return {"tool": "view_loans", "arguments": {"phone_number": phones[0]}}
+
+    if INFO_WORDS.search(rest) and not LOANS_WORDS.search(rest):
+        return {"tool": "get_customer_info", "arguments": {"phone_no": phones[0]}}
+
+    return None
+
+
+def _is_missing(value):
+    # None, or NaN from a pandas or NumPy value
+    return value is None or value != value
+
+
+def _format_amount(value):
+    return "n/a" if _is_missing(value) else f"{value:,.2f}"
+
+
+def _format_rate(value):
+    return "n/a" if _is_missing(value) else f"{value}%"
+
+
+def _render_eligibility(result):
+    response, status = result
+    if status == 404:
+        return response["message"]
+
+    data = response["data"]
+    lines = [f"**{response['message']}**", ""]
+    # A rejection leads with its reasons; the figures may not apply
+    for reason in data["reason_for_rejection"] or []:
+        lines.append(f"- Reason: {reason}")
+    lines += [
+        f"- Credit score: {data['credit_score']}",
+        f"- Requested interest rate: {_format_rate(data['interest_rate'])}",
+        f"- Applicable interest rate: {_format_rate(data['corrected_interest_rate'])}",
+        f"- Tenure: {data['tenure']} months",
+        f"- Monthly installment: {_format_amount(data['monthly_installment'])}",
+    ]
+    for warning in data["warnings"] or []:
+        lines.append(f"- Warning: {warning}")
+
+    return "\n".join(lines)
+
+
+def _render_loans(result):
+    response, status = result
+    if status == 404:
+        return response["message"]
+
+    loans = response["loans"]
+    columns = list(loans[0])
+    lines = [
+        f"Loans for customer {int(response['customer_id'])}:",
+        "",
+        "| " + " | ".join(columns) + " |",
+        "|" + "---|" * len(columns),
+    ]
+    for loan in loans:
+        lines.append("| " + " | ".join("" if value != value else str(value) for value in loan.values()) + " |")
+
+    return "\n".join(lines)
+
+
+def _render_customer(customer):
+    if customer is None:
+        return "No such user exists"
+
+    return "\n".join(f"- {field}: {value}" for field, value in customer.items())
+
+
+TOOLS = {
+    "check_eligibility": (check_eligibility, _render_eligibility),
+    "view_loans": (view_loans, _render_loans),
+    "get_customer_info": (get_customer_info, _render_customer),
+}
+
+
+class RouterStats:
+    """
+    Process-wide counters of how chat messages were served.
+    """
+
+    def __init__(self):
+        self.fast_path = 0
+        self.agent = 0
+        self._lock = threading.Lock()
+
+    def record(self, fast_path):
+        with self._lock:
+            if fast_path:
+                self.fast_path += 1
+            else:
+                self.agent += 1
+
+    def snapshot(self):
+        """
+        Return the counters.
+
+        Returns:
+        - dict: 'fast_path' and 'agent' message counts, and 'fast_path_share',
+          the fraction of messages answered without the agent.
+        """
+        with self._lock:
+            total = self.fast_path + self.agent
+            return {
+                "fast_path": self.fast_path,
+                "agent": self.agent,
+                "fast_path_share": self.fast_path / total if total else 0.0,
+            }
+
+
+router_stats = RouterStats()
+
+
+def route(message):
+    """
+    Answer a chat message directly if it is a fully specified lookup.
+
+    Parameters:
+    - message (str): The user's chat message.
+
+    Returns:
+    - str or None: The markdown answer if the message was served by the fast
+      path; None if it should go to the agent.
+    """
+    intent = parse_intent(message)
+    answer = None
+
+    if intent is not None:
+        tool, render = TOOLS[intent["tool"]]
+        try:
+            answer = render(tool(**intent["arguments"]))
+        except Exception as e:
+            print(f"Fast path failed for {intent['tool']}, falling back to the agent: {e}")
+
+    router_stats.record(answer is not None)
+    return answer
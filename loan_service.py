@@ -0,0 +1,697 @@
+from math import floor
+from datetime import datetime
+from dateutil.relativedelta import relativedelta
+from data_store import get_store
+from id_allocator import next_loan_id
+from credit_scoring import MISSING_DATES_WARNING, credit_score_cache, credit_score_from_exposure
+from exposure import exposure_from_records
+from amortization import monthly_installments
+from instrumentation import instrument
+from offers import DEFAULT_INTEREST_RATES, DEFAULT_TENURES, max_loan_amounts, minimum_interest_rates
+
+
+@instrument("add_user")
+def add_user(first_name, last_name, age, phone_no, monthly_salary):
+    """
+    Add a new user to the customer data CSV file.
+
+    This function allocates the next customer ID from the shared data store 
+    and appends the user's information as a single row to the customer data 
+    file, without rewriting the existing data. The user's approved limit is 
+    calculated based on their monthly salary.
+
+    Parameters:
+    - first_name (str): First name of the customer.
+    - last_name (str): Last name of the customer.
+    - age (int): Age of the customer (must be at least 18).
+    - phone_no (str): Phone number of the customer.
+    - monthly_salary (float): Monthly salary of the customer.
+
+    Returns:
+    None: The function appends the new customer to the CSV file.
+    """
+    monthly_salary = int(monthly_salary)
+
+    get_store().add_customer(
+        {
+            "FirstName": first_name,
+            "LastName": last_name,
+            "Age": age,
+            "PhoneNumber": int(phone_no),
+            "MonthlySalary": monthly_salary,
+            "ApprovedLimit": floor(36 * monthly_salary / 100000) * 100000,
+        }
+    )
+
+
+def get_customer_id(phone_no):
+    """
+    Retrieve the CustomerID associated with a given phone number.
+
+    This function looks the phone number up in the shared data store and 
+    returns the corresponding CustomerID. If the phone number is not found 
+    or the file is not found, the function returns None.
+
+    Parameters:
+    - phone_no (str): The phone number of the customer whose ID is to be retrieved.
+
+    Returns:
+    - int or None: The CustomerID of the customer if found; otherwise, None.
+    """
+    try:
+        customer = get_store().customer_by_phone(int(phone_no))
+    except FileNotFoundError:
+        return None  
+
+    if customer is not None:
+        return customer['CustomerID'].values[0]  
+    else:
+        return None
+
+
+@instrument("get_customer_info")
+def get_customer_info(phone_no):
+    """
+    Retrieve the customer information associated with a given phone number.
+
+    This function looks the phone number up in the shared data store and 
+    returns the corresponding customer information as a 
+    pandas Series. If the phone number is not found or the file is not 
+    found, the function returns None.
+
+    Parameters:
+    - phone_no (str): The phone number of the customer whose information is to be retrieved.
+
+    Returns:
+    - pandas.Series or None: A Series containing the customer information if found; otherwise, None.
+    """
+    phone_no = int(phone_no)  
+
+    try:
+        customer = get_store().customer_by_phone(phone_no)
+    except FileNotFoundError:
+        return None
+
+    if customer is not None:
+        return customer.iloc[0]  
+    else:
+        return None
+
+
+@instrument("get_customer_overview")
+def get_customer_overview(phone_no):
+    """
+    Retrieve a customer's details and their loans in a single call.
+
+    Parameters:
+    - phone_no (str): The phone number of the customer.
+
+    Returns:
+    - dict: A dictionary containing:
+        - 'customer' (dict or None): The customer information if found.
+        - 'loans' (dict): The view_loans response for the customer.
+    """
+    customer = get_customer_info(phone_no)
+
+    return {
+        "customer": customer.to_dict() if customer is not None else None,
+        "loans": view_loans(phone_no)[0],
+    }
+
+
+@instrument("calculate_credit_score")
+def calculate_credit_score(customer_data, customer_loan_data):
+    """
+    Calculate credit score based on multiple factors with weighted importance:
+    1. Approved limit usage (25%)
+    2. EMI payment history (30%)
+    3. Average loan tenure (15%)
+    4. Customer history length (10%)
+    5. Number of loans (20%)
+
+    The loan rows are folded into one exposure record (see exposure.py) and
+    scored by credit_scoring.credit_score_from_exposure, the same function
+    that scores the data store's maintained records.
+
+    Parameters:
+    - customer_data (list of dict): A list containing customer information,
+      including 'ApprovedLimit'.
+    - customer_loan_data (list of dict): The customer's loan rows, with or
+      without the derived columns of data_store.derive_loan_columns.
+
+    Returns:
+    - int: The credit score.
+    - list: The warnings.
+    """
+    exposure = exposure_from_records(customer_loan_data)
+    if exposure is None:
+        return 0, [MISSING_DATES_WARNING]
+
+    return credit_score_from_exposure(exposure, customer_data[0]['ApprovedLimit'])
+
+
+def calculate_monthly_installment(loan_amount, interest_rate, tenure):
+    """
+    Calculate the monthly installment for a loan.
+
+    This function computes the monthly payment required to repay a loan 
+    based on the loan amount, annual interest rate, and loan tenure. 
+    It uses the formula for calculating an annuity payment, or straight-line 
+    repayment for a 0% interest rate, via the vectorized amortization engine.
+
+    Parameters:
+    - loan_amount (float): The total amount of the loan.
+    - interest_rate (float): The annual interest rate (as a percentage).
+    - tenure (int): The loan tenure in months.
+
+    Returns:
+    - float or None: The calculated monthly installment, or None if no
+      interest rate applies (get_eligibility rejects the credit score).
+    """
+    if interest_rate is None:
+        return None
+    return float(monthly_installments(loan_amount, interest_rate, tenure))
+
+
+
+def emis_exceed_limit(customer_data, customer_loan_data, current_loan_installment):
+    """
+    Determine if the total EMIs (Equated Monthly Installments) exceed 
+    50% of the customer's monthly salary.
+
+    This function checks if the sum of the current EMIs for active loans 
+    along with a new loan installment exceeds half of the customer's 
+    monthly salary. It is used to assess the affordability of new loans 
+    for the customer.
+
+    Parameters:
+    - customer_data (list of dict): A list containing customer information,
+      including 'MonthlySalary'.
+    - customer_loan_data (list of dict): A list containing loan information,
+      including the derived 'is_active' and 'monthly_payment' columns 
+      (computed here if missing). The rows are folded into one exposure 
+      record and checked by exposure_exceeds_limit.
+    - current_loan_installment (float): The EMI of the current loan being 
+      considered for approval.
+
+    Returns:
+    - bool: True if the total EMIs exceed 50% of the monthly salary, 
+      False otherwise.
+    """
+    exposure = exposure_from_records(customer_loan_data)
+
+    return exposure_exceeds_limit(customer_data[0]['MonthlySalary'], exposure, current_loan_installment)
+
+
+def exposure_exceeds_limit(monthly_salary, exposure, current_loan_installment):
+    """
+    Same check as emis_exceed_limit, but from the customer's exposure
+    aggregates (see DataStore.exposure) instead of their loan rows.
+
+    Parameters:
+    - monthly_salary (float): The customer's 'MonthlySalary'.
+    - exposure (np.void or None): The customer's exposure record, or None
+      if they have no loans.
+    - current_loan_installment (float): The EMI of the current loan being 
+      considered for approval.
+
+    Returns:
+    - bool: True if the total EMIs exceed 50% of the monthly salary, 
+      False otherwise.
+    """
+    sum_of_current_emis = exposure['active_emi'] if exposure is not None else 0
+
+    return (sum_of_current_emis + current_loan_installment) > (monthly_salary * 0.5)
+
+
+def get_eligibility(credit_score, interest_rate):
+    """
+    Determine the loan eligibility of a customer based on their credit score
+    and the applicable interest rate.
+
+    This function assesses whether a customer qualifies for a loan and, if 
+    not, provides reasons for rejection. It also corrects the interest rate 
+    based on the customer's credit score.
+
+    Parameters:
+    - credit_score (int): The credit score of the customer, on a scale from 0 to 100.
+    - interest_rate (float): The proposed interest rate for the loan, in percentage.
+
+    Returns:
+    - bool: True if the customer is eligible for the loan, False otherwise.
+    - float: The corrected interest rate based on eligibility criteria.
+    - list: A list of reasons for rejection if the customer is not eligible.
+    """
+    rejected_reason = []
+    
+    approval = True
+    
+    if credit_score > 50:
+        corrected_interest_rate = interest_rate
+        approval = True
+    elif 30 < credit_score <= 50:
+        if interest_rate < 12:
+            approval = False
+            rejected_reason.append("You are only eligible for interest rates above 12%")
+        corrected_interest_rate = max(interest_rate, 12)
+    elif 10 < credit_score <= 30:
+        if interest_rate < 16:
+            approval = False
+            rejected_reason.append("You are only eligible for interest rates above 16%")
+        corrected_interest_rate = max(interest_rate, 16)
+    else:
+        approval = False
+        rejected_reason.append("Your credit score is too low.")
+        corrected_interest_rate = None
+        
+    return approval, corrected_interest_rate, rejected_reason
+
+def generate_unique_loan_id(loan_data=None):
+    """
+    Generate a unique loan ID that does not exist in the loan data.
+
+    This function takes the next value from the persistent loan ID 
+    sequence, which never falls behind the highest existing LoanID. 
+    Allocation is O(1), never collides and is safe across concurrent 
+    sessions.
+
+    Parameters:
+    - loan_data (pd.DataFrame, optional): Kept for backwards compatibility; 
+      the sequence already accounts for every existing LoanID.
+
+    Returns:
+    - int: A unique loan ID that is not already present in the loan data.
+    """
+    return next_loan_id()
+
+@instrument("create_loan")
+def create_loan(phone_no, loan_amount, interest_rate, tenure):
+    """
+    Create a loan for a customer based on their phone number and loan parameters.
+
+    This function checks if the customer exists, verifies their credit score,
+    eligibility for the loan, and ensures that the monthly installment does not
+    exceed 50% of their monthly salary. If all conditions are met, a new loan
+    entry is created and saved to the loan data file. The checks and the
+    write run in one write transaction of the data store.
+
+    Parameters:
+    - phone_no (str): The customer's phone number to identify the customer.
+    - loan_amount (float): The amount of the loan requested by the customer.
+    - interest_rate (float): The interest rate of the loan.
+    - tenure (int): The duration of the loan in months.
+
+    Returns:
+    - dict: A dictionary containing:
+        - 'loan_data': A nested dictionary with details about the loan including:
+            - loan_id (int or None): The unique ID of the loan if approved.
+            - customer_id (int): The ID of the customer.
+            - loan_approved (bool): Indicates if the loan was approved.
+            - message (list): Reasons for rejection if not approved.
+            - monthly_installment (float or None): The calculated monthly installment if approved.
+        - 'message' (str): A success or failure message regarding loan creation.
+    
+    Raises:
+    - FileNotFoundError: If the customer or loan data CSV files do not exist.
+    """
+
+    today = datetime.now()
+
+    store = get_store()
+
+    # Fetch the customer using the phone number
+    phone_no = int(phone_no)
+    customer = store.customer_by_phone(phone_no)
+
+    if customer is None:
+        return {'message': "No such user exists"}, 404
+
+    customer_id = customer['CustomerID'].values[0]
+
+    # Check and write in one transaction, so concurrent sessions cannot
+    # both pass the checks against the same loans and overcommit
+    with store.write_transaction():
+        # Calculate credit score and eligibility from the customer's aggregates
+        exposure = store.exposure(customer_id)
+
+        approval = True
+        rejected_reason = []
+        corrected_interest_rate = None
+
+        if exposure is not None:
+            credit_score, _ = credit_score_cache.get_or_compute(
+                customer_id,
+                store.version,
+                lambda: credit_score_from_exposure(exposure, customer['ApprovedLimit'].values[0])
+            )
+            approval, corrected_interest_rate, rejected_reason = get_eligibility(credit_score, interest_rate)
+
+            monthly_installment = calculate_monthly_installment(loan_amount, corrected_interest_rate, tenure)
+
+            if (monthly_installment is not None
+                    and exposure_exceeds_limit(customer['MonthlySalary'].values[0], exposure, monthly_installment)):
+                rejected_reason.append("Sum of all your EMIs exceeds 50% of your monthly salary.")
+                approval = False
+        else:
+            if loan_amount > 1_000_000:
+                approval = False
+                rejected_reason.append("Since you have no credit history, you are not eligible for loans exceeding amount 1,000,000.")
+
+            if interest_rate < 12:
+                approval = False
+                rejected_reason.append("Since you have no credit history, you are not eligible for loans with Interest Rates less than 12%.")
+
+        if approval:
+            monthly_installment = calculate_monthly_installment(loan_amount, interest_rate, tenure)
+
+            # Generate a unique loan ID
+            loan_id = generate_unique_loan_id()
+
+            # Append approved loan to the store
+            store.add_loan({
+                "LoanID": loan_id,
+                "CustomerID": customer_id,
+                "LoanAmount": loan_amount,
+                "Tenure": tenure,
+                "InterestRate": corrected_interest_rate or interest_rate,
+                "MonthlyPayment": monthly_installment,
+                "EMIsPaidOnTime": 0,
+                "DateOfApproval": today.strftime('%Y-%m-%d'),
+                "EndDate": (today + relativedelta(months=tenure)).strftime('%Y-%m-%d')
+            })
+            credit_score_cache.invalidate(customer_id)
+
+            loan_id = loan_id  # Return the unique loan ID
+        else:
+            loan_id = None
+
+    return {
+        'loan_data': {
+            "loan_id": loan_id,
+            "customer_id": customer_id,
+            "loan_approved": approval,
+            "message": rejected_reason,
+            "monthly_installment": monthly_installment if approval else None
+        },
+        'message': "Loan created successfully" if approval else "Loan creation failed"
+    }, 200
+
+
+@instrument("record_emi_payments")
+def record_emi_payments(customer_id, loan_id, count=1):
+    """
+    Record EMIs of a loan that the customer paid on time.
+
+    The customer's EMI history is updated in place, so their next credit
+    score reflects the payment without rescanning their loans.
+
+    Parameters:
+    - customer_id (int): The ID of the customer.
+    - loan_id (int): The ID of the customer's loan.
+    - count (int): The number of EMIs paid on time.
+
+    Raises:
+    - ValueError: If count is not positive or the customer has no loan with
+      that ID.
+    """
+    get_store().record_emi_payments(customer_id, loan_id, count)
+    credit_score_cache.invalidate(customer_id)
+
+
+@instrument("view_loans")
+def view_loans(phone_number, columns=['LoanAmount', 'Tenure', 'InterestRate', 'EndDate', 'MonthlyPayment', 'DateOfApproval']):
+    """
+    Retrieve and display loan information for a customer based on their phone number.
+
+    This function checks if a customer exists by their phone number, retrieves their 
+    loans if available, and filters the loan details based on the specified columns.
+
+    Parameters:
+    - phone_number (str): The phone number of the customer to look up.
+    - columns (list of str): A list of column names to include in the response. 
+                             Defaults to a standard set of loan attributes.
+
+    Returns:
+    - dict: A dictionary containing:
+        - 'customer_id' (int): The ID of the customer.
+        - 'loans' (list): A list of dictionaries with loan details if found; 
+                          otherwise, returns a message indicating no loans.
+    - int: HTTP status code indicating the result of the request (200 for success, 404 for not found).
+
+    Raises:
+    - FileNotFoundError: If the customer or loan data CSV files do not exist.
+    """
+
+    store = get_store()
+    phone_number = int(phone_number)
+
+    customer_row = store.customer_by_phone(phone_number)
+
+    if customer_row is None:
+        return {"message": "No such customer exists"}, 404  
+
+    customer_id = customer_row.iloc[0]['CustomerID']  
+
+    return format_loans(customer_id, store.loans_for_customer(customer_id), columns)
+
+
+def format_loans(customer_id, loans, columns):
+    """
+    Build the view_loans response from a customer's loan rows.
+
+    Parameters:
+    - customer_id (int): The ID of the customer.
+    - loans (pd.DataFrame): The customer's loan rows.
+    - columns (list of str): The columns to include, or None for all.
+
+    Returns:
+    - dict: The response body, as returned by view_loans.
+    - int: HTTP status code (200 for success, 404 if there are no loans).
+    """
+    if columns:
+        loans = loans[columns]
+
+    if loans.empty:
+        return {"message": "No loans found for this customer"}, 404  
+
+    loans_list = loans.to_dict(orient='records')
+
+    return {
+        "customer_id": customer_id,
+        "loans": loans_list
+    }, 200
+
+
+
+@instrument("check_eligibility")
+def check_eligibility(phone_no, loan_amount, interest_rate, tenure):
+    """
+    Check the eligibility of a customer for a loan based on their phone number, 
+    loan amount, interest rate, and tenure.
+
+    This function retrieves customer information and the aggregates of their 
+    existing loans, calculates the credit score, determines eligibility, and 
+    computes the monthly installment for the requested loan.
+
+    Parameters:
+    - phone_no (str): The phone number of the customer.
+    - loan_amount (float): The amount of the loan being requested.
+    - interest_rate (float): The proposed interest rate for the loan.
+    - tenure (int): The tenure for which the loan is requested (in months).
+
+    Returns:
+    - dict: A dictionary containing:
+        - 'data' (dict): A dictionary with eligibility details, including:
+            - 'credit_score' (float): The calculated credit score of the customer.
+            - 'customer_id' (int): The ID of the customer.
+            - 'approval' (bool): Indicates if the customer is approved for the loan.
+            - 'interest_rate' (float): The proposed interest rate.
+            - 'corrected_interest_rate' (float): The final interest rate based on eligibility.
+            - 'tenure' (int): The tenure for the loan.
+            - 'monthly_installment' (float): The calculated monthly installment.
+            - 'reason_for_rejection' (list): Reasons for rejection, if applicable.
+            - 'warnings' (list): Any warnings regarding eligibility.
+        - 'message' (str): A message indicating eligibility status.
+
+    - int: HTTP status code (200 for eligible, 403 for not eligible).
+
+    Raises:
+    - FileNotFoundError: If the customer or loan data CSV files do not exist.
+    """
+
+    store = get_store()
+    phone_no = int(phone_no)
+    
+    # Find the customer by phone number
+    customer_row = store.customer_by_phone(phone_no)
+
+    if customer_row is None:
+        return {"message": "No such user exists"}, 404  
+
+    customer_id = customer_row.iloc[0]['CustomerID']  
+
+    # Check if the user has loan data
+    exposure = store.exposure(customer_id)
+    # if exposure is None:
+    #     return {"message": "User has no credit history"}, 404 
+
+    return evaluate_eligibility(customer_row, exposure, store.version, loan_amount, interest_rate, tenure)
+
+
+def evaluate_eligibility(customer_row, exposure, data_version, loan_amount, interest_rate, tenure):
+    """
+    Evaluate a loan request against a customer's data that was already fetched.
+
+    This is the computation behind check_eligibility, kept separate from the 
+    data lookups so the async variants can reuse it.
+
+    Parameters:
+    - customer_row (pd.DataFrame): The customer's one-row DataFrame.
+    - exposure (np.void or None): The customer's exposure record from
+      DataStore.exposure(), or None if they have no loans.
+    - data_version (int): The data store version the rows come from.
+    - loan_amount (float): The amount of the loan being requested.
+    - interest_rate (float): The proposed interest rate for the loan.
+    - tenure (int): The tenure for which the loan is requested (in months).
+
+    Returns:
+    - dict: The response body, as returned by check_eligibility.
+    - int: HTTP status code (200 for eligible, 403 for not eligible).
+    """
+    customer = customer_row.iloc[0]
+    customer_id = customer['CustomerID']  
+
+    # The score is reused until this customer's loans change
+    credit_score, warning = credit_score_cache.get_or_compute(
+        customer_id,
+        data_version,
+        lambda: credit_score_from_exposure(exposure, customer['ApprovedLimit'])
+    )
+
+    approval, corrected_interest_rate, rejected_reason = get_eligibility(credit_score, interest_rate)
+
+    monthly_installment = calculate_monthly_installment(loan_amount, corrected_interest_rate, tenure)
+
+    if monthly_installment is not None and exposure_exceeds_limit(customer['MonthlySalary'], exposure, monthly_installment):
+        rejected_reason.append("Sum of all your EMIs exceeds 50% of your monthly salary.")
+        approval = False
+
+    return {
+        'data': {
+            "credit_score": credit_score,
+            "customer_id": customer_id,
+            "approval": approval,
+            "interest_rate": interest_rate,
+            "corrected_interest_rate": corrected_interest_rate,
+            "tenure": tenure,
+            "monthly_installment": monthly_installment,
+            "reason_for_rejection": rejected_reason or None,
+            "warnings": warning
+        },
+        'message': "Eligible for loan" if approval else "Not Eligible for loan"
+    }, 200 if approval else 403  # HTTP status codes
+
+
+@instrument("get_loan_offers")
+def get_loan_offers(phone_no, tenures=None, interest_rates=None):
+    """
+    Find the largest loan amount a customer is eligible for, for every 
+    combination of tenure and interest rate, in a single call.
+
+    Use this instead of calling check_eligibility repeatedly with smaller 
+    amounts or other tenures after a rejection. Amounts follow the rules 
+    create_loan applies: the interest rate floor set by the credit score, 
+    the 50%-of-salary limit on EMIs, and the 1,000,000 limit for customers 
+    without credit history.
+
+    Parameters:
+    - phone_no (str): The phone number of the customer.
+    - tenures (list of int, optional): Tenures to evaluate, in months. 
+      Defaults to 12, 24, 36, 60, 84, 120 and 180.
+    - interest_rates (list of float, optional): Interest rates to evaluate, 
+      in percent. Defaults to 10, 12, 14, 16 and 18.
+
+    Returns:
+    - dict: A dictionary containing:
+        - 'customer_id' (int): The ID of the customer.
+        - 'credit_score' (int): The customer's credit score.
+        - 'minimum_interest_rate' (float or None): The lowest interest rate 
+          the customer is eligible for; None if no rate is.
+        - 'tenures' (list of int), 'interest_rates' (list of float): The grid.
+        - 'max_loan_amount' (list of list of float): One row per tenure and 
+          one column per interest rate; 0 where no amount is approved.
+        - 'message' (str): A summary of the offers.
+    - int: HTTP status code (200 if the customer exists, 404 otherwise).
+
+    Raises:
+    - FileNotFoundError: If the customer or loan data CSV files do not exist.
+    """
+    store = get_store()
+
+    customer_row = store.customer_by_phone(int(phone_no))
+
+    if customer_row is None:
+        return {"message": "No such user exists"}, 404
+
+    exposure = store.exposure(customer_row.iloc[0]['CustomerID'])
+
+    return evaluate_offers(customer_row, exposure, store.version, tenures, interest_rates)
+
+
+def evaluate_offers(customer_row, exposure, data_version, tenures=None, interest_rates=None):
+    """
+    Build the get_loan_offers response from a customer's data that was 
+    already fetched, so the async variant can reuse it.
+
+    Parameters:
+    - customer_row (pd.DataFrame): The customer's one-row DataFrame.
+    - exposure (np.void or None): The customer's exposure record from
+      DataStore.exposure(), or None if they have no loans.
+    - data_version (int): The data store version the rows come from.
+    - tenures (list of int, optional): Tenures to evaluate, in months.
+    - interest_rates (list of float, optional): Interest rates to evaluate.
+
+    Returns:
+    - dict: The response body, as returned by get_loan_offers.
+    - int: HTTP status code (200).
+    """
+    customer = customer_row.iloc[0]
+    customer_id = customer['CustomerID']
+    tenures = [int(tenure) for tenure in (tenures or DEFAULT_TENURES)]
+    interest_rates = [float(rate) for rate in (interest_rates or DEFAULT_INTEREST_RATES)]
+
+    if exposure is not None:
+        credit_score, _ = credit_score_cache.get_or_compute(
+            customer_id,
+            data_version,
+            lambda: credit_score_from_exposure(exposure, customer['ApprovedLimit'])
+        )
+        minimum_interest_rate = float(minimum_interest_rates([credit_score])[0])
+        active_emi = exposure['active_emi']
+    else:
+        # No credit history: scored 0, but eligible at 12% and above
+        credit_score = 0
+        minimum_interest_rate = 12.0
+        active_emi = 0.0
+
+    amounts = max_loan_amounts([credit_score], [exposure is not None], [customer['MonthlySalary']],
+                               [active_emi], tenures, interest_rates)[0]
+
+    if amounts.max() > 0:
+        message = f"Eligible for up to {amounts.max():,.0f}"
+    elif exposure is not None and credit_score <= 10:
+        message = "Your credit score is too low."
+    elif minimum_interest_rate > max(interest_rates):
+        message = f"You are only eligible for interest rates above {minimum_interest_rate:g}%"
+    else:
+        message = "Sum of all your EMIs would exceed 50% of your monthly salary."
+
+    return {
+        "customer_id": customer_id,
+        "credit_score": credit_score,
+        "minimum_interest_rate": minimum_interest_rate if minimum_interest_rate != float('inf') else None,
+        "tenures": tenures,
+        "interest_rates": interest_rates,
+        "max_loan_amount": amounts.tolist(),
+        "message": message,
+    }, 200
@@ -0,0 +1,153 @@
+"""
+Loan offers: the largest amount create_loan approves, for a whole grid of
+tenures and interest rates at once.
+
+The rules are those of create_loan:
+- With credit history, the credit score sets a floor on the interest rate
+  (get_eligibility) and the new EMI plus the EMIs of active loans must
+  stay within half the monthly salary. EMIs are linear in the amount, so
+  the cap of every (tenure, rate) cell is the EMI headroom divided by the
+  EMI of one unit of principal.
+- Without credit history, amounts up to 1,000,000 are approved at rates
+  of 12% and above. (check_eligibility scores these customers 0 and
+  rejects them; create_loan is what decides.)
+
+The grid of every customer is computed in one NumPy pass, for one customer
+(loan_service.get_loan_offers) or many (loan_offers_batch).
+"""
+import numpy as np
+import pandas as pd
+
+from amortization import monthly_installments
+from credit_scoring import credit_score_cache, credit_score_from_exposure
+from data_store import get_store
+
+
+DEFAULT_TENURES = (12, 24, 36, 60, 84, 120, 180)
+DEFAULT_INTEREST_RATES = (10, 12, 14, 16, 18)
+
+# get_eligibility: (lowest credit score of the band, lowest interest rate)
+# from the best band down; lower scores get no loan at all
+RATE_FLOORS = ((51, 0), (31, 12), (11, 16))
+
+NO_HISTORY_MAX_AMOUNT = 1_000_000
+NO_HISTORY_MIN_INTEREST_RATE = 12
+
+
+def minimum_interest_rates(credit_scores):
+    """
+    Return the lowest interest rate get_eligibility approves for each credit
+    score: 0 above 50, 12 above 30, 16 above 10 and infinity otherwise.
+
+    Parameters:
+    - credit_scores (array-like of int): The credit scores.
+
+    Returns:
+    - np.ndarray: The rate floor of each score.
+    """
+    credit_scores = np.asarray(credit_scores)
+    return np.select([credit_scores >= low for low, _ in RATE_FLOORS],
+                     [float(floor) for _, floor in RATE_FLOORS], default=np.inf)
+
+
+def max_loan_amounts(credit_scores, has_history, monthly_salaries, active_emis, tenures, interest_rates):
+    """
+    Compute the largest approvable loan amount of every customer for every
+    tenure and interest rate.
+
+    Parameters:
+    - credit_scores (array-like of int): Credit score of each customer.
+    - has_history (array-like of bool): Whether each customer has loans.
+    - monthly_salaries (array-like of float): Monthly salary of each customer.
+    - active_emis (array-like of float): Sum of the EMIs of each customer's
+      active loans.
+    - tenures (array-like of int): The tenures of the grid, in months.
+    - interest_rates (array-like of float): The interest rates of the grid,
+      in percent.
+
+    Returns:
+    - np.ndarray: Shape (customers, tenures, interest rates), the largest
+      whole amount approved in each cell; 0 where no amount is.
+    """
+    has_history = np.asarray(has_history, dtype=bool)[:, None, None]
+    monthly_salaries = np.asarray(monthly_salaries, dtype=float)
+    active_emis = np.asarray(active_emis, dtype=float)
+    tenures = np.asarray(tenures, dtype=float)
+    interest_rates = np.asarray(interest_rates, dtype=float)
+
+    # EMI of one unit of principal in every cell, shape (tenures, rates)
+    unit_installments = monthly_installments(1.0, interest_rates[None, :], tenures[:, None])
+
+    # create_loan rejects when the EMIs exceed half the salary, so the cap
+    # itself is allowed; round down to whole amounts so the answer passes
+    headroom = np.nan_to_num(np.maximum(monthly_salaries * 0.5 - active_emis, 0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        emi_capped = np.floor(headroom[:, None, None] / unit_installments[None, :, :])
+    emi_capped = np.nan_to_num(emi_capped, posinf=0.0)
+
+    rate_allowed = interest_rates[None, None, :] >= minimum_interest_rates(credit_scores)[:, None, None]
+    with_history = np.where(rate_allowed, emi_capped, 0.0)
+
+    without_history = np.where(interest_rates >= NO_HISTORY_MIN_INTEREST_RATE, float(NO_HISTORY_MAX_AMOUNT), 0.0)
+
+    return np.where(has_history, with_history, without_history[None, None, :])
+
+
+def loan_offers_batch(phone_numbers, tenures=DEFAULT_TENURES, interest_rates=DEFAULT_INTEREST_RATES, store=None):
+    """
+    Compute the offer grid of many customers at once.
+
+    Parameters:
+    - phone_numbers (array-like of int): The customers' phone numbers.
+      Numbers that match no customer are left out of the result.
+    - tenures (array-like of int): The tenures of the grid, in months.
+    - interest_rates (array-like of float): The interest rates of the grid.
+    - store (DataStore, optional): Defaults to the shared data store.
+
+    Returns:
+    - pd.DataFrame: One row per customer, tenure and interest rate, with
+      columns 'phone_no', 'customer_id', 'credit_score', 'tenure',
+      'interest_rate', 'max_loan_amount' and 'monthly_installment' (the EMI
+      of the maximum amount).
+    """
+    store = store or get_store()
+
+    # Join the phone numbers to the customers once; the first row wins for
+    # duplicated phones, like customer_by_phone
+    customers = store.customers()
+    customers = customers[~customers['PhoneNumber'].duplicated(keep='first')].set_index('PhoneNumber')
+    matched = customers.reindex(pd.to_numeric(pd.Series(phone_numbers), errors='coerce').to_numpy())
+    matched = matched[matched['CustomerID'].notna()]
+
+    phones = matched.index.to_numpy()
+    customer_ids = matched['CustomerID'].to_numpy()
+    salaries = matched['MonthlySalary'].to_numpy(dtype=float)
+
+    credit_scores, has_history, active_emis = [], [], []
+    for customer_id, approved_limit in zip(customer_ids, matched['ApprovedLimit'].to_numpy()):
+        exposure = store.exposure(customer_id, refresh=False)
+        credit_score, _ = credit_score_cache.get_or_compute(
+            customer_id,
+            store.version,
+            lambda: credit_score_from_exposure(exposure, approved_limit)
+        )
+        credit_scores.append(credit_score)
+        has_history.append(exposure is not None)
+        active_emis.append(exposure['active_emi'] if exposure is not None else 0.0)
+
+    amounts = max_loan_amounts(credit_scores, has_history, salaries, active_emis, tenures, interest_rates)
+
+    customer_count, tenure_count, rate_count = len(phones), len(tenures), len(interest_rates)
+    repeat = tenure_count * rate_count
+    grid_tenures = np.tile(np.repeat(np.asarray(tenures), rate_count), customer_count)
+    grid_rates = np.tile(np.asarray(interest_rates, dtype=float), customer_count * tenure_count)
+
+    return pd.DataFrame({
+        'phone_no': np.repeat(phones, repeat).astype(np.int64),
+        'customer_id': np.repeat(customer_ids, repeat),
+        'credit_score': np.repeat(credit_scores, repeat).astype(int),
+        'tenure': grid_tenures,
+        'interest_rate': grid_rates,
+        'max_loan_amount': amounts.ravel(),
+        'monthly_installment': monthly_installments(amounts.ravel(), grid_rates, grid_tenures),
+    })
@@ -0,0 +1,258 @@
+"""
+Scheduled re-scoring of every customer into dated score snapshots.
+
+Credit scores drift with the calendar even when no data changes: loans
+stop counting towards the approved limit when they pass their EndDate,
+and the months since approval grow every month. This job re-scores the
+customers on a schedule and writes the result to
+'<directory>/scores-<YYYY-MM-DD>.csv', one row per customer with the score,
+the warnings, and the approved limit and exposure aggregates (see
+exposure.py) the score was computed from.
+
+A run starts from the latest snapshot and re-scores only the customers
+whose score may have moved since:
+- new customers and customers whose approved limit changed;
+- customers whose loan aggregates changed: new loans, EMI payments, or
+  loans that ended and left the active totals;
+- customers with a loan whose EndDate fell between the last run and today;
+- on the first run of a calendar month, every customer with dated loans,
+  because the EMI history ratio divides by the months since approval.
+Each run appends how long it took and how many customers it touched to
+'<directory>/runs.jsonl'.
+
+The snapshots are for batch jobs and reporting; read one with
+read_snapshot(). Chat-time lookups deliberately do not read them:
+a stored score may only be served once the customer's live aggregates and
+approved limit are known to equal the ones it was computed from, and
+credit_score_from_exposure scores those same aggregates in O(1). A
+validated snapshot read therefore costs a file check and a comparison on
+top of the work it would save. Chat tools score from the data store's
+exposure aggregates (see DataStore.exposure) and always see writes made
+since the last run.
+
+Usage:
+    python rescoring.py [--every SECONDS] [--full] [--keep 30] [--directory PATH]
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+import time
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from credit_scoring import calculate_credit_scores
+from data_store import file_lock, get_store
+from exposure import EXPOSURE_DTYPE, aggregate_loans, compare_aggregates
+from instrumentation import instrument
+
+
+SCORE_SNAPSHOT_DIR = os.environ.get("LOAN_SCORE_DIR", "dummy data/scores")
+SNAPSHOT_PREFIX = "scores-"
+RUN_LOG = "runs.jsonl"
+
+SNAPSHOT_COLUMNS = ['CustomerID', 'credit_score', 'warnings', 'ApprovedLimit'] + list(EXPOSURE_DTYPE.names)
+
+
+def snapshot_path(directory, day):
+    """
+    Return the path of the snapshot of a day.
+    """
+    return os.path.join(directory, f"{SNAPSHOT_PREFIX}{day.isoformat()}.csv")
+
+
+def latest_snapshot(directory):
+    """
+    Find the most recent snapshot in a directory.
+
+    Parameters:
+    - directory (str): The snapshot directory.
+
+    Returns:
+    - tuple or None: (path, date) of the latest snapshot, or None if there
+      is none.
+    """
+    paths = sorted(glob.glob(os.path.join(directory, f"{SNAPSHOT_PREFIX}*.csv")))
+    if not paths:
+        return None
+    day = os.path.basename(paths[-1])[len(SNAPSHOT_PREFIX):-len(".csv")]
+    return paths[-1], date.fromisoformat(day)
+
+
+def read_snapshot(path):
+    """
+    Read a score snapshot.
+
+    Parameters:
+    - path (str): The snapshot file.
+
+    Returns:
+    - pd.DataFrame: Indexed by CustomerID, with 'credit_score', 'warnings'
+      (lists), 'ApprovedLimit' and the fields of EXPOSURE_DTYPE, which are
+      missing for customers without loans.
+    """
+    snapshot = pd.read_csv(path, float_precision='round_trip').set_index('CustomerID')
+    # Few distinct warning lists; parse each once
+    parsed = {text: json.loads(text) for text in snapshot['warnings'].unique()}
+    snapshot['warnings'] = [parsed[text] for text in snapshot['warnings']]
+    snapshot['earliest_approval'] = pd.to_datetime(snapshot['earliest_approval']).astype('datetime64[s]')
+    return snapshot
+
+
+def _write_snapshot(snapshot, path):
+    frame = snapshot.reset_index()
+    serialized = {}
+    for warnings in frame['warnings']:
+        key = tuple(warnings)
+        if key not in serialized:
+            serialized[key] = json.dumps(warnings)
+    frame['warnings'] = [serialized[tuple(warnings)] for warnings in frame['warnings']]
+
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    frame[SNAPSHOT_COLUMNS].to_csv(temporary_path, index=False)
+    os.replace(temporary_path, path)
+
+
+def _customers_to_rescore(previous, previous_day, customers, aggregates, loans, today):
+    """
+    Return the CustomerIDs whose score may differ from the previous
+    snapshot, and the number of customers selected for each reason.
+    """
+    customer_ids = customers.index
+    stored = previous.reindex(customer_ids)
+
+    new = ~customer_ids.isin(previous.index)
+    limit_changed = ~new & ~np.isclose(stored['ApprovedLimit'].to_numpy(dtype=float),
+                                       customers['ApprovedLimit'].to_numpy(dtype=float), equal_nan=True)
+    changed = ~compare_aggregates(stored[list(EXPOSURE_DTYPE.names)], aggregates.reindex(customer_ids)).all(axis=1)
+
+    ended = (loans['end_date'] > pd.Timestamp(previous_day)) & (loans['end_date'] <= pd.Timestamp(today))
+    matured = customer_ids.isin(loans.loc[ended, 'CustomerID'].unique())
+
+    if (previous_day.year, previous_day.month) != (today.year, today.month):
+        new_month = customer_ids.isin(aggregates.index[aggregates['dated_loans'] > 0])
+    else:
+        new_month = np.zeros(len(customer_ids), dtype=bool)
+
+    selected = new | limit_changed | changed.to_numpy() | matured | new_month
+    reasons = {
+        "new_customers": int(new.sum()),
+        "limit_changed": int(limit_changed.sum()),
+        "loans_changed": int(changed.sum()),
+        "loans_matured": int(matured.sum()),
+        "new_month": int(new_month.sum()),
+    }
+    return customer_ids[selected], reasons
+
+
+@instrument("rescore")
+def rescore(store=None, directory=SCORE_SNAPSHOT_DIR, full=False, keep=30):
+    """
+    Run the re-scoring job once and write today's snapshot.
+
+    Parameters:
+    - store (DataStore or SqliteDataStore, optional): Defaults to the shared
+      data store.
+    - directory (str): The snapshot directory, created if needed.
+    - full (bool): Re-score every customer instead of only the ones whose
+      score may have changed since the latest snapshot.
+    - keep (int): Number of daily snapshots to keep; older ones are removed.
+
+    Returns:
+    - dict: The run report: 'as_of', 'seconds', 'customers',
+      'customers_rescored', 'previous_snapshot', 'snapshot', and 'reasons'
+      (customers selected by each rule; one customer may count for several).
+    """
+    started = time.perf_counter()
+    store = store or get_store()
+    today = date.today()
+    os.makedirs(directory, exist_ok=True)
+
+    with file_lock(os.path.join(directory, "rescore")):
+        store.refresh()
+        customers = store.customers().drop_duplicates('CustomerID').set_index('CustomerID')
+        loans = store.loans()
+        aggregates = aggregate_loans(loans)
+
+        previous = None if full else latest_snapshot(directory)
+        if previous is None:
+            snapshot = None
+            rescored_ids = customers.index
+            reasons = {"full": len(rescored_ids)}
+        else:
+            snapshot = read_snapshot(previous[0])
+            rescored_ids, reasons = _customers_to_rescore(snapshot, previous[1], customers, aggregates, loans, today)
+
+        path = snapshot_path(directory, today)
+        if snapshot is not None and len(rescored_ids) == 0 and snapshot.index.equals(customers.index):
+            # Nothing moved: carry the previous snapshot over to today
+            if previous[0] != path:
+                temporary_path = f"{path}.{os.getpid()}.tmp"
+                shutil.copyfile(previous[0], temporary_path)
+                os.replace(temporary_path, path)
+        else:
+            rescored_customers = customers.loc[rescored_ids].reset_index()
+            scores = calculate_credit_scores(rescored_customers, loans[loans['CustomerID'].isin(rescored_ids)])
+
+            result = pd.DataFrame(index=customers.index)
+            if snapshot is not None:
+                result[['credit_score', 'warnings']] = snapshot[['credit_score', 'warnings']].reindex(customers.index)
+            else:
+                result['credit_score'] = 0
+                result['warnings'] = None
+            result.loc[rescored_ids, 'credit_score'] = scores['credit_score'].to_numpy()
+            result.loc[rescored_ids, 'warnings'] = pd.Series(scores['warnings'].to_list(), index=rescored_ids)
+            result['credit_score'] = result['credit_score'].astype(int)
+            result['ApprovedLimit'] = customers['ApprovedLimit']
+            _write_snapshot(result.join(aggregates), path)
+
+        for old_path in sorted(glob.glob(os.path.join(directory, f"{SNAPSHOT_PREFIX}*.csv")))[:-max(keep, 1)]:
+            os.remove(old_path)
+
+        report = {
+            "as_of": today.isoformat(),
+            "finished_at": datetime.now().isoformat(timespec='seconds'),
+            "seconds": time.perf_counter() - started,
+            "customers": len(customers),
+            "customers_rescored": len(rescored_ids),
+            "reasons": reasons,
+            "previous_snapshot": previous[0] if previous else None,
+            "snapshot": path,
+        }
+        with open(os.path.join(directory, RUN_LOG), "a") as log:
+            log.write(json.dumps(report) + "\n")
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score customers into dated score snapshots.")
+    parser.add_argument("--every", type=float, default=None,
+                        help="run every SECONDS until interrupted instead of once")
+    parser.add_argument("--full", action="store_true", help="re-score every customer on the first run")
+    parser.add_argument("--keep", type=int, default=30, help="daily snapshots to keep")
+    parser.add_argument("--directory", default=SCORE_SNAPSHOT_DIR, help="snapshot directory")
+    args = parser.parse_args()
+
+    full = args.full
+    while True:
+        report = rescore(directory=args.directory, full=full, keep=args.keep)
+        full = False
+        print(f"{report['finished_at']} re-scored {report['customers_rescored']} of {report['customers']} "
+              f"customers in {report['seconds']:.2f} s -> {report['snapshot']}", file=sys.stderr, flush=True)
+        print(json.dumps(report), flush=True)
+
+        if args.every is None:
+            return
+        try:
+            time.sleep(args.every)
+        except KeyboardInterrupt:
+            return
+
+
+if __name__ == "__main__":
+    main()
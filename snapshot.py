@@ -0,0 +1,132 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from data_store import CUSTOMER_DATA_PATH, LOAN_DATA_PATH, parse_dates, _file_signature
+
+
+SNAPSHOT_DIR = "dummy data/snapshot"
+
+DATE_COLUMNS = ['DateofApproval', 'EndDate', 'DateOfApproval']
+ID_COLUMNS = ['CustomerID', 'LoanID']
+
+MANIFEST_FILE = "manifest.json"
+
+
+def _to_column_array(name, values):
+    """
+    Convert one DataFrame column into an array that np.load can memory map.
+
+    Dates become datetime64[s], IDs become int64 when they have no gaps and
+    text becomes fixed-width unicode (object arrays cannot be mapped).
+    """
+    if name in DATE_COLUMNS:
+        return parse_dates(values).to_numpy(dtype='datetime64[s]')
+
+    if name in ID_COLUMNS and not values.isna().any():
+        return values.to_numpy(dtype=np.int64)
+
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy()
+
+    return values.fillna('').astype(str).to_numpy(dtype=str)
+
+
+def write_table_snapshot(csv_path, table_dir):
+    """
+    Convert one CSV table into a directory of .npy column files.
+
+    The columns are written to a temporary directory that is then swapped in
+    place, so readers see either the old or the new snapshot, never a mix.
+
+    Parameters:
+    - csv_path (str): Path of the source CSV file.
+    - table_dir (str): Directory that will hold the table's column files.
+
+    Returns:
+    - dict: The manifest written next to the column files.
+    """
+    signature = _file_signature(csv_path)
+    table = pd.read_csv(csv_path)
+
+    tmp_dir = f"{table_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    columns = []
+    for position, name in enumerate(table.columns):
+        file_name = f"{position:03d}.npy"
+        np.save(os.path.join(tmp_dir, file_name), _to_column_array(name, table[name]))
+        columns.append({"name": name, "file": file_name})
+
+    manifest = {"source": csv_path, "source_signature": list(signature), "columns": columns}
+    with open(os.path.join(tmp_dir, MANIFEST_FILE), "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+
+    old_dir = f"{table_dir}.old-{os.getpid()}"
+    if os.path.exists(table_dir):
+        os.replace(table_dir, old_dir)
+    os.replace(tmp_dir, table_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+    return manifest
+
+
+def write_snapshot(snapshot_dir=SNAPSHOT_DIR, customer_path=CUSTOMER_DATA_PATH, loan_path=LOAN_DATA_PATH):
+    """
+    Convert the customer and loan CSV files into a columnar snapshot.
+
+    Parameters:
+    - snapshot_dir (str): Directory that will hold the snapshot.
+    - customer_path (str): Path of the customer data CSV file.
+    - loan_path (str): Path of the loan data CSV file.
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    write_table_snapshot(customer_path, os.path.join(snapshot_dir, "customers"))
+    write_table_snapshot(loan_path, os.path.join(snapshot_dir, "loans"))
+
+
+def load_table_snapshot(table_dir, expected_signature=None):
+    """
+    Open a table snapshot with its column files memory mapped.
+
+    Numeric, ID and date columns are backed directly by the mapped files, so
+    worker processes opening the same snapshot share those pages through the
+    OS page cache instead of each holding a parsed copy. Text columns are
+    materialized because pandas cannot use fixed-width unicode in place.
+
+    Parameters:
+    - table_dir (str): Directory written by write_table_snapshot.
+    - expected_signature (tuple, optional): Signature of the source CSV file.
+      If given and it does not match the one the snapshot was built from,
+      the snapshot is considered stale.
+
+    Returns:
+    - pd.DataFrame or None: The table, or None if the snapshot is missing
+      or stale.
+    """
+    try:
+        with open(os.path.join(table_dir, MANIFEST_FILE)) as manifest_file:
+            manifest = json.load(manifest_file)
+    except FileNotFoundError:
+        return None
+
+    if expected_signature is not None and tuple(manifest["source_signature"]) != tuple(expected_signature):
+        return None
+
+    data = {}
+    for column in manifest["columns"]:
+        values = np.load(os.path.join(table_dir, column["file"]), mmap_mode='r')
+        if values.dtype.kind == 'U':
+            values = pd.Series(values).replace('', np.nan)
+        data[column["name"]] = values
+
+    return pd.DataFrame(data, copy=False)
+
+
+if __name__ == "__main__":
+    write_snapshot()
+    print(f"Snapshot written to {SNAPSHOT_DIR}")
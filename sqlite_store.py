@@ -0,0 +1,555 @@
+"""
+SQLite storage backend for the customer and loan tables.
+
+SqliteDataStore serves the same interface as data_store.DataStore, but
+every lookup is an indexed query against a SQLite database in WAL mode
+instead of a scan of an in-memory copy of the CSV files. Readers never
+block the writer, and write_transaction() runs a read-check-write sequence
+as one IMMEDIATE transaction, so two sessions cannot both pass the
+eligibility checks against the same exposure and then both insert a loan.
+
+The CSV files stay the import/export format. The database stores one
+column per field: the differently cased duplicates of the CSV loan file
+('Monthlypayment' and 'MonthlyPayment', ...) are merged on import and all
+dates are stored as ISO strings.
+
+Set the LOAN_DATABASE environment variable to a database path to make
+data_store.get_store() return a SqliteDataStore. Migrate the CSV files
+into a database, or export a database back to CSV files, with:
+    python sqlite_store.py import loans.db [--customers PATH] [--loans PATH] [--payments PATH] [--replace]
+    python sqlite_store.py export loans.db [--customers PATH] [--loans PATH]
+"""
+import argparse
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from data_store import (CUSTOMER_DATA_PATH, EMI_PAYMENT_DATA_PATH, LOAN_DATA_PATH, apply_emi_payments,
+                        derive_loan_columns, read_emi_payments)
+from exposure import EXPOSURE_DTYPE
+from instrumentation import counts_rows, instrument
+
+
+CUSTOMER_COLUMNS = {
+    'CustomerID': 'INTEGER',
+    'FirstName': 'TEXT',
+    'LastName': 'TEXT',
+    'Age': 'INTEGER',
+    'PhoneNumber': 'INTEGER',
+    'MonthlySalary': 'REAL',
+    'ApprovedLimit': 'NUMERIC',
+}
+
+LOAN_COLUMNS = {
+    'CustomerID': 'INTEGER',
+    'LoanID': 'INTEGER',
+    'LoanAmount': 'NUMERIC',
+    'Tenure': 'INTEGER',
+    'InterestRate': 'REAL',
+    'MonthlyPayment': 'REAL',
+    'EMIsPaidOnTime': 'REAL',
+    'DateOfApproval': 'TEXT',   # YYYY-MM-DD
+    'EndDate': 'TEXT',          # YYYY-MM-DD
+}
+
+SCHEMA = [
+    f"CREATE TABLE IF NOT EXISTS customers ({', '.join(f'{name} {kind}' for name, kind in CUSTOMER_COLUMNS.items())})",
+    f"CREATE TABLE IF NOT EXISTS loans ({', '.join(f'{name} {kind}' for name, kind in LOAN_COLUMNS.items())})",
+    # PhoneNumber is not unique in the shipped data; lookups take the first row
+    "CREATE INDEX IF NOT EXISTS customers_phone ON customers (PhoneNumber)",
+    "CREATE INDEX IF NOT EXISTS customers_id ON customers (CustomerID)",
+    "CREATE INDEX IF NOT EXISTS loans_customer ON loans (CustomerID)",
+    "CREATE INDEX IF NOT EXISTS loans_id ON loans (LoanID)",
+    # LoanIDs repeat across customers in the shipped data, so the index
+    # cannot be UNIQUE; a new loan must still not reuse any LoanID, and the
+    # indexed check aborts the write transaction if it does
+    """
+    CREATE TRIGGER IF NOT EXISTS loans_new_id BEFORE INSERT ON loans
+    WHEN EXISTS (SELECT 1 FROM loans WHERE LoanID = NEW.LoanID)
+    BEGIN
+        SELECT RAISE(ABORT, 'LoanID already in use');
+    END
+    """,
+]
+
+# One row of exposure.EXPOSURE_DTYPE per customer, from the indexed loans.
+# A loan is active while its end date is after today, like
+# data_store.derive_loan_columns; ISO dates compare correctly as strings.
+EXPOSURE_QUERY = """
+    SELECT
+        TOTAL(CASE WHEN EndDate > :today THEN LoanAmount END),
+        TOTAL(CASE WHEN EndDate > :today THEN MonthlyPayment END),
+        COUNT(*),
+        TOTAL(EMIsPaidOnTime),
+        TOTAL(Tenure),
+        COUNT(Tenure),
+        MIN(DateOfApproval),
+        TOTAL(CAST(substr(DateOfApproval, 1, 4) AS INTEGER) * 12 + CAST(substr(DateOfApproval, 6, 2) AS INTEGER)),
+        COUNT(DateOfApproval)
+    FROM loans
+    WHERE CustomerID = :customer_id
+"""
+
+
+def _iso_dates(values):
+    """
+    Format a datetime64 column as ISO date strings, None where missing.
+    """
+    return values.dt.strftime('%Y-%m-%d').astype(object).where(values.notna(), None)
+
+
+def normalize_loans(loans, payments=None):
+    """
+    Convert a loan table read from the CSV file to the database columns.
+
+    Parameters:
+    - loans (pd.DataFrame): The raw loan table.
+    - payments (pd.Series, optional): EMI payments logged since, as
+      returned by data_store.read_emi_payments(); they are added to
+      'EMIsPaidOnTime'.
+
+    Returns:
+    - pd.DataFrame: The columns of LOAN_COLUMNS, with the duplicated fields
+      merged and the dates as ISO strings.
+    """
+    derived = derive_loan_columns(loans)
+    if payments is not None:
+        derived = apply_emi_payments(derived, payments)
+
+    return pd.DataFrame({
+        'CustomerID': loans['CustomerID'],
+        'LoanID': loans['LoanID'],
+        'LoanAmount': loans['LoanAmount'],
+        'Tenure': loans['Tenure'],
+        'InterestRate': loans['InterestRate'],
+        'MonthlyPayment': derived['monthly_payment'],
+        'EMIsPaidOnTime': derived['emis_paid_on_time'],
+        'DateOfApproval': _iso_dates(derived['approval_date']),
+        'EndDate': _iso_dates(derived['end_date']),
+    })
+
+
+def _insert_rows(connection, table, columns, frame, chunk_size=100_000):
+    statement = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    for start in range(0, len(frame), chunk_size):
+        chunk = frame.iloc[start:start + chunk_size]
+        # INTEGER affinity stores whole floats such as the CSV's 14.0 IDs as
+        # integers; missing values become NULL
+        values = [chunk[column].astype(object).where(chunk[column].notna(), None) for column in columns]
+        connection.executemany(statement, zip(*values))
+
+
+def import_csv(database_path, customer_path=CUSTOMER_DATA_PATH, loan_path=LOAN_DATA_PATH, replace=False,
+               payment_path=EMI_PAYMENT_DATA_PATH):
+    """
+    Create a database from the customer and loan CSV files.
+
+    Parameters:
+    - database_path (str): The database to create.
+    - customer_path (str): The customer CSV file.
+    - loan_path (str): The loan CSV file.
+    - replace (bool): Replace the tables of an existing database instead
+      of refusing to import into it.
+    - payment_path (str): The EMI payment log of the loan file, if any; its
+      payments are folded into 'EMIsPaidOnTime'.
+
+    Returns:
+    - dict: The number of 'customers' and 'loans' imported.
+
+    Raises:
+    - FileExistsError: If the database already holds data and replace is
+      False.
+    """
+    customers = pd.read_csv(customer_path)
+    loans = normalize_loans(pd.read_csv(loan_path), read_emi_payments(payment_path))
+
+    connection = _connect(database_path)
+    try:
+        existing = connection.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN ('customers', 'loans')").fetchone()[0]
+        if existing and not replace:
+            raise FileExistsError(f"{database_path} already holds loan data; pass replace=True to overwrite it")
+
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute("DROP TABLE IF EXISTS customers")
+            connection.execute("DROP TABLE IF EXISTS loans")
+            # Tables first, indexes after the bulk insert
+            for statement in SCHEMA[:2]:
+                connection.execute(statement)
+            _insert_rows(connection, "customers", CUSTOMER_COLUMNS, customers)
+            _insert_rows(connection, "loans", LOAN_COLUMNS, loans)
+            for statement in SCHEMA[2:]:
+                connection.execute(statement)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("ANALYZE")
+    finally:
+        connection.close()
+
+    return {"customers": len(customers), "loans": len(loans)}
+
+
+def export_csv(database_path, customer_path=CUSTOMER_DATA_PATH, loan_path=LOAN_DATA_PATH):
+    """
+    Write the tables of a database to CSV files.
+
+    Every file is written next to its destination and then renamed over
+    it, so a DataStore reading the files never sees a partial table. The
+    exported 'EMIsPaidOnTime' already includes every recorded EMI payment,
+    so the files must not be paired with an older EMI payment log.
+
+    Parameters:
+    - database_path (str): The database to export.
+    - customer_path (str): The customer CSV file to write.
+    - loan_path (str): The loan CSV file to write.
+
+    Returns:
+    - dict: The number of 'customers' and 'loans' exported.
+    """
+    connection = _connect(database_path)
+    try:
+        # One read transaction, so both files come from the same snapshot
+        connection.execute("BEGIN")
+        customers = pd.read_sql_query("SELECT * FROM customers ORDER BY rowid", connection)
+        loans = pd.read_sql_query("SELECT * FROM loans ORDER BY rowid", connection)
+        connection.execute("COMMIT")
+    finally:
+        connection.close()
+
+    for frame, path in ((customers, customer_path), (loans, loan_path)):
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        frame.to_csv(temporary_path, index=False)
+        os.replace(temporary_path, path)
+
+    return {"customers": len(customers), "loans": len(loans)}
+
+
+def _connect(database_path, timeout=30.0):
+    # Autocommit mode; transactions are started explicitly
+    connection = sqlite3.connect(database_path, timeout=timeout, isolation_level=None, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode = WAL")
+    # Every commit is synced to disk, like the fsync of a CSV append
+    connection.execute("PRAGMA synchronous = FULL")
+    return connection
+
+
+class SqliteDataStore:
+    """
+    Customer and loan tables in a SQLite database.
+
+    Offers the same methods as data_store.DataStore, so the tools work
+    unchanged on either backend. Lookups by phone number and customer ID
+    use indexes, and a customer's exposure is aggregated by one indexed
+    query, so nothing is loaded up front. customers() and loans() read the
+    whole table and are meant for batch jobs.
+
+    The store uses one connection per process. Calls from different
+    threads are serialized on it; other processes read concurrently
+    thanks to WAL mode and wait up to `timeout` seconds for the write lock.
+    """
+
+    def __init__(self, database_path, timeout=30.0):
+        self.database_path = database_path
+
+        self.timeout = timeout
+
+        self._lock = threading.RLock()
+        self._connection = _connect(database_path, timeout)
+        with self._lock:
+            for statement in SCHEMA:
+                self._connection.execute(statement)
+
+        # A SQLite connection must not be used across fork(); forked workers
+        # (see http_service.py) open their own
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reconnect)
+
+        # Whether the thread holding self._lock is inside write_transaction()
+        self._in_transaction = False
+
+        # Changes whenever another connection commits
+        self._data_version = None
+
+        # Bumped when another process changed the data, so callers can tell
+        # that cached results are stale; own writes invalidate explicitly
+        self.version = 0
+
+    def _reconnect(self):
+        self._lock = threading.RLock()
+        self._connection = _connect(self.database_path, self.timeout)
+        self._in_transaction = False
+        self._data_version = None
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def refresh(self):
+        """
+        Check whether another process changed the database since the last
+        check.
+
+        Returns:
+        - bool: True if it did (and the version was bumped), False otherwise.
+        """
+        with self._lock:
+            data_version = self._connection.execute("PRAGMA data_version").fetchone()[0]
+            changed = self._data_version is not None and data_version != self._data_version
+            self._data_version = data_version
+            if changed:
+                self.version += 1
+            return changed
+
+    @contextmanager
+    def _transaction(self):
+        """
+        Run the block in an IMMEDIATE transaction, or inside the one that is
+        already open.
+        """
+        with self._lock:
+            if self._in_transaction:
+                yield
+                return
+
+            self._connection.execute("BEGIN IMMEDIATE")
+            self._in_transaction = True
+            try:
+                yield
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            else:
+                self._connection.execute("COMMIT")
+            finally:
+                self._in_transaction = False
+
+    @contextmanager
+    def write_transaction(self):
+        """
+        Run a read-check-write sequence atomically.
+
+        The block runs in one IMMEDIATE transaction, which takes the
+        database write lock up front: lookups inside it see every committed
+        write, no other writer can commit until it ends, and its writes are
+        rolled back if it raises.
+        """
+        with self._transaction():
+            self.refresh()
+            yield self
+
+    def _query(self, sql, parameters=()):
+        with self._lock:
+            return pd.read_sql_query(sql, self._connection, params=parameters)
+
+    @instrument("sqlite_read")
+    @counts_rows
+    def customers(self):
+        """
+        Return the full customer table.
+
+        Returns:
+        - pd.DataFrame: The customer data.
+        """
+        self.refresh()
+        return self._query("SELECT * FROM customers ORDER BY rowid")
+
+    @instrument("sqlite_read")
+    @counts_rows
+    def loans(self):
+        """
+        Return the full loan table.
+
+        Returns:
+        - pd.DataFrame: The loan data, with the columns of
+          derive_loan_columns().
+        """
+        self.refresh()
+        return derive_loan_columns(self._query("SELECT * FROM loans ORDER BY rowid"))
+
+    @counts_rows
+    def customer_by_phone(self, phone_no, refresh=True):
+        """
+        Look up a customer by phone number.
+
+        Parameters:
+        - phone_no (int): The phone number of the customer.
+        - refresh (bool): Check for changes by other processes first.
+
+        Returns:
+        - pd.DataFrame or None: A one-row DataFrame with the customer's data
+          if found; otherwise, None.
+        """
+        if refresh:
+            self.refresh()
+        customer = self._query("SELECT * FROM customers WHERE PhoneNumber = ? ORDER BY rowid LIMIT 1", (int(phone_no),))
+
+        return customer if not customer.empty else None
+
+    @counts_rows
+    def loans_for_customer(self, customer_id, refresh=True):
+        """
+        Return all loans belonging to a customer.
+
+        Parameters:
+        - customer_id (int): The ID of the customer.
+        - refresh (bool): Check for changes by other processes first.
+
+        Returns:
+        - pd.DataFrame: The customer's loan rows with the columns of
+          derive_loan_columns(), empty if they have none.
+        """
+        if refresh:
+            self.refresh()
+        loans = self._query("SELECT * FROM loans WHERE CustomerID = ? ORDER BY rowid", (int(customer_id),))
+
+        return derive_loan_columns(loans)
+
+    def exposure(self, customer_id, refresh=True):
+        """
+        Return the exposure aggregates of a customer.
+
+        Parameters:
+        - customer_id (int): The ID of the customer.
+        - refresh (bool): Check for changes by other processes first.
+
+        Returns:
+        - np.void or None: A record with the fields of
+          exposure.EXPOSURE_DTYPE, or None if the customer has no loans.
+        """
+        if refresh:
+            self.refresh()
+        with self._lock:
+            row = self._connection.execute(
+                EXPOSURE_QUERY, {"today": date.today().isoformat(), "customer_id": int(customer_id)}).fetchone()
+
+        (active_amount, active_emi, loan_count, emis_paid_on_time, total_tenure, tenured_loans,
+         earliest_approval, approval_month_sum, dated_loans) = row
+        if loan_count == 0:
+            return None
+
+        record = np.zeros((), dtype=EXPOSURE_DTYPE)[()]
+        record['active_amount'] = active_amount
+        record['active_emi'] = active_emi
+        record['loan_count'] = loan_count
+        record['emis_paid_on_time'] = emis_paid_on_time
+        record['total_tenure'] = total_tenure
+        record['tenured_loans'] = tenured_loans
+        record['earliest_approval'] = np.datetime64(earliest_approval) if earliest_approval else np.datetime64('NaT')
+        record['approval_month_sum'] = approval_month_sum
+        record['dated_loans'] = dated_loans
+        return record
+
+    def max_loan_id(self):
+        """
+        Return the highest LoanID in the loan table.
+
+        Returns:
+        - int: The highest LoanID, or 0 if there are no loans.
+        """
+        with self._lock:
+            # Served from the LoanID index
+            last_id = self._connection.execute("SELECT MAX(LoanID) FROM loans").fetchone()[0]
+        return int(last_id or 0)
+
+    def add_customer(self, customer):
+        """
+        Insert a new customer, allocating the next CustomerID.
+
+        Parameters:
+        - customer (dict): Column -> value for the new customer, without
+          'CustomerID'.
+
+        Returns:
+        - int: The CustomerID assigned to the new customer.
+
+        Raises:
+        - ValueError: If the customer has a column the table does not have.
+        """
+        with self._transaction():
+            # Served from the CustomerID index
+            last_id = self._connection.execute("SELECT MAX(CustomerID) FROM customers").fetchone()[0]
+            customer_id = int(last_id or 0) + 1
+            self._insert("customers", CUSTOMER_COLUMNS, {"CustomerID": customer_id, **customer})
+
+        return customer_id
+
+    def add_loan(self, loan):
+        """
+        Insert a new loan row.
+
+        Parameters:
+        - loan (dict): Column -> value for the new loan, dates as ISO strings.
+
+        Raises:
+        - ValueError: If the loan has a column the table does not have.
+        - sqlite3.IntegrityError: If its LoanID is already in use.
+        """
+        with self._transaction():
+            self._insert("loans", LOAN_COLUMNS, loan)
+
+    @instrument("sqlite_write")
+    def record_emi_payments(self, customer_id, loan_id, count=1):
+        """
+        Record EMIs of a loan that were paid on time.
+
+        Parameters:
+        - customer_id (int): The ID of the customer.
+        - loan_id (int): The ID of the customer's loan.
+        - count (float): The number of EMIs paid on time.
+
+        Raises:
+        - ValueError: If count is not positive or the customer has no loan
+          with that ID.
+        """
+        if not count > 0:
+            raise ValueError(f"EMI count must be positive, got {count}")
+
+        with self._transaction():
+            updated = self._connection.execute(
+                "UPDATE loans SET EMIsPaidOnTime = IFNULL(EMIsPaidOnTime, 0) + ? WHERE CustomerID = ? AND LoanID = ?",
+                (float(count), int(customer_id), int(loan_id))).rowcount
+            if updated == 0:
+                raise ValueError(f"Customer {customer_id} has no loan {loan_id}")
+
+    @instrument("sqlite_write")
+    def _insert(self, table, columns, row):
+        unknown = set(row) - set(columns)
+        if unknown:
+            raise ValueError(f"Columns not present in {table}: {sorted(unknown)}")
+
+        names = list(row)
+        values = [value.item() if isinstance(value, np.generic) else value for value in row.values()]
+        self._connection.execute(
+            f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})", values)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move the loan data between CSV files and a SQLite database.")
+    parser.add_argument("command", choices=["import", "export"],
+                        help="import: CSV files -> database, export: database -> CSV files")
+    parser.add_argument("database", help="path of the SQLite database")
+    parser.add_argument("--customers", default=CUSTOMER_DATA_PATH, help="customer CSV file")
+    parser.add_argument("--loans", default=LOAN_DATA_PATH, help="loan CSV file")
+    parser.add_argument("--payments", default=EMI_PAYMENT_DATA_PATH, help="EMI payment log to fold in on import")
+    parser.add_argument("--replace", action="store_true", help="overwrite the tables of an existing database")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        counts = import_csv(args.database, args.customers, args.loans, replace=args.replace,
+                            payment_path=args.payments)
+        print(f"Imported {counts['customers']} customers and {counts['loans']} loans into {args.database}")
+    else:
+        counts = export_csv(args.database, args.customers, args.loans)
+        print(f"Exported {counts['customers']} customers and {counts['loans']} loans from {args.database}")
+
+
+if __name__ == "__main__":
+    main()
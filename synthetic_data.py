@@ -0,0 +1,241 @@
+"""
+Seeded synthetic customer and loan tables with the shipped CSV schema.
+
+The generated files can replace customer_data.csv and loan_data.csv to see
+how the tools behave at production size. Distributions follow the shipped
+sample: salaries are log-normal, tenures uniform over 3..180 months, rates
+uniform over 8..18%, approval dates uniform from 2010 up to the reference
+date, and customers have a Poisson number of loans (about 2.8 on average,
+so roughly 6% have none). Loans approved in the last year are written the
+way create_loan writes them (ISO dates in the 'MonthlyPayment',
+'EMIsPaidOnTime' and 'DateOfApproval' columns); older loans use the
+original columns and m/d/yyyy dates.
+
+Rows are generated and written in chunks, so memory stays bounded by the
+chunk size whatever the number of rows.
+
+Usage:
+    python synthetic_data.py OUTPUT_DIR --loans 1000000 [--seed 0]
+"""
+import argparse
+import os
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from amortization import monthly_installments
+
+
+CUSTOMER_COLUMNS = ['CustomerID', 'FirstName', 'LastName', 'Age', 'PhoneNumber', 'MonthlySalary', 'ApprovedLimit']
+LOAN_COLUMNS = ['CustomerID', 'LoanID', 'LoanAmount', 'Tenure', 'InterestRate', 'Monthlypayment',
+                'EMIspaidonTime', 'DateofApproval', 'EndDate', 'MonthlyPayment', 'EMIsPaidOnTime',
+                'DateOfApproval']
+
+LOANS_PER_CUSTOMER = 2.76
+
+FIRST_NAMES = np.array(['Aaron', 'Abbey', 'Aditi', 'Amit', 'Ananya', 'Arjun', 'Bella', 'Carlos', 'Deepa',
+                        'Divya', 'Ethan', 'Fatima', 'Grace', 'Harsh', 'Isha', 'Karan', 'Kavya', 'Liam',
+                        'Maya', 'Neha', 'Noah', 'Olivia', 'Priya', 'Rahul', 'Riya', 'Rohan', 'Sara',
+                        'Vikram', 'Zoe'])
+LAST_NAMES = np.array(['Agarwal', 'Brown', 'Chopra', 'Das', 'Garcia', 'Gonzalez', 'Gupta', 'Iyer', 'Jain',
+                       'Johnson', 'Kapoor', 'Khan', 'Lee', 'Mehta', 'Miller', 'Nair', 'Patel', 'Reddy',
+                       'Rao', 'Sharma', 'Singh', 'Smith', 'Verma', 'Wilson'])
+
+# Loan amounts are whole lakhs; weights follow the shipped sample
+LOAN_AMOUNTS = np.arange(1, 11) * 100_000
+LOAN_AMOUNT_WEIGHTS = np.array([48, 96, 85, 75, 98, 97, 77, 83, 90, 34]) / 783
+
+FIRST_APPROVAL = date(2010, 1, 1)
+AS_OF = date(2025, 1, 1)
+
+# Phone numbers are a bijection of the customer ID onto 10-digit numbers
+# starting with 6..9, so they are unique without tracking what was drawn
+PHONE_BASE = 6_000_000_000
+PHONE_RANGE = 4_000_000_000
+
+
+def _format_dates(days, iso):
+    """
+    Format datetime64[D] values as 'yyyy-mm-dd' or as unpadded 'm/d/yyyy'.
+
+    There are only a few thousand distinct days, so each is formatted once.
+    """
+    days, positions = np.unique(days, return_inverse=True)
+    months = days.astype('datetime64[M]')
+    years = pd.Series(months.astype('datetime64[Y]').astype(int) + 1970)
+    month_numbers = pd.Series(months.astype(int) % 12 + 1)
+    day_numbers = pd.Series((days - months).astype(int) + 1)
+
+    if iso:
+        formatted = (years.astype(str) + '-' + month_numbers.astype(str).str.zfill(2)
+                     + '-' + day_numbers.astype(str).str.zfill(2))
+    else:
+        formatted = month_numbers.astype(str) + '/' + day_numbers.astype(str) + '/' + years.astype(str)
+    return pd.Series(formatted.to_numpy(dtype=object)[positions])
+
+
+def _add_months(days, months):
+    """
+    Add a number of months to datetime64[D] values, keeping the day of the
+    month where it exists and clipping to the month's last day otherwise.
+    """
+    start_months = days.astype('datetime64[M]')
+    end_months = start_months + months.astype('timedelta64[M]')
+    month_lengths = ((end_months + 1).astype('datetime64[D]') - end_months.astype('datetime64[D]')).astype(int)
+    day_offsets = np.minimum((days - start_months).astype(int), month_lengths - 1)
+    return end_months.astype('datetime64[D]') + day_offsets
+
+
+def generate_customers(rng, first_id, count, phone_step, phone_offset):
+    """
+    Generate a block of customers with consecutive IDs.
+
+    Parameters:
+    - rng (np.random.Generator): Source of randomness.
+    - first_id (int): The ID of the first customer in the block.
+    - count (int): Number of customers.
+    - phone_step (int), phone_offset (int): Parameters of the ID -> phone
+      number bijection, shared by every block of a dataset.
+
+    Returns:
+    - pd.DataFrame: The customers, with the customer_data.csv columns.
+    """
+    customer_ids = np.arange(first_id, first_id + count)
+
+    salaries = np.clip(np.round(rng.lognormal(np.log(140_000), 0.5, count), -3), 25_000, 300_000)
+    limit_ratios = rng.lognormal(np.log(18), 0.6, count)
+    approved_limits = np.clip(np.round(salaries * limit_ratios, -5), 500_000, 5_000_000).astype(np.int64)
+
+    return pd.DataFrame({
+        'CustomerID': customer_ids.astype(float),
+        'FirstName': rng.choice(FIRST_NAMES, count),
+        'LastName': rng.choice(LAST_NAMES, count),
+        'Age': rng.integers(20, 71, count),
+        'PhoneNumber': PHONE_BASE + (customer_ids * phone_step + phone_offset) % PHONE_RANGE,
+        'MonthlySalary': salaries,
+        'ApprovedLimit': approved_limits,
+    }, columns=CUSTOMER_COLUMNS)
+
+
+def generate_loans(rng, customers, count, first_loan_id, as_of=AS_OF):
+    """
+    Generate loans for a block of customers.
+
+    Every loan belongs to a customer of the block drawn uniformly at random,
+    so loans per customer are Poisson distributed.
+
+    Parameters:
+    - rng (np.random.Generator): Source of randomness.
+    - customers (pd.DataFrame): The block of customers, as returned by
+      generate_customers().
+    - count (int): Number of loans.
+    - first_loan_id (int): The ID of the first loan in the block.
+    - as_of (date): The reference date; no loan is approved after it.
+
+    Returns:
+    - pd.DataFrame: The loans, with the loan_data.csv columns, grouped by
+      customer.
+    """
+    customer_ids = np.sort(rng.choice(customers['CustomerID'].to_numpy(), count))
+
+    loan_amounts = rng.choice(LOAN_AMOUNTS, count, p=LOAN_AMOUNT_WEIGHTS)
+    tenures = rng.integers(3, 181, count)
+    interest_rates = np.round(rng.uniform(8, 18, count), 2)
+    installments = np.round(monthly_installments(loan_amounts, interest_rates, tenures))
+
+    first_day = np.datetime64(FIRST_APPROVAL, 'D')
+    last_day = np.datetime64(as_of, 'D')
+    approval_dates = first_day + rng.integers(0, (last_day - first_day).astype(int), count).astype('timedelta64[D]')
+    end_dates = _add_months(approval_dates, tenures)
+
+    # Up to a full record of on-time payments for the months elapsed so far
+    months_elapsed = (np.datetime64(as_of, 'M') - approval_dates.astype('datetime64[M]')).astype(int)
+    emis_paid_on_time = np.round(np.minimum(months_elapsed, tenures) * rng.uniform(0.5, 1.0, count))
+
+    # Loans from the last year were booked through create_loan
+    recent = approval_dates > last_day - 365
+    iso_dates = _format_dates(approval_dates, iso=True)
+    legacy_dates = _format_dates(approval_dates, iso=False)
+
+    return pd.DataFrame({
+        'CustomerID': customer_ids,
+        'LoanID': np.arange(first_loan_id, first_loan_id + count),
+        'LoanAmount': loan_amounts,
+        'Tenure': tenures,
+        'InterestRate': interest_rates,
+        'Monthlypayment': np.where(recent, np.nan, installments),
+        'EMIspaidonTime': np.where(recent, np.nan, emis_paid_on_time),
+        'DateofApproval': legacy_dates.where(~recent, None),
+        'EndDate': _format_dates(end_dates, iso=True).where(recent, _format_dates(end_dates, iso=False)),
+        'MonthlyPayment': np.where(recent, installments, np.nan),
+        'EMIsPaidOnTime': np.where(recent, emis_paid_on_time, np.nan),
+        'DateOfApproval': iso_dates.where(recent, None),
+    }, columns=LOAN_COLUMNS)
+
+
+def write_dataset(directory, loans, seed=0, customers=None, as_of=AS_OF, chunk_size=200_000):
+    """
+    Write a synthetic customer_data.csv and loan_data.csv.
+
+    The same arguments always produce the same files.
+
+    Parameters:
+    - directory (str): Directory the two files are written to; created if
+      it does not exist.
+    - loans (int): Number of loan rows.
+    - seed (int): Seed of the random generator.
+    - customers (int, optional): Number of customer rows. Defaults to
+      loans / 2.76, the ratio of the shipped sample.
+    - as_of (date): The reference date; no loan is approved after it.
+    - chunk_size (int): Number of customers generated at a time.
+
+    Returns:
+    - dict: 'customer_path' and 'loan_path' of the written files and the
+      'customers' and 'loans' row counts.
+    """
+    if customers is None:
+        customers = max(1, round(loans / LOANS_PER_CUSTOMER))
+
+    os.makedirs(directory, exist_ok=True)
+    customer_path = os.path.join(directory, 'customer_data.csv')
+    loan_path = os.path.join(directory, 'loan_data.csv')
+
+    rng = np.random.default_rng(seed)
+    # An odd multiplier that is not a multiple of 5 is coprime with 4 * 10^9
+    phone_step = int(rng.integers(PHONE_RANGE // 4, PHONE_RANGE // 2)) * 10 + 3
+    phone_offset = int(rng.integers(0, PHONE_RANGE))
+
+    loans_written = 0
+    with open(customer_path, 'w', newline='') as customer_file, open(loan_path, 'w', newline='') as loan_file:
+        for start in range(0, customers, chunk_size):
+            count = min(chunk_size, customers - start)
+            # Spread the loans over the chunks in proportion to their size
+            loan_count = round(loans * (start + count) / customers) - loans_written
+
+            customer_block = generate_customers(rng, start + 1, count, phone_step, phone_offset)
+            loan_block = generate_loans(rng, customer_block, loan_count, 1000 + loans_written, as_of=as_of)
+
+            customer_block.to_csv(customer_file, header=start == 0, index=False)
+            loan_block.to_csv(loan_file, header=start == 0, index=False)
+            loans_written += loan_count
+
+    return {
+        'customer_path': customer_path,
+        'loan_path': loan_path,
+        'customers': customers,
+        'loans': loans_written,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", help="where to write customer_data.csv and loan_data.csv")
+    parser.add_argument("--loans", type=int, required=True, help="number of loan rows")
+    parser.add_argument("--customers", type=int, default=None, help="number of customer rows")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    written = write_dataset(args.directory, args.loans, seed=args.seed, customers=args.customers)
+    print(f"Wrote {written['customers']} customers to {written['customer_path']} "
+          f"and {written['loans']} loans to {written['loan_path']}")
@@ -0,0 +1,109 @@
+"""
+Compact specifications of the chat agent's tools.
+
+By default a llama_index FunctionTool is described by its signature and
+its full docstring, and the ReAct agent sends the description and argument
+schema of every tool with every step of every turn. The loan functions'
+docstrings run to several paragraphs each, written for developers. In
+compact mode every tool gets a one-line description and a typed argument
+schema with a short text per argument instead.
+
+Set the LOAN_COMPACT_TOOLS environment variable to "0" to register the
+tools with their full docstrings again, e.g. to compare the two.
+"""
+import json
+import os
+from typing import List, Optional
+
+from conversation_memory import estimate_tokens
+
+
+COMPACT_TOOLS = os.environ.get("LOAN_COMPACT_TOOLS", "1") != "0"
+
+PHONE = (int, ..., "Customer's 10-digit phone number")
+LOAN_AMOUNT = (float, ..., "Requested loan amount")
+INTEREST_RATE = (float, ..., "Requested annual interest rate in percent, e.g. 12.5")
+TENURE = (int, ..., "Loan duration in months")
+
+# Tool name -> (description, {argument: (type, default or ... if required,
+# description)}). Arguments left out keep their function defaults.
+TOOL_SPECS = {
+    "get_customer_info": (
+        "Look up a customer's profile (name, age, salary, approved limit) by phone number.",
+        {"phone_no": PHONE},
+    ),
+    "get_customer_overview": (
+        "Look up a customer's profile and all their loans in one call.",
+        {"phone_no": PHONE},
+    ),
+    "create_loan": (
+        "Create a loan if the customer is eligible; returns the loan ID or the rejection reasons. "
+        "Only call once the user has confirmed amount, rate and tenure.",
+        {"phone_no": PHONE, "loan_amount": LOAN_AMOUNT, "interest_rate": INTEREST_RATE, "tenure": TENURE},
+    ),
+    "view_loans": (
+        "List a customer's existing loans.",
+        {"phone_number": PHONE},
+    ),
+    "check_eligibility": (
+        "Check whether a loan would be approved, with credit score, applicable interest rate and "
+        "monthly installment. Does not create the loan.",
+        {"phone_no": PHONE, "loan_amount": LOAN_AMOUNT, "interest_rate": INTEREST_RATE, "tenure": TENURE},
+    ),
+    "get_loan_offers": (
+        "Largest approvable loan amount for each tenure and interest rate; use after a rejection.",
+        {
+            "phone_no": PHONE,
+            "tenures": (Optional[List[int]], None, "Tenures in months to quote; omit for the defaults"),
+            "interest_rates": (Optional[List[float]], None, "Interest rates in percent to quote; omit for the defaults"),
+        },
+    ),
+}
+
+
+def make_tool(fn, async_fn=None, compact=COMPACT_TOOLS):
+    """
+    Build the agent tool of a loan function.
+
+    Parameters:
+    - fn (callable): The function; its name must be a key of TOOL_SPECS
+      in compact mode.
+    - async_fn (callable, optional): Its async variant.
+    - compact (bool): Describe the tool with its TOOL_SPECS entry instead
+      of its signature and docstring.
+
+    Returns:
+    - FunctionTool: The tool.
+    """
+    from llama_index.core.tools import FunctionTool
+
+    if not compact:
+        return FunctionTool.from_defaults(fn=fn, async_fn=async_fn)
+
+    from pydantic import Field, create_model
+
+    description, arguments = TOOL_SPECS[fn.__name__]
+    schema = create_model(
+        fn.__name__,
+        **{name: (kind, Field(default, description=text)) for name, (kind, default, text) in arguments.items()}
+    )
+    return FunctionTool.from_defaults(fn=fn, async_fn=async_fn, name=fn.__name__, description=description,
+                                      fn_schema=schema)
+
+
+def tool_spec_tokens(tools):
+    """
+    Estimate the tokens the tool specifications add to every LLM call of
+    the ReAct agent: each tool's name, description and argument schema.
+
+    Parameters:
+    - tools (list of FunctionTool): The agent's tools.
+
+    Returns:
+    - int: The estimated token count.
+    """
+    return sum(
+        estimate_tokens(tool.metadata.name + tool.metadata.description
+                        + json.dumps(tool.metadata.get_parameters_dict()))
+        for tool in tools
+    )